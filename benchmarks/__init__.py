@@ -0,0 +1,10 @@
+from .harness import (
+    Benchmark,
+    Comparison,
+    compare,
+    load_results,
+    measure,
+    run_benchmarks,
+    save_results,
+)
+from .suites import SUITES, all_benchmarks
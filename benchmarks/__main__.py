@@ -0,0 +1,93 @@
+"""
+    Benchmarks of the cost model, the solvers, multistart tuning and a small
+    end-to-end trial
+
+    python -m benchmarks run --output benchmarks/baseline.json     # store a baseline
+    python -m benchmarks run --baseline benchmarks/baseline.json   # time and compare
+    python -m benchmarks run cost solver --filter L32              # some suites only
+    python -m benchmarks compare old.json new.json --threshold 0.1
+
+run and compare exit with status 1 when a benchmark regressed: its best time grew
+by more than --threshold and by more than the spread of its repeats.
+"""
+
+import argparse
+import sys
+import warnings
+
+from .harness import (
+    compare,
+    format_comparison,
+    format_result,
+    load_results,
+    run_benchmarks,
+    save_results,
+)
+from .suites import SUITES
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Run or compare benchmarks")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run = commands.add_parser("run")
+    run.add_argument("suites", nargs="*", help=f"any of {', '.join(SUITES)}, all by default")
+    run.add_argument("--filter", type=str, default=None, help="substring of names")
+    run.add_argument("--repeat", type=int, default=5)
+    run.add_argument("--min-time", type=float, default=0.2, help="seconds per repeat")
+    run.add_argument("--output", type=str, default=None, help="JSON results file")
+    run.add_argument("--baseline", type=str, default=None, help="JSON to compare to")
+    run.add_argument("--threshold", type=float, default=0.15)
+
+    diff = commands.add_parser("compare")
+    diff.add_argument("baseline", type=str)
+    diff.add_argument("current", type=str)
+    diff.add_argument("--threshold", type=float, default=0.15)
+
+    commands.add_parser("list")
+    args = parser.parse_args()
+
+    if args.command == "list":
+        for suite in SUITES.values():
+            for benchmark in suite():
+                print(benchmark.name)
+        return
+
+    if args.command == "compare":
+        baseline, current = load_results(args.baseline), load_results(args.current)
+    else:
+        unknown = set(args.suites) - set(SUITES)
+        if unknown:
+            parser.error(f"unknown suites {sorted(unknown)}")
+        # Solver starts that overflow are part of the work, not news
+        warnings.simplefilter("ignore", RuntimeWarning)
+        benchmarks = [
+            benchmark
+            for name in args.suites or SUITES
+            for benchmark in SUITES[name]()
+            if args.filter is None or args.filter in benchmark.name
+        ]
+        current = run_benchmarks(
+            benchmarks,
+            repeat=args.repeat,
+            min_time=args.min_time,
+            progress=lambda name, result: print(format_result(name, result)),
+        )
+        if args.output is not None:
+            settings = {"repeat": args.repeat, "min_time": args.min_time}
+            save_results(args.output, current, settings)
+        if args.baseline is None:
+            return
+        baseline = load_results(args.baseline)
+        # Only what ran this time is compared, not the suites left out
+        baseline = {name: baseline[name] for name in current if name in baseline}
+
+    comparisons = compare(baseline, current, threshold=args.threshold)
+    print()
+    print(format_comparison(comparisons))
+    if any(c.status == "regression" for c in comparisons):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,210 @@
+import json
+import math
+import os
+import platform
+import statistics
+import subprocess
+import time
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Sequence
+
+
+@dataclass(frozen=True)
+class Benchmark:
+    # setup builds the inputs (untimed) and returns the function that is timed.
+    # items is the number of operations one call performs, so results can be
+    # read per cost evaluation or per solve as well as per call
+    name: str
+    setup: Callable[[], Callable[[], object]]
+    items: int = 1
+
+
+def measure(
+    fn: Callable[[], object],
+    repeat: int = 5,
+    min_time: float = 0.2,
+    max_number: int = 10_000,
+) -> Dict[str, float]:
+    # The first call is a warmup (numba compiles the cost model on first use),
+    # the second sizes number, the calls per repeat, so each repeat takes min_time
+    fn()
+    start = time.perf_counter()
+    fn()
+    single = time.perf_counter() - start
+    number = max(1, min(max_number, math.ceil(min_time / max(single, 1e-9))))
+
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            fn()
+        times.append((time.perf_counter() - start) / number)
+
+    return {
+        "median": statistics.median(times),
+        "min": min(times),
+        "max": max(times),
+        "mean": statistics.fmean(times),
+        "stdev": statistics.stdev(times) if len(times) > 1 else 0.0,
+        "repeat": repeat,
+        "number": number,
+    }
+
+
+def run_benchmarks(
+    benchmarks: Sequence[Benchmark],
+    repeat: int = 5,
+    min_time: float = 0.2,
+    progress: Optional[Callable[[str, dict], None]] = None,
+) -> Dict[str, dict]:
+    results = {}
+    for benchmark in benchmarks:
+        try:
+            fn = benchmark.setup()
+            result = measure(fn, repeat=repeat, min_time=min_time)
+        except NotImplementedError:
+            # e.g. robust solves of policies whose solver has none yet
+            result = {"skipped": "not implemented"}
+        else:
+            result["items"] = benchmark.items
+            result["per_item"] = result["min"] / benchmark.items
+        results[benchmark.name] = result
+        if progress is not None:
+            progress(benchmark.name, result)
+
+    return results
+
+
+def environment() -> dict:
+    import numba
+    import numpy
+    import scipy
+
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+        ).stdout.strip()
+    except OSError:
+        commit = ""
+
+    return {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "commit": commit,
+        "python": platform.python_version(),
+        "numpy": numpy.__version__,
+        "scipy": scipy.__version__,
+        "numba": numba.__version__,
+        "machine": platform.machine(),
+        "processor": platform.processor(),
+        "cpus": os.cpu_count(),
+    }
+
+
+def save_results(path: str, results: Dict[str, dict], settings: dict) -> None:
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w") as file:
+        json.dump(
+            {"environment": environment(), "settings": settings, "results": results},
+            file,
+            indent=2,
+        )
+
+
+def load_results(path: str) -> Dict[str, dict]:
+    with open(path) as file:
+        return json.load(file)["results"]
+
+
+def spread(result: dict) -> float:
+    # Range of a result's repeats, two standard deviations for results saved
+    # before the max was recorded
+    if "max" in result:
+        return result["max"] - result["min"]
+    return 2 * result.get("stdev", 0.0)
+
+
+@dataclass
+class Comparison:
+    name: str
+    baseline: float
+    current: float
+    status: str  # regression, improvement, ok, new, missing or skipped
+    noise: float = math.nan
+
+    @property
+    def change(self) -> float:
+        return self.current / self.baseline - 1
+
+
+def compare(
+    baseline: Dict[str, dict],
+    current: Dict[str, dict],
+    threshold: float = 0.15,
+) -> List[Comparison]:
+    # A benchmark regresses when its best time per call (the repeat least
+    # disturbed by the rest of the machine) grows by more than threshold (0.15:
+    # 15% slower) and by more than the wider spread of the two results' repeats,
+    # and improves when it shrinks by as much
+    comparisons = []
+    for name in sorted(set(baseline) | set(current)):
+        old_result, new_result = baseline.get(name, {}), current.get(name, {})
+        old = old_result.get("min", math.nan)
+        new = new_result.get("min", math.nan)
+        noise = math.nan
+        if name not in current:
+            status = "missing"
+        elif name not in baseline:
+            status = "new"
+        elif math.isnan(old) or math.isnan(new):
+            status = "skipped"
+        else:
+            noise = max(spread(old_result), spread(new_result))
+            if new > old * (1 + threshold) and new - old > noise:
+                status = "regression"
+            elif new < old / (1 + threshold) and old - new > noise:
+                status = "improvement"
+            else:
+                status = "ok"
+        comparisons.append(Comparison(name, old, new, status, noise))
+
+    return comparisons
+
+
+def format_seconds(seconds: float) -> str:
+    if math.isnan(seconds):
+        return "-"
+    for unit, scale in (("s", 1.0), ("ms", 1e-3), ("us", 1e-6)):
+        if seconds >= scale:
+            return f"{seconds / scale:.3f} {unit}"
+    return f"{seconds / 1e-9:.1f} ns"
+
+
+def format_result(name: str, result: dict) -> str:
+    if "skipped" in result:
+        return f"{name:<44} skipped ({result['skipped']})"
+    line = (
+        f"{name:<44} {format_seconds(result['min']):>12}"
+        f"  median {format_seconds(result['median']):>12}"
+    )
+    if result["items"] > 1:
+        line += f"  ({format_seconds(result['per_item'])} per item)"
+    return line
+
+
+def format_comparison(comparisons: Sequence[Comparison]) -> str:
+    lines = [
+        f"{'benchmark':<44} {'baseline':>12} {'current':>12} {'change':>8}"
+        f" {'noise':>12}  status"
+    ]
+    for c in comparisons:
+        change = f"{c.change:+.1%}" if not math.isnan(c.change) else "-"
+        lines.append(
+            f"{c.name:<44} {format_seconds(c.baseline):>12} "
+            f"{format_seconds(c.current):>12} {change:>8} "
+            f"{format_seconds(c.noise):>12}  {c.status}"
+        )
+
+    return "\n".join(lines)
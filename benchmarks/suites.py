@@ -0,0 +1,204 @@
+from typing import Callable, List
+
+import numpy as np
+
+from endure.lsm import ClassicGen, Cost, KapacityGen, LSMBounds, Policy, Workload
+from endure.solver import ClassicSolver, get_solver_from_policy
+from trials import ExperimentContext, RhoMultiplesTrial
+from trials.util import get_best_nominal_tuning, get_best_robust_tuning
+from .harness import Benchmark
+
+# Every input is drawn from these seeds, so runs (and machines) time the same work
+SEED = 0
+SYSTEM_SEED = 42
+LEVELS = (16, 32, 64)
+BATCH_SIZES = (1024, 16384)
+SINGLE_CALLS = 64
+WORKLOAD = Workload(z0=0.3, z1=0.3, q=0.1, w=0.3)
+RHO = 0.5
+NUM_TUNINGS = 10
+
+
+def cost_benchmarks() -> List[Benchmark]:
+    # K-LSM designs, their per-level kapacities make the work grow with levels
+    benchmarks = []
+    for levels in LEVELS:
+
+        def single(levels: int = levels) -> Callable[[], object]:
+            gen = KapacityGen(LSMBounds(max_considered_levels=levels), seed=SEED)
+            cost = Cost(levels)
+            systems = [gen.sample_system() for _ in range(SINGLE_CALLS)]
+            cases = [
+                (gen.sample_design(system), system, gen.sample_workload())
+                for system in systems
+            ]
+
+            def run() -> None:
+                for design, system, workload in cases:
+                    cost.calc_cost(design, system, workload)
+
+            return run
+
+        benchmarks.append(
+            Benchmark(f"cost.single.L{levels}", single, items=SINGLE_CALLS)
+        )
+
+        for size in BATCH_SIZES:
+
+            def batch(levels: int = levels, size: int = size) -> Callable[[], object]:
+                gen = KapacityGen(LSMBounds(max_considered_levels=levels), seed=SEED)
+                cost = Cost(levels)
+                systems = gen.sample_systems(size)
+                designs = gen.sample_designs(systems)
+                workloads = gen.sample_workloads(size)
+                return lambda: cost.calc_cost_batch(designs, systems, workloads)
+
+            benchmarks.append(
+                Benchmark(f"cost.batch.L{levels}.n{size}", batch, items=size)
+            )
+
+    return benchmarks
+
+
+def make_solver(policy: Policy, bounds: LSMBounds):
+    solver_class = get_solver_from_policy(policy)
+    if solver_class is ClassicSolver and policy is not Policy.Classic:
+        return ClassicSolver(bounds, policies=[policy])
+    return solver_class(bounds)
+
+
+def solver_benchmarks() -> List[Benchmark]:
+    benchmarks = []
+    for policy in Policy:
+
+        def nominal(policy: Policy = policy) -> Callable[[], object]:
+            bounds = LSMBounds()
+            solver = make_solver(policy, bounds)
+            system = ClassicGen(bounds, seed=SYSTEM_SEED).sample_system()
+            return lambda: solver.get_nominal_design(system, WORKLOAD)
+
+        def robust(policy: Policy = policy) -> Callable[[], object]:
+            bounds = LSMBounds()
+            solver = make_solver(policy, bounds)
+            system = ClassicGen(bounds, seed=SYSTEM_SEED).sample_system()
+            if isinstance(solver, ClassicSolver):
+                return lambda: solver.get_robust_design(system, WORKLOAD, RHO)
+            z0, z1, q, w = WORKLOAD.to_vector().tolist()
+            return lambda: solver.get_robust_design(system, RHO, z0, z1, q, w)
+
+        name = policy.name.lower()
+        benchmarks.append(Benchmark(f"solver.nominal.{name}", nominal))
+        benchmarks.append(Benchmark(f"solver.robust.{name}", robust))
+
+    # One SLSQP solve is hundreds of objective calls, each building an
+    # LSMDesign, so per-call overhead there shows up here first
+    for policy in (Policy.Tiering, Policy.Leveling):
+
+        def objective(policy: Policy = policy) -> Callable[[], object]:
+            bounds = LSMBounds()
+            solver = ClassicSolver(bounds, policies=[policy])
+            system = ClassicGen(bounds, seed=SYSTEM_SEED).sample_system()
+            rng = np.random.default_rng(SEED)
+            points = np.column_stack(
+                (
+                    rng.uniform(*bounds.bits_per_elem_range, SINGLE_CALLS),
+                    rng.uniform(*bounds.size_ratio_range, SINGLE_CALLS),
+                    rng.uniform(0.1, 10.0, SINGLE_CALLS),
+                    rng.uniform(0.0, 10.0, SINGLE_CALLS),
+                )
+            )
+
+            def run() -> None:
+                for x in points:
+                    solver.robust_objective(x, policy, system, RHO, WORKLOAD)
+
+            return run
+
+        benchmarks.append(
+            Benchmark(
+                f"solver.objective.robust.{policy.name.lower()}",
+                objective,
+                items=SINGLE_CALLS,
+            )
+        )
+
+    return benchmarks
+
+
+def tuning_benchmarks() -> List[Benchmark]:
+    def setup(robust: bool) -> Callable[[], object]:
+        bounds = LSMBounds()
+        solver = ClassicSolver(bounds)
+        system = ClassicGen(bounds, seed=SYSTEM_SEED).sample_system()
+        cost = Cost(bounds.max_considered_levels)
+        kwargs = dict(
+            workload=WORKLOAD,
+            bounds=bounds,
+            numTunings=NUM_TUNINGS,
+            solver=solver,
+            system=system,
+            costFunc=cost,
+        )
+        if robust:
+            return lambda: get_best_robust_tuning(
+                rho=RHO, rng=np.random.default_rng(SEED), **kwargs
+            )
+        return lambda: get_best_nominal_tuning(rng=np.random.default_rng(SEED), **kwargs)
+
+    return [
+        Benchmark(
+            f"tuning.multistart.nominal.n{NUM_TUNINGS}",
+            lambda: setup(False),
+            items=NUM_TUNINGS,
+        ),
+        Benchmark(
+            f"tuning.multistart.robust.n{NUM_TUNINGS}",
+            lambda: setup(True),
+            items=NUM_TUNINGS,
+        ),
+    ]
+
+
+def trial_benchmarks() -> List[Benchmark]:
+    # A scaled-down rho_multiples work item: a few epsilons and rho multipliers,
+    # few tunings. A fresh ExperimentContext per call keeps the nominal design
+    # memo from carrying over between repeats
+    epsilons = (0.1, 0.5)
+    multipliers = (0.5, 1.0, 2.0)
+
+    def setup() -> Callable[[], object]:
+        def run() -> None:
+            rng = np.random.default_rng(SEED)
+            context = ExperimentContext(seed=SEED)
+            for epsilon in epsilons:
+                trial = RhoMultiplesTrial(
+                    originalWorkload=WORKLOAD,
+                    epsilon=epsilon,
+                    workloadScaler=100,
+                    noiseScaler=1,
+                    numWorkloads=10,
+                    rng=rng,
+                    context=context,
+                )
+                for multiplier in multipliers:
+                    trial.run_trial(rhoMultiplier=multiplier, numTunings=3)
+
+        return run
+
+    return [
+        Benchmark(
+            "trial.rho_multiples.small", setup, items=len(epsilons) * len(multipliers)
+        )
+    ]
+
+
+SUITES = {
+    "cost": cost_benchmarks,
+    "solver": solver_benchmarks,
+    "tuning": tuning_benchmarks,
+    "trial": trial_benchmarks,
+}
+
+
+def all_benchmarks() -> List[Benchmark]:
+    return [benchmark for suite in SUITES.values() for benchmark in suite()]
@@ -6,6 +6,8 @@ from trials.rho_multiples import RhoMultiplesTrial
 from trials.nominal_v_robust import NominalvRobustTrial
 from trials.stepwise_rho import StepwiseRhoTrial
 from workload_types import ExpectedWorkload
+from endure.lsm import LSMBounds, ClassicGen
+from endure.solver import WorstCaseOracle
 import numpy as np
 import os
 import csv
@@ -37,7 +39,14 @@ originalWorkload = workloadType.workload
 trialMult = RhoMultiplesTrial(originalWorkload=originalWorkload, epsilon=epsilon, 
                           workloadScaler=WORKLOAD_SCALER, noiseScaler=NOISE_SCALER, 
                           sensitivity=SENSITIVITY, numWorkloads=numWorkloads)
-_, _, nominalCostMult, robustCostMult = trialMult.run_trial(numTunings=NUM_TUNINGS, rhoMultiplier=rho_multiplier)
+_, designRobustMult, nominalCostMult, robustCostMult = trialMult.run_trial(numTunings=NUM_TUNINGS, rhoMultiplier=rho_multiplier)
+
+# certify the robust design: worst-case workload inside the KL ball the tuner was given
+bounds = LSMBounds()
+system = ClassicGen(bounds, seed=42).sample_system()
+oracle = WorstCaseOracle(bounds)
+worstWorkloadMult, worstCostMult = oracle.get_worst_workload(designRobustMult, system, trialMult.perturbedWorkload, 
+                                                             trialMult.rhoExpected * rho_multiplier)
 
 num_dashes = 120
 print("=" * num_dashes)
@@ -51,6 +60,8 @@ print("  Rho (Est.)   :", trialMult.rhoExpected)
 print("  Multiplier   :", rho_multiplier)
 print("  Nominal Cost :", nominalCostMult)
 print("  Robust Cost  :", robustCostMult)
+print("  Worst Cost   :", worstCostMult)
+print("  Worst Case   :", worstWorkloadMult)
 print("=" * num_dashes)
 
 trialStep = StepwiseRhoTrial(originalWorkload=originalWorkload, epsilon=epsilon, workloadScaler=WORKLOAD_SCALER, 
@@ -1 +1,4 @@
 from .laplace_mechanism import LaplaceMechanism
+from .rho_estimator import RHO_STATISTICS, RhoEstimator, kl_divergence, summarize_rho
+from .rho_calibration import RhoCalibrationTable
+from .streaming import StreamingWorkloadCounter, counts_to_workload
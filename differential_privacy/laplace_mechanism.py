@@ -39,4 +39,30 @@ class LaplaceMechanism:
         # make sure it sums up to one 
         nratio = 1 / sum(perturbedVector)
         adjustedNoisyWorkload = [i * nratio for i in perturbedVector]
-        return adjustedNoisyWorkload
\ No newline at end of file
+        return adjustedNoisyWorkload
+
+
+    """
+        Vectorized perturb: n perturbed copies of each of M workloads ([M, 4] or [4])
+        returned as an [M, n, 4] array. All noise is drawn in one call on rng
+        (a numpy Generator); without one it falls back to the global np.random state.
+        standardNoise (Laplace draws with scale 1, broadcastable to [M, n, 4]) replaces
+        the draws, so the same underlying noise can be reused across epsilons
+    """
+    def perturb_batch(self, workloads:np.ndarray, n:int, 
+                      rng:np.random.Generator=None, standardNoise:np.ndarray=None) -> np.ndarray:
+        workloads = np.asarray(workloads, dtype=np.float64).reshape(-1, 4)
+        size = (workloads.shape[0], n, 4)
+        if standardNoise is not None:
+            noise = np.broadcast_to(standardNoise, size) * self.b
+        elif rng is None:
+            noise = np.random.laplace(0, self.b, size)
+        else:
+            noise = rng.laplace(0, self.b, size)
+
+        # (w * scaler + noise * noiseScaler) / scaler, computed in place
+        noise *= self.noiseScaler / self.workloadScaler
+        noise += workloads[:, np.newaxis, :]
+        np.maximum(noise, 0.01, out=noise)
+        noise /= noise.sum(axis=-1, keepdims=True)
+        return noise
@@ -0,0 +1,130 @@
+"""
+    Precomputed expected-rho tables over a grid of epsilons x workload simplex
+    points, answering queries by interpolation instead of Monte Carlo
+"""
+
+import numpy as np
+
+from endure.lsm.simplex import SimplexLattice
+from .rho_estimator import RhoEstimator
+
+# Perturbed values held in memory at once while building
+BUILD_CHUNK = 4_000_000
+# Smallest workload component on the grid. rho changes sharply as a component
+# goes to zero, so the grid edges sit at the Laplace mechanism's 0.01 clip
+# (and the experiments' smallest component) instead of at 0
+FLOOR = 0.01
+
+
+class RhoCalibrationTable:
+    """
+        Expected rho on a grid
+            epsilons: increasing privacy levels
+            steps: simplex lattice resolution (workload components in multiples of 1/steps)
+            rhos: [len(epsilons), len(lattice)] rho statistics
+            workloadScaler, noiseScaler, sensitivity: LaplaceMechanism parameters the
+                table was built for
+            statistic, quantile, numWorkloads: RhoEstimator settings the table was built with
+            floor: smallest workload component on the grid, smaller ones are clamped to it
+    """
+    def __init__(self, epsilons:np.ndarray, steps:int, rhos:np.ndarray, workloadScaler:int,
+                 noiseScaler:float, sensitivity:int, statistic:str="max", quantile:float=0.95,
+                 numWorkloads:int=10, floor:float=FLOOR) -> None:
+        self.epsilons = np.asarray(epsilons, dtype=np.float64)
+        assert np.all(self.epsilons > 0) and np.all(np.diff(self.epsilons) > 0)
+        self.lattice = SimplexLattice(steps)
+        self.rhos = np.asarray(rhos, dtype=np.float64)
+        assert self.rhos.shape == (len(self.epsilons), len(self.lattice))
+        self.workloadScaler = workloadScaler
+        self.noiseScaler = noiseScaler
+        self.sensitivity = sensitivity
+        self.statistic = statistic
+        self.quantile = quantile
+        self.numWorkloads = numWorkloads
+        self.floor = floor
+        self.points = self.lattice.points * (1 - 4 * floor) + floor
+        # rho falls off roughly as a power of epsilon, so interpolate log-log
+        self._logEpsilons = np.log(self.epsilons)
+        self._logRhos = np.log(np.maximum(self.rhos, 1e-300))
+
+
+    """
+        Estimates rho at every grid point with RhoEstimator, averaged over repeats
+        estimates. statistic, quantile and numWorkloads default to the trials' and
+        RhoEstimator's, so the table holds the expected value of their rho
+    """
+    @classmethod
+    def build(cls, epsilons:np.ndarray, workloadScaler:int, noiseScaler:float, sensitivity:int,
+              steps:int=20, numWorkloads:int=10, statistic:str="max", quantile:float=0.95,
+              repeats:int=1000, seed:int=0, floor:float=FLOOR) -> "RhoCalibrationTable":
+        epsilons = np.asarray(epsilons, dtype=np.float64)
+        points = SimplexLattice(steps).points * (1 - 4 * floor) + floor
+        estimator = RhoEstimator(workloadScaler=workloadScaler, noiseScaler=noiseScaler,
+                                 sensitivity=sensitivity, numWorkloads=numWorkloads,
+                                 statistic=statistic, quantile=quantile)
+        rng = np.random.default_rng(seed)
+        chunk = max(1, BUILD_CHUNK // (4 * numWorkloads * repeats))
+        rhos = np.empty((len(epsilons), len(points)))
+        for i, epsilon in enumerate(epsilons):
+            for start in range(0, len(points), chunk):
+                block = np.repeat(points[start:start + chunk], repeats, axis=0)
+                estimates = estimator.estimate_batch(block, epsilon, rng=rng)
+                rhos[i, start:start + chunk] = estimates.reshape(-1, repeats).mean(axis=1)
+
+        return cls(epsilons, steps, rhos, workloadScaler, noiseScaler, sensitivity,
+                   statistic=statistic, quantile=quantile, numWorkloads=numWorkloads, floor=floor)
+
+
+    def save(self, path:str) -> None:
+        np.savez_compressed(path, epsilons=self.epsilons, steps=self.lattice.steps,
+                            rhos=self.rhos.astype(np.float32), workloadScaler=self.workloadScaler,
+                            noiseScaler=self.noiseScaler, sensitivity=self.sensitivity,
+                            statistic=self.statistic, quantile=self.quantile,
+                            numWorkloads=self.numWorkloads, floor=self.floor)
+
+
+    @classmethod
+    def load(cls, path:str) -> "RhoCalibrationTable":
+        with np.load(path) as data:
+            return cls(data["epsilons"], int(data["steps"]), data["rhos"],
+                       data["workloadScaler"].item(), data["noiseScaler"].item(),
+                       data["sensitivity"].item(), statistic=str(data["statistic"]),
+                       quantile=float(data["quantile"]), numWorkloads=int(data["numWorkloads"]),
+                       floor=float(data["floor"]))
+
+
+    """
+        True when the table was built for these Laplace mechanism parameters and
+        RhoEstimator settings (quantile only counts for the quantile statistic)
+    """
+    def matches(self, workloadScaler:int, noiseScaler:float, sensitivity:int, statistic:str="max",
+                quantile:float=0.95, numWorkloads:int=10) -> bool:
+        return (self.workloadScaler == workloadScaler and self.noiseScaler == noiseScaler
+                and self.sensitivity == sensitivity and self.statistic == statistic
+                and (statistic != "quantile" or self.quantile == quantile)
+                and self.numWorkloads == numWorkloads)
+
+
+    """
+        Interpolated rho for workloads ([..., 4] array or a Workload) at epsilon.
+        Epsilons outside the table are clamped to its ends.
+    """
+    def lookup(self, workload, epsilon:float):
+        if hasattr(workload, "z0"):
+            workload = [workload.z0, workload.z1, workload.q, workload.w]
+        workload = np.asarray(workload, dtype=np.float64)
+        workload = workload / workload.sum(axis=-1, keepdims=True)
+        workload = (workload - self.floor) / (1 - 4 * self.floor)
+        logEpsilon = np.clip(np.log(epsilon), self._logEpsilons[0], self._logEpsilons[-1])
+        upper = int(np.searchsorted(self._logEpsilons, logEpsilon))
+        lower = max(upper - 1, 0)
+        upper = min(max(upper, 1), len(self.epsilons) - 1) if len(self.epsilons) > 1 else 0
+        span = self._logEpsilons[upper] - self._logEpsilons[lower]
+        t = (logEpsilon - self._logEpsilons[lower]) / span if span > 0 else 0.0
+
+        # Only the four lattice vertices around each workload are touched
+        indices, weights = self.lattice.vertices(workload)
+        layers = (1 - t) * self._logRhos[lower][indices] + t * self._logRhos[upper][indices]
+        logRho = np.sum(layers * weights, axis=-1)
+        rho = np.exp(logRho)
+        return float(rho) if np.ndim(rho) == 0 else rho
@@ -0,0 +1,83 @@
+"""
+    Estimates the rho (KL radius) handed to the robust tuner from Monte Carlo
+    samples of the Laplace mechanism, with a selectable summary statistic
+"""
+
+import numpy as np
+
+from .laplace_mechanism import LaplaceMechanism
+
+RHO_STATISTICS = ("max", "mean", "quantile", "avg_workload")
+
+
+"""
+    KL(p || q) along the last axis, broadcasting over the leading ones
+"""
+def kl_divergence(p:np.ndarray, q:np.ndarray) -> np.ndarray:
+    p = np.asarray(p, dtype=np.float64)
+    q = np.asarray(q, dtype=np.float64)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        terms = np.where(p > 0, p * np.log(p / q), 0.0)
+    return terms.sum(axis=-1)
+
+
+"""
+    Reduces perturbed samples [..., n, 4] of the original workload [..., 4] to rho
+        max: largest KL among the samples (the original trials' estimate)
+        mean: average KL
+        quantile: the given quantile of the KL values
+        avg_workload: KL to the average of the noisy workloads
+"""
+def summarize_rho(originalWorkload:np.ndarray, samples:np.ndarray, statistic:str="max",
+                  quantile:float=0.95) -> np.ndarray:
+    original = np.asarray(originalWorkload, dtype=np.float64)[..., np.newaxis, :]
+    if statistic == "avg_workload":
+        return kl_divergence(original[..., 0, :], samples.mean(axis=-2))
+
+    kl = kl_divergence(original, samples)
+    if statistic == "max":
+        return kl.max(axis=-1)
+    if statistic == "mean":
+        return kl.mean(axis=-1)
+    if statistic == "quantile":
+        return np.quantile(kl, quantile, axis=-1)
+    raise ValueError(f"statistic must be one of {RHO_STATISTICS}")
+
+
+class RhoEstimator:
+    """
+        Expected rho for a workload under the Laplace mechanism
+            workloadScaler, noiseScaler, sensitivity: LaplaceMechanism parameters
+            numWorkloads: perturbed samples per estimate (10^5 is still cheap)
+            statistic: one of RHO_STATISTICS
+            quantile: used by the quantile statistic
+    """
+    def __init__(self, workloadScaler:int, noiseScaler:float, sensitivity:int,
+                 numWorkloads:int=10, statistic:str="max", quantile:float=0.95) -> None:
+        if statistic not in RHO_STATISTICS:
+            raise ValueError(f"statistic must be one of {RHO_STATISTICS}")
+        self.workloadScaler = workloadScaler
+        self.noiseScaler = noiseScaler
+        self.sensitivity = sensitivity
+        self.numWorkloads = numWorkloads
+        self.statistic = statistic
+        self.quantile = quantile
+
+
+    """
+        rho for each of M workloads ([M, 4] or [4]) at one epsilon.
+        standardNoise ([numWorkloads, 4] scale-1 Laplace draws) fixes the samples
+    """
+    def estimate_batch(self, workloads:np.ndarray, epsilon:float,
+                       rng:np.random.Generator=None, standardNoise:np.ndarray=None) -> np.ndarray:
+        workloads = np.asarray(workloads, dtype=np.float64).reshape(-1, 4)
+        mechanism = LaplaceMechanism(workloadScaler=self.workloadScaler, noiseScaler=self.noiseScaler,
+                                     sensitivity=self.sensitivity, epsilon=epsilon)
+        samples = mechanism.perturb_batch(workloads, self.numWorkloads, rng=rng,
+                                          standardNoise=standardNoise)
+        return summarize_rho(workloads, samples, self.statistic, self.quantile)
+
+
+    def estimate(self, workload:np.ndarray, epsilon:float,
+                 rng:np.random.Generator=None, standardNoise:np.ndarray=None) -> float:
+        return float(self.estimate_batch(workload, epsilon, rng=rng, standardNoise=standardNoise)[0])
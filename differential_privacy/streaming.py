@@ -0,0 +1,117 @@
+"""
+    Differentially private workload estimates over a live operation stream.
+    Events are counted per operation type, and the binary (tree) mechanism
+    releases noisy prefix counts whose noise grows only with log(horizon)
+    however many releases are made. Windowed workloads are differences of
+    two noisy prefixes kept in a ring buffer.
+"""
+
+import numpy as np
+
+from endure.lsm.types import Workload
+
+# Operation codes, in Workload field order
+EMPTY_LOOKUP = 0   # z0
+LOOKUP = 1         # z1
+RANGE = 2          # q
+WRITE = 3          # w
+NUM_OPS = 4
+
+
+class StreamingWorkloadCounter:
+    """
+        Streaming DP workload counter
+            epsilon: privacy budget for the whole stream (all releases together)
+            window: number of releases each workload estimate covers
+            horizon: maximum number of releases, fixes the tree depth
+            sensitivity: events one individual can contribute
+            rng: numpy Generator for the noise
+        Memory is O(log(horizon) + window) regardless of the event rate.
+    """
+    def __init__(self, epsilon:float, window:int, horizon:int=2**20, sensitivity:int=1,
+                 rng:np.random.Generator=None) -> None:
+        self.epsilon = epsilon
+        self.window = window
+        self.horizon = horizon
+        self.sensitivity = sensitivity
+        self.rng = np.random.default_rng() if rng is None else rng
+        # Each event lands in at most one p-sum per tree level
+        self.levels = max(int(horizon).bit_length(), 1)
+        self.b = self.levels * sensitivity / epsilon
+
+        self.step = 0
+        self.pending = np.zeros(NUM_OPS, dtype=np.int64)
+        self.psums = np.zeros((self.levels, NUM_OPS), dtype=np.int64)
+        self.noisyPsums = np.zeros((self.levels, NUM_OPS))
+        # Ring buffer of noisy prefixes for steps t - window .. t (step 0 is all zeros)
+        self.prefixes = np.zeros((window + 1, NUM_OPS))
+        self.events = 0
+
+
+    """
+        Adds a batch of events given as operation codes (EMPTY_LOOKUP .. WRITE)
+    """
+    def ingest(self, ops:np.ndarray) -> None:
+        ops = np.asarray(ops)
+        self.pending += np.bincount(ops.reshape(-1), minlength=NUM_OPS)[:NUM_OPS]
+        self.events += ops.size
+
+
+    """
+        Adds pre-aggregated per-operation counts
+    """
+    def ingest_counts(self, counts:np.ndarray) -> None:
+        counts = np.asarray(counts, dtype=np.int64)
+        self.pending += counts
+        self.events += int(counts.sum())
+
+
+    """
+        Closes the current time step and returns the noisy prefix counts
+    """
+    def advance(self) -> np.ndarray:
+        if self.step >= self.horizon:
+            raise RuntimeError("privacy budget exhausted: horizon releases reached")
+        self.step += 1
+        level = (self.step & -self.step).bit_length() - 1
+
+        # The new p-sum absorbs every lower level plus this step's counts
+        self.psums[level] = self.psums[:level].sum(axis=0) + self.pending
+        self.psums[:level] = 0
+        self.noisyPsums[:level] = 0
+        self.noisyPsums[level] = self.psums[level] + self.rng.laplace(0, self.b, NUM_OPS)
+        self.pending[:] = 0
+
+        bits = [j for j in range(self.levels) if self.step >> j & 1]
+        prefix = self.noisyPsums[bits].sum(axis=0)
+        self.prefixes[self.step % (self.window + 1)] = prefix
+        return prefix
+
+
+    """
+        Noisy per-operation counts over the last window releases
+    """
+    def window_counts(self) -> np.ndarray:
+        current = self.prefixes[self.step % (self.window + 1)]
+        return current - self.prefixes[(self.step + 1) % (self.window + 1)]
+
+
+    """
+        Closes the current time step and releases the windowed DP workload
+    """
+    def release(self) -> Workload:
+        self.advance()
+        return counts_to_workload(self.window_counts())
+
+
+"""
+    Noisy counts to a probability vector, clipped the same way as LaplaceMechanism
+"""
+def counts_to_workload(counts:np.ndarray, floor:float=0.01) -> Workload:
+    counts = np.clip(counts, 0, None)
+    total = counts.sum()
+    if total <= 0:
+        return Workload()
+    vector = np.maximum(counts / total, floor)
+    vector /= vector.sum()
+    return Workload(*vector.tolist())
@@ -0,0 +1 @@
+from .pipeline import DatasetPipeline, PipelineConfig, load_shard, shard_name
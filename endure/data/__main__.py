@@ -0,0 +1,49 @@
+"""
+    Generates a sharded cost-model training dataset. Re-running the same
+    command resumes an interrupted run.
+
+    python -m endure.data out/ --policy Classic --shards 16 --shard-size 1000000
+"""
+
+import argparse
+
+from endure.lsm.types import Policy
+from . import DatasetPipeline, PipelineConfig
+from .pipeline import WORKLOAD_METHODS
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Generate a training dataset")
+    parser.add_argument("out", type=str)
+    parser.add_argument(
+        "--policy", type=str, default="Classic", choices=list(Policy.__members__)
+    )
+    parser.add_argument("--shards", type=int, default=8)
+    parser.add_argument("--shard-size", type=int, default=1_000_000)
+    parser.add_argument("--batch-size", type=int, default=100_000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--format", type=str, default="npz", choices=["npz", "parquet"])
+    parser.add_argument(
+        "--workloads", type=str, default="uniform", choices=list(WORKLOAD_METHODS)
+    )
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args()
+
+    config = PipelineConfig(
+        policy=args.policy,
+        num_shards=args.shards,
+        shard_size=args.shard_size,
+        batch_size=args.batch_size,
+        seed=args.seed,
+        format=args.format,
+        workload_method=args.workloads,
+    )
+    manifest = DatasetPipeline(args.out, config, workers=args.workers).run(
+        verbose=True
+    )
+    rows = sum(shard["rows"] for shard in manifest["shards"].values())
+    print(f"{len(manifest['shards'])} shards, {rows} rows in {args.out}")
+
+
+if __name__ == "__main__":
+    main()
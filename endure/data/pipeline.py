@@ -0,0 +1,220 @@
+from dataclasses import asdict, dataclass
+import json
+from multiprocessing import Pool
+import os
+import shutil
+import zipfile
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from endure.lsm import SIMPLEX_METHODS, build_data_gen
+from endure.lsm.cost import Cost
+from endure.lsm.types import LSMBounds, Policy
+
+SHARD_FORMATS = ("npz", "parquet")
+MANIFEST = "manifest.json"
+# A lattice has a fixed size, so it cannot fill arbitrary batches
+WORKLOAD_METHODS = tuple(m for m in SIMPLEX_METHODS if m != "lattice")
+
+
+@dataclass(frozen=True)
+class PipelineConfig:
+    policy: str = Policy.Classic.name
+    num_shards: int = 8
+    shard_size: int = 1_000_000
+    batch_size: int = 100_000
+    seed: int = 0
+    format: str = "npz"
+    workload_method: str = "uniform"
+
+
+def shard_name(index: int, format: str) -> str:
+    return f"shard-{index:05d}.{format}"
+
+
+def _label_batch(
+    gen, cost: Cost, n: int, workload_method: str
+) -> Dict[str, np.ndarray]:
+    systems = gen.sample_systems(n)
+    designs = gen.sample_designs(systems)
+    workloads = gen.sample_workloads(n, method=workload_method)
+    op_costs = cost.calc_individual_cost_batch(designs, systems, workloads)
+
+    columns = {
+        "entry_size": systems.entry_size,
+        "selectivity": systems.selectivity,
+        "entries_per_page": systems.entries_per_page,
+        "num_entries": systems.num_entries,
+        "mem_budget": systems.mem_budget,
+        "phi": systems.phi,
+        "bits_per_elem": designs.bits_per_elem,
+        "size_ratio": designs.size_ratio,
+        "policy": designs.policy,
+    }
+    for idx in range(designs.kapacity.shape[1]):
+        columns[f"k{idx}"] = designs.kapacity[:, idx]
+    columns.update(
+        {
+            "z0": workloads.z0,
+            "z1": workloads.z1,
+            "q": workloads.q,
+            "w": workloads.w,
+            "cost_z0": op_costs[:, 0],
+            "cost_z1": op_costs[:, 1],
+            "cost_q": op_costs[:, 2],
+            "cost_w": op_costs[:, 3],
+            "cost": op_costs.sum(axis=1),
+        }
+    )
+
+    return columns
+
+
+def _generate_shard(task: tuple) -> dict:
+    out_dir, index, seed_seq, config = task
+    bounds = LSMBounds()
+    policy = Policy[config.policy]
+    gen = build_data_gen(policy, bounds, seed=seed_seq)
+    cost = Cost(bounds.max_considered_levels)
+
+    path = os.path.join(out_dir, shard_name(index, config.format))
+    tmp_path = path + ".tmp"
+    staging = tmp_path + ".d"
+    # A run that died mid-shard leaves these behind, start from nothing
+    if os.path.exists(tmp_path):
+        os.remove(tmp_path)
+    shutil.rmtree(staging, ignore_errors=True)
+    remaining = config.shard_size
+    if config.format == "parquet":
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        # Parquet streams one row group per batch, so memory stays at one batch
+        writer = None
+        while remaining > 0:
+            n = min(config.batch_size, remaining)
+            table = pa.table(_label_batch(gen, cost, n, config.workload_method))
+            if writer is None:
+                writer = pq.ParquetWriter(tmp_path, table.schema)
+            writer.write_table(table)
+            remaining -= n
+        assert writer is not None
+        writer.close()
+    else:
+        # An npz member is a whole column, so batches go into per-column .npy
+        # memmaps that are then streamed into the archive. Memory stays at one
+        # batch, at the cost of the shard's size in staging disk space
+        os.makedirs(staging)
+        columns: Dict[str, np.ndarray] = {}
+        while remaining > 0:
+            n = min(config.batch_size, remaining)
+            start = config.shard_size - remaining
+            batch = _label_batch(gen, cost, n, config.workload_method)
+            for name, values in batch.items():
+                if name not in columns:
+                    columns[name] = np.lib.format.open_memmap(
+                        os.path.join(staging, f"{name}.npy"),
+                        mode="w+",
+                        dtype=values.dtype,
+                        shape=(config.shard_size,),
+                    )
+                columns[name][start : start + n] = values
+            remaining -= n
+        names = list(columns)
+        for column in columns.values():
+            column.flush()
+        del columns
+        # Stored members, as np.savez writes them
+        with zipfile.ZipFile(tmp_path, "w", allowZip64=True) as archive:
+            for name in names:
+                archive.write(os.path.join(staging, f"{name}.npy"), f"{name}.npy")
+        shutil.rmtree(staging)
+    os.replace(tmp_path, path)
+
+    return {"index": index, "file": os.path.basename(path), "rows": config.shard_size}
+
+
+class DatasetPipeline:
+    """Generates labelled (system, design, workload) -> cost shards.
+
+    Shard i always draws from child i of SeedSequence(seed), so the output is
+    independent of the worker count and an interrupted run resumes by
+    generating only the shards missing from the output directory.
+    """
+
+    def __init__(
+        self, out_dir: str, config: PipelineConfig, workers: Optional[int] = None
+    ) -> None:
+        if config.format not in SHARD_FORMATS:
+            raise ValueError(f"format must be one of {SHARD_FORMATS}")
+        if config.policy not in Policy.__members__:
+            raise ValueError(f"unknown policy {config.policy}")
+        if config.workload_method not in WORKLOAD_METHODS:
+            raise ValueError(f"workload_method must be one of {WORKLOAD_METHODS}")
+        self.out_dir = out_dir
+        self.config = config
+        self.workers = workers
+        self.manifest_path = os.path.join(out_dir, MANIFEST)
+
+    def _load_manifest(self) -> dict:
+        if not os.path.exists(self.manifest_path):
+            return {"config": asdict(self.config), "shards": {}}
+        with open(self.manifest_path) as file:
+            manifest = json.load(file)
+        if manifest["config"] != asdict(self.config):
+            raise ValueError(
+                f"{self.out_dir} holds a dataset with a different configuration"
+            )
+
+        return manifest
+
+    def _write_manifest(self, manifest: dict) -> None:
+        tmp_path = self.manifest_path + ".tmp"
+        with open(tmp_path, "w") as file:
+            json.dump(manifest, file, indent=2)
+        os.replace(tmp_path, self.manifest_path)
+
+    def pending(self, manifest: dict) -> List[int]:
+        pending = []
+        for index in range(self.config.num_shards):
+            name = shard_name(index, self.config.format)
+            if os.path.exists(os.path.join(self.out_dir, name)):
+                # Finished after the last manifest write
+                manifest["shards"].setdefault(
+                    str(index),
+                    {"index": index, "file": name, "rows": self.config.shard_size},
+                )
+            else:
+                manifest["shards"].pop(str(index), None)
+                pending.append(index)
+
+        return pending
+
+    def run(self, verbose: bool = False) -> dict:
+        os.makedirs(self.out_dir, exist_ok=True)
+        manifest = self._load_manifest()
+        pending = self.pending(manifest)
+        self._write_manifest(manifest)
+
+        seeds = np.random.SeedSequence(self.config.seed).spawn(self.config.num_shards)
+        tasks = [(self.out_dir, i, seeds[i], self.config) for i in pending]
+        with Pool(self.workers) as pool:
+            for entry in pool.imap_unordered(_generate_shard, tasks):
+                manifest["shards"][str(entry["index"])] = entry
+                self._write_manifest(manifest)
+                if verbose:
+                    done = len(manifest["shards"])
+                    print(f"{entry['file']} ({done}/{self.config.num_shards})")
+
+        return manifest
+
+
+def load_shard(path: str) -> Dict[str, np.ndarray]:
+    if path.endswith(".parquet"):
+        import pyarrow.parquet as pq
+
+        table = pq.read_table(path)
+        return {name: table[name].to_numpy() for name in table.column_names}
+    with np.load(path) as data:
+        return {name: data[name] for name in data.files}
@@ -1,4 +1,6 @@
 from .cost import Cost
+from .kapacity_space import KapacitySpace
+from .simplex import SIMPLEX_METHODS, sample_simplex, simplex_lattice
 from .data_generator import (
         LSMDataGenerator,
         ClassicGen,
@@ -8,7 +10,16 @@ from .data_generator import (
         FluidLSMGen,
         KapacityGen
     )
-from .types import Policy, System, LSMDesign, LSMBounds, Workload
+from .types import (
+    Policy,
+    System,
+    SystemBatch,
+    LSMDesign,
+    DesignBatch,
+    LSMBounds,
+    Workload,
+    WorkloadBatch,
+)
 
 
 def build_data_gen(policy: Policy, bounds: LSMBounds, **kwargs) -> LSMDataGenerator:
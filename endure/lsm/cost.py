@@ -1,6 +1,16 @@
+from typing import Sequence
+
 import numpy as np
 import endure.lsm.lsm_cost_model as CostModel
-from endure.lsm.types import Policy, System, LSMDesign, Workload
+from endure.lsm.types import (
+    Policy,
+    System,
+    SystemBatch,
+    LSMDesign,
+    DesignBatch,
+    Workload,
+    WorkloadBatch,
+)
 
 
 class Cost:
@@ -138,3 +148,163 @@ class Cost:
         )
 
         return cost
+
+    def create_k_scenarios(self, design: LSMDesign, systems: SystemBatch) -> np.ndarray:
+        # Only Fluid designs depend on the system through the number of levels
+        if design.policy is Policy.Fluid:
+            kapacities = np.stack(
+                [self.create_k_list(design, systems[i]) for i in range(len(systems))]
+            )
+        else:
+            kapacities = np.tile(
+                self.create_k_list(design, systems[0]), (len(systems), 1)
+            )
+
+        return kapacities.astype(np.float64)
+
+    def calc_cost_scenarios(
+        self,
+        design: LSMDesign,
+        systems: SystemBatch,
+        workload: Workload,
+    ) -> np.ndarray:
+        n = len(systems)
+        kapacities = self.create_k_scenarios(design, systems)
+        cost = CostModel.calc_cost_batch(
+            np.full(n, design.bits_per_elem, dtype=np.float64),
+            np.full(n, design.size_ratio, dtype=np.float64),
+            kapacities,
+            np.full(n, workload.z0, dtype=np.float64),
+            np.full(n, workload.z1, dtype=np.float64),
+            np.full(n, workload.q, dtype=np.float64),
+            np.full(n, workload.w, dtype=np.float64),
+            systems.entries_per_page,
+            systems.selectivity,
+            systems.entry_size,
+            systems.mem_budget,
+            systems.num_entries,
+            systems.phi,
+        )
+
+        return cost
+
+    def calc_op_costs(
+        self,
+        designs: Sequence[LSMDesign],
+        system: System,
+    ) -> np.ndarray:
+        # Unweighted (Z0, Z1, Q, W) costs of every design, shape [n, 4]
+        n = len(designs)
+        kapacities = np.stack(
+            [self.create_k_list(design, system) for design in designs]
+        ).astype(np.float64)
+        ones = np.ones(n, dtype=np.float64)
+        cost = CostModel.calc_individual_cost_batch(
+            np.array([d.bits_per_elem for d in designs], dtype=np.float64),
+            np.array([d.size_ratio for d in designs], dtype=np.float64),
+            kapacities,
+            ones,
+            ones,
+            ones,
+            ones,
+            np.full(n, system.entries_per_page, dtype=np.float64),
+            np.full(n, system.selectivity, dtype=np.float64),
+            np.full(n, system.entry_size, dtype=np.float64),
+            np.full(n, system.mem_budget, dtype=np.float64),
+            np.full(n, system.num_entries, dtype=np.float64),
+            np.full(n, system.phi, dtype=np.float64),
+        )
+
+        return cost
+
+    def create_k_batch(self, designs: DesignBatch, systems: SystemBatch) -> np.ndarray:
+        n, max_levels = len(designs), self.max_levels
+        T = designs.size_ratio[:, None]
+        policy = designs.policy[:, None]
+        level_idx = np.arange(max_levels)[None, :]
+        kapacities = np.ones((n, max_levels))
+
+        tiering = np.broadcast_to(T - 1, (n, max_levels))
+        kapacities = np.where(policy == Policy.Tiering.value, tiering, kapacities)
+        if designs.kapacity.shape[1] > 0:
+            head = designs.kapacity[:, 0:1]
+            kapacities = np.where(policy == Policy.QHybrid.value, head, kapacities)
+        if designs.kapacity.shape[1] > 1:
+            levels = CostModel.calc_level_batch(
+                designs.bits_per_elem,
+                designs.size_ratio,
+                systems.entry_size,
+                systems.mem_budget,
+                systems.num_entries,
+            )
+            last = np.ceil(levels).astype(np.int64)[:, None] - 1
+            fluid = np.where(level_idx < last, head, 1.0)
+            fluid = np.where(level_idx == last, designs.kapacity[:, 1:2], fluid)
+            kapacities = np.where(policy == Policy.Fluid.value, fluid, kapacities)
+        if designs.kapacity.shape[1] == max_levels:
+            kapacities = np.where(
+                policy == Policy.Kapacity.value, designs.kapacity, kapacities
+            )
+
+        return np.ascontiguousarray(kapacities, dtype=np.float64)
+
+    def _batch_args(
+        self,
+        designs: DesignBatch,
+        systems: SystemBatch,
+        workloads: WorkloadBatch,
+    ) -> tuple:
+        n = max(len(designs), len(systems), len(workloads))
+        # Batches of length one broadcast against the others
+        for batch in (designs, systems, workloads):
+            assert len(batch) in (1, n)
+
+        def rows(x: np.ndarray) -> np.ndarray:
+            x = np.asarray(x, dtype=np.float64)
+            return np.ascontiguousarray(np.broadcast_to(x, (n,) + x.shape[1:]))
+
+        if len(designs) != n or len(systems) != n:
+            designs = DesignBatch(
+                bits_per_elem=rows(designs.bits_per_elem),
+                size_ratio=rows(designs.size_ratio),
+                policy=np.broadcast_to(designs.policy, (n,)),
+                kapacity=rows(designs.kapacity),
+            )
+            systems = SystemBatch(
+                *(rows(getattr(systems, f)) for f in SystemBatch.__dataclass_fields__)
+            )
+        kapacities = self.create_k_batch(designs, systems)
+
+        return (
+            rows(designs.bits_per_elem),
+            rows(designs.size_ratio),
+            kapacities,
+            rows(workloads.z0),
+            rows(workloads.z1),
+            rows(workloads.q),
+            rows(workloads.w),
+            systems.entries_per_page,
+            systems.selectivity,
+            systems.entry_size,
+            systems.mem_budget,
+            systems.num_entries,
+            systems.phi,
+        )
+
+    def calc_cost_batch(
+        self,
+        designs: DesignBatch,
+        systems: SystemBatch,
+        workloads: WorkloadBatch,
+    ) -> np.ndarray:
+        return CostModel.calc_cost_batch(*self._batch_args(designs, systems, workloads))
+
+    def calc_individual_cost_batch(
+        self,
+        designs: DesignBatch,
+        systems: SystemBatch,
+        workloads: WorkloadBatch,
+    ) -> np.ndarray:
+        return CostModel.calc_individual_cost_batch(
+            *self._batch_args(designs, systems, workloads)
+        )
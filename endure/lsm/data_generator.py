@@ -1,11 +1,20 @@
-import random
 from typing import Optional
-from itertools import combinations_with_replacement
 
 import numpy as np
 
-from endure.lsm.types import LSMDesign, System, Policy, LSMBounds, Workload
+from endure.lsm.types import (
+    LSMDesign,
+    System,
+    Policy,
+    LSMBounds,
+    Workload,
+    SystemBatch,
+    DesignBatch,
+    WorkloadBatch,
+)
 from endure.lsm.cost import Cost
+from endure.lsm.kapacity_space import KapacitySpace
+from endure.lsm.simplex import sample_simplex, sort_diff
 
 
 class LSMDataGenerator:
@@ -85,6 +94,62 @@ class LSMDataGenerator:
         workload = [b - a for a, b in zip(workload, workload[1:])]
         return Workload(*workload)
 
+    def _sample_size_ratios(self, n: int) -> np.ndarray:
+        low, high = self.bounds.size_ratio_range
+        return self.rng.integers(low=low, high=high, size=n).astype(np.float64)
+
+    def _sample_bloom_filter_bits_batch(self, max: np.ndarray) -> np.ndarray:
+        min = self.bounds.bits_per_elem_range[0]
+        sample = (max - min) * self.rng.random(max.shape[0]) + min
+        return np.around(sample, self.precision)
+
+    def _sample_designs_batch(self, systems: SystemBatch) -> DesignBatch:
+        n = len(systems)
+        max_bits = systems.mem_budget - self.MEM_EPSILON
+        h = self._sample_bloom_filter_bits_batch(max_bits)
+        T = self._sample_size_ratios(n)
+        return DesignBatch(
+            bits_per_elem=h,
+            size_ratio=T,
+            policy=np.full(n, Policy.Classic.value, dtype=np.int8),
+            kapacity=np.empty((n, 0)),
+        )
+
+    def sample_systems(self, n: int) -> SystemBatch:
+        KB_TO_BITS = 8 * 1024
+        E = self.rng.choice(np.array(self.bounds.entry_sizes), size=n)
+        page_sizes = self.rng.choice(np.array(self.bounds.page_sizes), size=n)
+        B = (page_sizes * KB_TO_BITS) / E
+        low, high = self.bounds.selectivity_range
+        s = (high - low) * self.rng.random(n) + low
+        low, high = self.bounds.memory_budget_range
+        H = (high - low) * self.rng.random(n) + low
+        low, high = self.bounds.elements_range
+        N = self.rng.integers(low=low, high=high, size=n)
+
+        return SystemBatch(
+            entry_size=E.astype(np.float64),
+            selectivity=s,
+            entries_per_page=B.astype(np.float64),
+            num_entries=N.astype(np.float64),
+            mem_budget=H,
+            phi=np.ones(n),
+        )
+
+    def sample_designs(self, systems: SystemBatch) -> DesignBatch:
+        return self._sample_designs_batch(systems)
+
+    def sample_workloads(
+        self, n: int, method: str = "uniform", **kwargs
+    ) -> WorkloadBatch:
+        # "lattice" returns the finest regular lattice with at most n points
+        if method == "uniform":
+            workload = sort_diff(np.around(self.rng.random((n, 3)), self.precision))
+        else:
+            workload = sample_simplex(n, self.rng, method=method, **kwargs)
+
+        return WorkloadBatch.from_array(workload)
+
 
 class TieringGen(LSMDataGenerator):
     def __init__(self, bounds: LSMBounds, **kwargs):
@@ -102,6 +167,12 @@ class TieringGen(LSMDataGenerator):
 
         return lsm
 
+    def sample_designs(self, systems: SystemBatch) -> DesignBatch:
+        designs = self._sample_designs_batch(systems)
+        designs.policy[:] = Policy.Tiering.value
+
+        return designs
+
 
 class LevelingGen(LSMDataGenerator):
     def __init__(self, bounds: LSMBounds, **kwargs):
@@ -116,6 +187,12 @@ class LevelingGen(LSMDataGenerator):
 
         return lsm
 
+    def sample_designs(self, systems: SystemBatch) -> DesignBatch:
+        designs = self._sample_designs_batch(systems)
+        designs.policy[:] = Policy.Leveling.value
+
+        return designs
+
 
 class ClassicGen(LSMDataGenerator):
     def __init__(self, bounds: LSMBounds, **kwargs):
@@ -124,20 +201,25 @@ class ClassicGen(LSMDataGenerator):
     def sample_design(self, system: System) -> LSMDesign:
         h = self._sample_bloom_filter_bits(max=(system.mem_budget - self.MEM_EPSILON))
         T = self._sample_size_ratio()
-        policy = random.choice((Policy.Tiering, Policy.Leveling))
+        policy = (Policy.Tiering, Policy.Leveling)[self.rng.integers(2)]
         lsm = LSMDesign(bits_per_elem=h, size_ratio=T, policy=policy, kapacity=())
 
         return lsm
 
+    def sample_designs(self, systems: SystemBatch) -> DesignBatch:
+        designs = self._sample_designs_batch(systems)
+        policies = np.array([Policy.Tiering.value, Policy.Leveling.value])
+        designs.policy[:] = self.rng.choice(policies, size=len(systems))
+
+        return designs
+
 
 class KapacityGen(LSMDataGenerator):
     def __init__(self, bounds: LSMBounds, **kwargs):
         super().__init__(bounds, **kwargs)
 
-    def _gen_k_levels(self, levels: int, max_size_ratio: int) -> list:
-        arr = combinations_with_replacement(range(max_size_ratio, 0, -1), levels)
-
-        return list(arr)
+    def _gen_k_levels(self, levels: int, max_size_ratio: int) -> KapacitySpace:
+        return KapacitySpace(levels, max_size_ratio)
 
     def sample_design(self, system: System) -> LSMDesign:
         design = super().sample_design(system)
@@ -153,6 +235,24 @@ class KapacityGen(LSMDataGenerator):
 
         return design
 
+    def sample_designs(self, systems: SystemBatch) -> DesignBatch:
+        designs = self._sample_designs_batch(systems)
+        h, T = designs.bits_per_elem, designs.size_ratio
+        mbuff = (systems.mem_budget - h) * systems.num_entries
+        levels = np.log((systems.num_entries * systems.entry_size / mbuff) + 1)
+        levels = np.ceil(levels / np.log(T)).astype(np.int64)
+        max_levels = self.bounds.max_considered_levels
+        high = T.astype(np.int64)[:, None]
+        k = self.rng.integers(low=1, high=high, size=(len(systems), max_levels))
+        k = np.where(np.arange(max_levels)[None, :] < levels[:, None], k, 1)
+
+        return DesignBatch(
+            bits_per_elem=h,
+            size_ratio=T,
+            policy=np.full(len(systems), Policy.Kapacity.value, dtype=np.int8),
+            kapacity=k.astype(np.float64),
+        )
+
 
 class QHybridGen(LSMDataGenerator):
     def __init__(self, bounds: LSMBounds, **kwargs):
@@ -175,6 +275,17 @@ class QHybridGen(LSMDataGenerator):
 
         return design
 
+    def sample_designs(self, systems: SystemBatch) -> DesignBatch:
+        designs = self._sample_designs_batch(systems)
+        Q = self._sample_q(designs.size_ratio.astype(np.int64))
+
+        return DesignBatch(
+            bits_per_elem=designs.bits_per_elem,
+            size_ratio=designs.size_ratio,
+            policy=np.full(len(systems), Policy.QHybrid.value, dtype=np.int8),
+            kapacity=Q[:, None].astype(np.float64),
+        )
+
 
 class FluidLSMGen(LSMDataGenerator):
     def __init__(self, bounds: LSMBounds, **kwargs):
@@ -197,3 +308,16 @@ class FluidLSMGen(LSMDataGenerator):
         )
 
         return design
+
+    def sample_designs(self, systems: SystemBatch) -> DesignBatch:
+        designs = self._sample_designs_batch(systems)
+        T = designs.size_ratio.astype(np.int64)
+        Y = self._sample_capacity(T)
+        Z = self._sample_capacity(T)
+
+        return DesignBatch(
+            bits_per_elem=designs.bits_per_elem,
+            size_ratio=designs.size_ratio,
+            policy=np.full(len(systems), Policy.Fluid.value, dtype=np.int8),
+            kapacity=np.stack((Y, Z), axis=1).astype(np.float64),
+        )
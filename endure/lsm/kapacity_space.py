@@ -0,0 +1,134 @@
+from bisect import bisect_right
+from collections.abc import Sequence
+from math import comb
+from typing import Iterator, List, Tuple, Union
+
+
+class KapacitySpace(Sequence):
+    """Lazy view of every K-LSM level configuration.
+
+    Behaves like list(combinations_with_replacement(range(T, 0, -1), levels)),
+    i.e. non-increasing tuples of per-level run counts in lexicographic order,
+    without materializing them. Ranking and unranking use closed-form
+    multiset counts, so cost does not grow with the size of the space.
+    len() is limited to sys.maxsize, use `size` for larger spaces.
+    """
+
+    def __init__(self, levels: int, max_size_ratio: int) -> None:
+        if levels < 0 or max_size_ratio < 1:
+            raise ValueError("levels must be >= 0 and max_size_ratio >= 1")
+        self.levels = levels
+        self.max_size_ratio = max_size_ratio
+        self.size = comb(max_size_ratio + levels - 1, levels)
+
+    def _tail(self, start: int, remaining: int) -> int:
+        # Number of completions with `remaining` more positions drawn from
+        # pool indices >= start
+        return comb(self.max_size_ratio - start + remaining, remaining + 1)
+
+    def __len__(self) -> int:
+        return self.size
+
+    def _to_values(self, indices: List[int]) -> Tuple[int, ...]:
+        return tuple(self.max_size_ratio - idx for idx in indices)
+
+    def unrank(self, rank: int) -> Tuple[int, ...]:
+        if not 0 <= rank < self.size:
+            raise IndexError("KapacitySpace index out of range")
+        indices, prev = [], 0
+        for pos in range(self.levels):
+            remaining = self.levels - pos - 1
+            base = self._tail(prev, remaining)
+            # Ranks skipped by choosing pool index c at this position are
+            # base - _tail(c, remaining), which is increasing in c
+            offsets = _SkipCounts(self, prev, remaining, base)
+            choice = prev + bisect_right(offsets, rank) - 1
+            rank -= offsets[choice - prev]
+            indices.append(choice)
+            prev = choice
+
+        return self._to_values(indices)
+
+    def rank(self, config: Sequence) -> int:
+        if len(config) != self.levels:
+            raise ValueError(f"{tuple(config)} is not in KapacitySpace")
+        rank, prev = 0, 0
+        for pos, value in enumerate(config):
+            idx = self.max_size_ratio - int(value)
+            if int(value) != value or not prev <= idx < self.max_size_ratio:
+                raise ValueError(f"{tuple(config)} is not in KapacitySpace")
+            remaining = self.levels - pos - 1
+            rank += self._tail(prev, remaining) - self._tail(idx, remaining)
+            prev = idx
+
+        return rank
+
+    def __getitem__(
+        self, key: Union[int, slice]
+    ) -> Union[Tuple[int, ...], List[Tuple[int, ...]]]:
+        if isinstance(key, slice):
+            ranks = range(self.size)[key]
+            if ranks.step == 1:
+                return list(self.iter_range(ranks.start, ranks.stop))
+            return [self.unrank(r) for r in ranks]
+        if key < 0:
+            key += self.size
+
+        return self.unrank(key)
+
+    def index(self, config, start: int = 0, stop=None) -> int:
+        rank = self.rank(config)
+        if rank not in range(self.size)[start:stop]:
+            raise ValueError(f"{tuple(config)} is not in range")
+
+        return rank
+
+    def __contains__(self, config) -> bool:
+        try:
+            self.rank(config)
+        except (ValueError, TypeError):
+            return False
+        return True
+
+    def iter_range(self, start: int, stop: int) -> Iterator[Tuple[int, ...]]:
+        start, stop = max(start, 0), min(stop, self.size)
+        if start >= stop:
+            return
+        last = self.max_size_ratio - 1
+        indices = [self.max_size_ratio - v for v in self.unrank(start)]
+        for _ in range(stop - start - 1):
+            yield self._to_values(indices)
+            pos = self.levels - 1
+            while indices[pos] == last:
+                pos -= 1
+            indices[pos:] = [indices[pos] + 1] * (self.levels - pos)
+        yield self._to_values(indices)
+
+    def __iter__(self) -> Iterator[Tuple[int, ...]]:
+        return self.iter_range(0, self.size)
+
+    def shard(self, index: int, num_shards: int) -> Iterator[Tuple[int, ...]]:
+        # Contiguous rank blocks, so workers never enumerate each other's part
+        size = -(-self.size // num_shards)
+
+        return self.iter_range(index * size, (index + 1) * size)
+
+    def __repr__(self) -> str:
+        return (
+            f"KapacitySpace(levels={self.levels}, "
+            f"max_size_ratio={self.max_size_ratio})"
+        )
+
+
+class _SkipCounts(Sequence):
+    def __init__(self, space: KapacitySpace, start: int, remaining: int, base: int):
+        self.space = space
+        self.start = start
+        self.remaining = remaining
+        self.base = base
+
+    def __len__(self) -> int:
+        return self.space.max_size_ratio - self.start
+
+    def __getitem__(self, offset: int) -> int:
+        return self.base - self.space._tail(self.start + offset, self.remaining)
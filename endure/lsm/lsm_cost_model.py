@@ -24,6 +24,23 @@ def calc_level(
     return level
 
 
+@jit(nopython=True)
+def calc_level_batch(
+    bpe: np.ndarray,
+    size_ratio: np.ndarray,
+    entry_size: np.ndarray,
+    max_bits: np.ndarray,
+    num_elem: np.ndarray,
+) -> np.ndarray:
+    level = np.empty(bpe.shape[0])
+    for i in range(bpe.shape[0]):
+        level[i] = calc_level(
+            bpe[i], size_ratio[i], entry_size[i], max_bits[i], num_elem[i]
+        )
+
+    return level
+
+
 @jit(nopython=True)
 def calc_level_fp(
     level: int,
@@ -206,3 +223,81 @@ def calc_individual_cost(
     c_w = w * write_op(h, T, K, entry_per_page, entry_size, max_bits, num_elem, phi)
 
     return (c_z0, c_z1, c_q, c_w)
+
+
+@jit(nopython=True)
+def calc_cost_batch(
+    h: np.ndarray,
+    T: np.ndarray,
+    K: np.ndarray,  # [n, max_levels]
+    z0: np.ndarray,
+    z1: np.ndarray,
+    q: np.ndarray,
+    w: np.ndarray,
+    entry_per_page: np.ndarray,  # B
+    selectivity: np.ndarray,  # s
+    entry_size: np.ndarray,  # E
+    max_bits: np.ndarray,  # H
+    num_elem: np.ndarray,  # N
+    phi: np.ndarray,
+) -> np.ndarray:
+    cost = np.empty(h.shape[0])
+    for i in range(h.shape[0]):
+        cost[i] = calc_cost(
+            h[i],
+            T[i],
+            K[i],
+            z0[i],
+            z1[i],
+            q[i],
+            w[i],
+            entry_per_page[i],
+            selectivity[i],
+            entry_size[i],
+            max_bits[i],
+            num_elem[i],
+            phi[i],
+        )
+
+    return cost
+
+
+@jit(nopython=True)
+def calc_individual_cost_batch(
+    h: np.ndarray,
+    T: np.ndarray,
+    K: np.ndarray,  # [n, max_levels]
+    z0: np.ndarray,
+    z1: np.ndarray,
+    q: np.ndarray,
+    w: np.ndarray,
+    entry_per_page: np.ndarray,  # B
+    selectivity: np.ndarray,  # s
+    entry_size: np.ndarray,  # E
+    max_bits: np.ndarray,  # H
+    num_elem: np.ndarray,  # N
+    phi: np.ndarray,
+) -> np.ndarray:
+    cost = np.empty((h.shape[0], 4))
+    for i in range(h.shape[0]):
+        c_z0, c_z1, c_q, c_w = calc_individual_cost(
+            h[i],
+            T[i],
+            K[i],
+            z0[i],
+            z1[i],
+            q[i],
+            w[i],
+            entry_per_page[i],
+            selectivity[i],
+            entry_size[i],
+            max_bits[i],
+            num_elem[i],
+            phi[i],
+        )
+        cost[i, 0] = c_z0
+        cost[i, 1] = c_z1
+        cost[i, 2] = c_q
+        cost[i, 3] = c_w
+
+    return cost
@@ -0,0 +1,163 @@
+from itertools import combinations_with_replacement
+from math import comb
+from typing import Optional, Sequence, Tuple, Union
+import warnings
+
+import numpy as np
+from scipy.stats import qmc
+
+SIMPLEX_METHODS = ("uniform", "sobol", "stratified", "dirichlet", "lattice")
+# Sampled lattices are shrunk toward the center so every component is at least
+# this, as the other samplers never return zero components (KL divergences
+# against a workload with a zero component are infinite or undefined)
+LATTICE_FLOOR = 0.01
+
+
+def simplex_lattice(steps: int) -> np.ndarray:
+    # Every workload with components in multiples of 1 / steps, in the
+    # lexicographic order of their cumulative sums
+    points = []
+    for c0, c1, c2 in combinations_with_replacement(range(steps + 1), 3):
+        points.append((c0, c1 - c0, c2 - c1, steps - c2))
+
+    return np.array(points, dtype=np.float64) / steps
+
+
+class SimplexLattice:
+    """Regular lattice on the workload simplex with Freudenthal interpolation.
+
+    A point lies in the Freudenthal simplex of the cube its cumulative sums
+    fall in. Its four vertices and barycentric weights come from sorting the
+    fractional parts of the scaled cumulative sums.
+    """
+
+    def __init__(self, steps: int) -> None:
+        self.steps = steps
+        self.points = simplex_lattice(steps)
+        self._index = np.full((steps + 1,) * 3, -1, dtype=np.int64)
+        cumulative = np.rint(np.cumsum(self.points, axis=1)[:, :3] * steps)
+        cumulative = cumulative.astype(np.int64)
+        self._index[tuple(cumulative.T)] = np.arange(len(self.points))
+
+    def __len__(self) -> int:
+        return len(self.points)
+
+    def vertices(self, x: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        # Lattice indices and barycentric weights, [..., 4] each
+        x = np.clip(np.asarray(x, dtype=np.float64), 0, None)
+        x = x / x.sum(axis=-1, keepdims=True)
+        c = np.cumsum(x, axis=-1)[..., :3] * self.steps
+        base = np.minimum(np.floor(c), self.steps).astype(np.int64)
+        frac = c - base
+        # Ties step the later coordinate first so vertices stay non-decreasing
+        order = 2 - np.argsort(-frac[..., ::-1], axis=-1, kind="stable")
+
+        vertices = [base]
+        for k in range(3):
+            step = np.zeros_like(base)
+            np.put_along_axis(step, order[..., k : k + 1], 1, axis=-1)
+            vertices.append(np.minimum(vertices[-1] + step, self.steps))
+        vertices = np.stack(vertices, axis=-2)  # [..., 4, 3]
+        f = np.take_along_axis(frac, order, axis=-1)
+        weights = np.stack(
+            (1 - f[..., 0], f[..., 0] - f[..., 1], f[..., 1] - f[..., 2], f[..., 2]),
+            axis=-1,
+        )
+        indices = self._index[vertices[..., 0], vertices[..., 1], vertices[..., 2]]
+        assert np.all(indices >= 0)
+
+        return indices, weights
+
+    def interpolate(self, values: np.ndarray, x: np.ndarray) -> np.ndarray:
+        # values has the lattice points on its last axis
+        indices, weights = self.vertices(x)
+        return np.sum(np.asarray(values)[..., indices] * weights, axis=-1)
+
+
+def lattice_steps(n: int) -> int:
+    # Finest lattice with at most n points (there are C(steps + 3, 3))
+    steps = 1
+    while comb(steps + 4, 3) <= n:
+        steps += 1
+
+    return steps
+
+
+def sort_diff(cube: np.ndarray) -> np.ndarray:
+    # Gaps between sorted uniform points are uniform on the simplex, see
+    # https://stackoverflow.com/questions/8064629
+    n = cube.shape[0]
+    cube = np.concatenate((np.zeros((n, 1)), cube, np.ones((n, 1))), axis=1)
+
+    return np.diff(np.sort(cube, axis=1), axis=1)
+
+
+def sample_uniform(n: int, rng: np.random.Generator) -> np.ndarray:
+    return sort_diff(rng.random((n, 3)))
+
+
+def sample_sobol(
+    n: int, rng: np.random.Generator, scramble: bool = True
+) -> np.ndarray:
+    sampler = qmc.Sobol(d=3, scramble=scramble, seed=rng)
+    with warnings.catch_warnings():
+        # Balance is best at powers of two, but any n is still well spread
+        warnings.simplefilter("ignore", category=UserWarning)
+        cube = sampler.random(n)
+
+    return sort_diff(cube)
+
+
+def sample_stratified(n: int, rng: np.random.Generator) -> np.ndarray:
+    # Equal counts per dominant operation. The four regions have equal volume
+    # and the uniform distribution is symmetric, so swapping the largest
+    # component of a uniform sample into slot i samples region i exactly.
+    counts = np.full(4, n // 4)
+    counts[rng.choice(4, size=n % 4, replace=False)] += 1
+    dominant = np.repeat(np.arange(4), counts)
+    points = sample_uniform(n, rng)
+    rows = np.arange(n)
+    largest = np.argmax(points, axis=1)
+    swapped = points[rows, dominant]
+    points[rows, dominant] = points[rows, largest]
+    points[rows, largest] = swapped
+
+    return points
+
+
+def sample_dirichlet(
+    n: int,
+    rng: np.random.Generator,
+    concentration: float = 1.0,
+    mean: Optional[Sequence[float]] = None,
+) -> np.ndarray:
+    # concentration 1 with no mean is uniform, larger values concentrate the
+    # samples around the mean workload
+    mean = np.full(4, 0.25) if mean is None else np.asarray(mean, dtype=np.float64)
+    alpha = 4 * concentration * mean / mean.sum()
+
+    return rng.dirichlet(alpha, size=n)
+
+
+def sample_simplex(
+    n: int,
+    rng: Union[np.random.Generator, int, None] = None,
+    method: str = "uniform",
+    **kwargs,
+) -> np.ndarray:
+    rng = np.random.default_rng(rng)
+    if method == "uniform":
+        return sample_uniform(n, rng)
+    if method == "sobol":
+        return sample_sobol(n, rng, **kwargs)
+    if method == "stratified":
+        return sample_stratified(n, rng)
+    if method == "dirichlet":
+        return sample_dirichlet(n, rng, **kwargs)
+    if method == "lattice":
+        # Not n points: the finest lattice with at most n, C(steps + 3, 3) of
+        # them (n = 16 gives 10), or exactly the lattice of `steps` when given
+        floor = kwargs.get("floor", LATTICE_FLOOR)
+        points = simplex_lattice(kwargs.get("steps", lattice_steps(n)))
+        return points * (1 - 4 * floor) + floor
+    raise ValueError(f"method must be one of {SIMPLEX_METHODS}")
@@ -1,6 +1,9 @@
-from dataclasses import dataclass
+from dataclasses import astuple, dataclass
 import enum
-from typing import Tuple
+from typing import Sequence, Tuple
+import weakref
+
+import numpy as np
 
 
 class Policy(enum.Enum):
@@ -12,8 +15,22 @@ class Policy(enum.Enum):
     Fluid = 5
 
 
-@dataclass(frozen=True)
-class System():
+def _canonical(obj) -> None:
+    # Generators and solvers hand out numpy scalars, store plain Python
+    # numbers so equal instances hash equal and serialize cleanly
+    for name in obj.__dataclass_fields__:
+        value = getattr(obj, name)
+        if isinstance(value, np.generic):
+            object.__setattr__(obj, name, value.item())
+
+
+_INTERNED: "weakref.WeakValueDictionary[tuple, System]" = (
+    weakref.WeakValueDictionary()
+)
+
+
+@dataclass(frozen=True, slots=True, weakref_slot=True)
+class System:
     entry_size: int = 8192
     selectivity: float = 4e-7
     entries_per_page: int = 4
@@ -21,22 +38,98 @@ class System():
     mem_budget: float = 10.0
     phi: float = 1.0  # Read/Write asymmetry coefficient
 
+    def __post_init__(self):
+        _canonical(self)
+
+    def intern(self) -> "System":
+        # Batches repeat a handful of systems, share one instance per value
+        key = astuple(self)
+        system = _INTERNED.get(key)
+        if system is None:
+            _INTERNED[key] = system = self
+        return system
+
+
+_NO_KAPACITY = np.empty(0, dtype=np.float64)
+_NO_KAPACITY.flags.writeable = False
+_CLASSIC_POLICIES = frozenset((Policy.Tiering, Policy.Leveling, Policy.Classic))
 
-@dataclass(kw_only=True, frozen=True)
+
+@dataclass(kw_only=True, frozen=True, slots=True, eq=False)
 class LSMDesign:
     bits_per_elem: float
     size_ratio: float
     policy: Policy
-    kapacity: Tuple[float, ...]
+    # Read-only float64, accepts any sequence. Its length is the policy's
+    # parameter count: 0 for classic, 1 for QHybrid, 2 for Fluid and one per
+    # level (max_considered_levels) for Kapacity, see Cost.create_k_list
+    kapacity: np.ndarray
 
     def __post_init__(self):
-        if self.policy in (Policy.Tiering, Policy.Leveling, Policy.Classic):
+        # Solver objectives build one design per evaluation, plain floats and
+        # an empty classic kapacity skip the conversions below
+        if not (type(self.bits_per_elem) is float and type(self.size_ratio) is float):
+            _canonical(self)
+        if self.kapacity is _NO_KAPACITY or (
+            isinstance(self.kapacity, tuple) and len(self.kapacity) == 0
+        ):
+            if self.policy in _CLASSIC_POLICIES:
+                object.__setattr__(self, "kapacity", _NO_KAPACITY)
+                return
+            kapacity = _NO_KAPACITY
+        else:
+            kapacity = np.array(self.kapacity, dtype=np.float64).reshape(-1) + 0.0
+            kapacity.flags.writeable = False
+        object.__setattr__(self, "kapacity", kapacity)
+
+        if self.policy in _CLASSIC_POLICIES:
             assert len(self.kapacity) == 0
         elif self.policy == Policy.QHybrid:
             assert len(self.kapacity) == 1
         elif self.policy == Policy.Fluid:
             assert len(self.kapacity) == 2
 
+    def __repr__(self) -> str:
+        kapacity = tuple(self.kapacity.tolist())
+        return (
+            f"LSMDesign(bits_per_elem={self.bits_per_elem!r}, "
+            f"size_ratio={self.size_ratio!r}, policy={self.policy!r}, "
+            f"kapacity={kapacity!r})"
+        )
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, LSMDesign):
+            return NotImplemented
+        return (
+            self.bits_per_elem == other.bits_per_elem
+            and self.size_ratio == other.size_ratio
+            and self.policy == other.policy
+            and np.array_equal(self.kapacity, other.kapacity)
+        )
+
+    def __hash__(self) -> int:
+        return hash(
+            (
+                self.bits_per_elem,
+                self.size_ratio,
+                self.policy,
+                self.kapacity.tobytes(),
+            )
+        )
+
+    def to_vector(self) -> np.ndarray:
+        # Solver parameter layout: [h, T, *kapacity]
+        return np.concatenate(([self.bits_per_elem, self.size_ratio], self.kapacity))
+
+    @classmethod
+    def from_vector(cls, x: np.ndarray, policy: Policy) -> "LSMDesign":
+        return cls(
+            bits_per_elem=float(x[0]),
+            size_ratio=float(x[1]),
+            policy=policy,
+            kapacity=x[2:],
+        )
+
 
 @dataclass(frozen=True)
 class LSMBounds:
@@ -50,9 +143,131 @@ class LSMBounds:
     elements_range: Tuple[int, int] = (100000000, 1000000000)
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class Workload:
     z0: float = 0.25
     z1: float = 0.25
     q: float = 0.25
     w: float = 0.25
+
+    def __post_init__(self):
+        _canonical(self)
+
+    def to_vector(self) -> np.ndarray:
+        return np.array([self.z0, self.z1, self.q, self.w], dtype=np.float64)
+
+    @classmethod
+    def from_vector(cls, x: np.ndarray) -> "Workload":
+        return cls(*(float(v) for v in x[:4]))
+
+
+@dataclass(frozen=True, eq=False)
+class SystemBatch:
+    entry_size: np.ndarray
+    selectivity: np.ndarray
+    entries_per_page: np.ndarray
+    num_entries: np.ndarray
+    mem_budget: np.ndarray
+    phi: np.ndarray
+
+    @classmethod
+    def from_systems(cls, systems: Sequence[System]) -> "SystemBatch":
+        return cls(
+            entry_size=np.array([s.entry_size for s in systems], dtype=np.float64),
+            selectivity=np.array([s.selectivity for s in systems], dtype=np.float64),
+            entries_per_page=np.array(
+                [s.entries_per_page for s in systems], dtype=np.float64
+            ),
+            num_entries=np.array([s.num_entries for s in systems], dtype=np.float64),
+            mem_budget=np.array([s.mem_budget for s in systems], dtype=np.float64),
+            phi=np.array([s.phi for s in systems], dtype=np.float64),
+        )
+
+    def __len__(self) -> int:
+        return self.entry_size.shape[0]
+
+    def __getitem__(self, idx: int) -> System:
+        return System(
+            entry_size=int(self.entry_size[idx]),
+            selectivity=float(self.selectivity[idx]),
+            entries_per_page=int(self.entries_per_page[idx]),
+            num_entries=int(self.num_entries[idx]),
+            mem_budget=float(self.mem_budget[idx]),
+            phi=float(self.phi[idx]),
+        ).intern()
+
+
+@dataclass(frozen=True, eq=False)
+class DesignBatch:
+    bits_per_elem: np.ndarray
+    size_ratio: np.ndarray
+    policy: np.ndarray  # Policy values
+    kapacity: np.ndarray  # [n, k], k fixed by the policy family
+
+    @classmethod
+    def from_designs(cls, designs: Sequence[LSMDesign]) -> "DesignBatch":
+        width = max((len(d.kapacity) for d in designs), default=0)
+        kapacity = np.ones((len(designs), width), dtype=np.float64)
+        for idx, design in enumerate(designs):
+            kapacity[idx, : len(design.kapacity)] = design.kapacity
+        return cls(
+            bits_per_elem=np.array(
+                [d.bits_per_elem for d in designs], dtype=np.float64
+            ),
+            size_ratio=np.array([d.size_ratio for d in designs], dtype=np.float64),
+            policy=np.array([d.policy.value for d in designs], dtype=np.int8),
+            kapacity=kapacity,
+        )
+
+    def __len__(self) -> int:
+        return self.bits_per_elem.shape[0]
+
+    def __getitem__(self, idx: int) -> LSMDesign:
+        policy = Policy(int(self.policy[idx]))
+        if policy in (Policy.Tiering, Policy.Leveling, Policy.Classic):
+            kapacity = ()
+        elif policy == Policy.QHybrid:
+            kapacity = self.kapacity[idx, :1]
+        elif policy == Policy.Fluid:
+            kapacity = self.kapacity[idx, :2]
+        else:
+            kapacity = self.kapacity[idx]
+        return LSMDesign(
+            bits_per_elem=float(self.bits_per_elem[idx]),
+            size_ratio=float(self.size_ratio[idx]),
+            policy=policy,
+            kapacity=kapacity,
+        )
+
+
+@dataclass(frozen=True, eq=False)
+class WorkloadBatch:
+    z0: np.ndarray
+    z1: np.ndarray
+    q: np.ndarray
+    w: np.ndarray
+
+    @classmethod
+    def from_array(cls, workloads: np.ndarray) -> "WorkloadBatch":
+        workloads = np.asarray(workloads, dtype=np.float64)
+        return cls(*(np.ascontiguousarray(workloads[:, i]) for i in range(4)))
+
+    @classmethod
+    def from_workloads(cls, workloads: Sequence[Workload]) -> "WorkloadBatch":
+        return cls.from_array(
+            np.array([[wl.z0, wl.z1, wl.q, wl.w] for wl in workloads])
+        )
+
+    def to_array(self) -> np.ndarray:
+        return np.stack((self.z0, self.z1, self.q, self.w), axis=1)
+
+    def __len__(self) -> int:
+        return self.z0.shape[0]
+
+    def __getitem__(self, idx: int) -> Workload:
+        return Workload(
+            z0=float(self.z0[idx]),
+            z1=float(self.z1[idx]),
+            q=float(self.q[idx]),
+            w=float(self.w[idx]),
+        )
@@ -0,0 +1,7 @@
+from .controller import (
+    ControllerMetrics,
+    RetuneDecision,
+    RetuningController,
+    workload_kl,
+)
+from .replay import ReplayResult, load_workload_series, replay
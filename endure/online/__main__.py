@@ -0,0 +1,48 @@
+"""
+    Replays a recorded workload series (CSV with z0, z1, q, w columns)
+    through the online retuning controller
+
+    python -m endure.online series.csv --kl-threshold 0.05 --migration-cost 10
+"""
+
+import argparse
+
+from endure.lsm import ClassicGen, LSMBounds
+from . import RetuningController, load_workload_series, replay
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Replay a workload series")
+    parser.add_argument("series", type=str)
+    parser.add_argument("--kl-threshold", type=float, default=0.05)
+    parser.add_argument("--migration-cost", type=float, default=0.0)
+    parser.add_argument("--horizon", type=float, default=1.0)
+    parser.add_argument("--rho", type=float, default=None)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    bounds = LSMBounds()
+    system = ClassicGen(bounds, seed=args.seed).sample_system()
+    workloads = load_workload_series(args.series)
+    controller = RetuningController(
+        bounds,
+        system,
+        workloads[0],
+        kl_threshold=args.kl_threshold,
+        migration_cost=args.migration_cost,
+        horizon=args.horizon,
+        rho=args.rho,
+        seed=args.seed,
+    )
+    result = replay(controller, workloads)
+
+    for key, value in result.metrics.items():
+        print(f"{key:>18}: {value}")
+    print(f"{'controller cost':>18}: {result.controller_cost}")
+    print(f"{'migration cost':>18}: {result.migration_cost}")
+    print(f"{'static cost':>18}: {result.static_cost}")
+    print(f"{'savings':>18}: {result.savings}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,210 @@
+from dataclasses import dataclass, field
+from typing import Callable, List, Optional
+import time
+import warnings
+
+import numpy as np
+
+from endure.lsm.cost import Cost
+from endure.lsm.types import LSMBounds, LSMDesign, System, Workload
+from endure.solver import ClassicSolver, WorstCaseOracle
+from endure.solver.util import ETA_DEFAULT, LAMBDA_DEFAULT
+
+
+def workload_kl(p: Workload, q: Workload) -> float:
+    p_vec = np.array([p.z0, p.z1, p.q, p.w], dtype=np.float64)
+    q_vec = np.array([q.z0, q.z1, q.q, q.w], dtype=np.float64)
+    p_vec, q_vec = p_vec / p_vec.sum(), q_vec / q_vec.sum()
+    mask = p_vec > 0
+    if np.any(q_vec[mask] <= 0):
+        return np.inf
+
+    return float(np.sum(p_vec[mask] * np.log(p_vec[mask] / q_vec[mask])))
+
+
+@dataclass(frozen=True)
+class RetuneDecision:
+    step: int
+    workload: Workload
+    kl: float
+    drifted: bool
+    retuned: bool
+    current_cost: float
+    candidate_cost: float
+    gain: float
+    design: LSMDesign
+    latency: float
+
+
+@dataclass
+class ControllerMetrics:
+    decisions: int = 0
+    drifts: int = 0
+    retunes: int = 0
+    failures: int = 0
+    latencies: List[float] = field(default_factory=list)
+
+    @property
+    def retune_frequency(self) -> float:
+        return self.retunes / self.decisions if self.decisions > 0 else 0.0
+
+    def latency_percentile(self, percentile: float) -> float:
+        if len(self.latencies) == 0:
+            return 0.0
+        return float(np.percentile(self.latencies, percentile))
+
+    def summary(self) -> dict:
+        return {
+            "decisions": self.decisions,
+            "drifts": self.drifts,
+            "retunes": self.retunes,
+            "failures": self.failures,
+            "retune_frequency": self.retune_frequency,
+            "latency_p50": self.latency_percentile(50),
+            "latency_p99": self.latency_percentile(99),
+            "latency_max": max(self.latencies, default=0.0),
+        }
+
+
+class RetuningController:
+    """Re-tunes a classic design when a stream of workload estimates drifts.
+
+    Drift is KL(estimate || reference), where the reference is the workload
+    the current design was tuned for. A drifted estimate triggers a solve
+    warm-started from the current design, and the new design is adopted only
+    if its modelled cost gain over `horizon` operations exceeds
+    `migration_cost`. Passing `rho` tunes robust instead of nominal designs,
+    and `rho_fn` picks rho per workload (e.g. a DP rho calibration lookup).
+    Robust designs are then compared by their worst-case cost in the KL ball
+    of radius rho around the estimate, the objective they were tuned for.
+    A solve that fails keeps the current design and dual warm start; the
+    initial robust design comes from a multistart over random duals.
+    """
+
+    def __init__(
+        self,
+        bounds: LSMBounds,
+        system: System,
+        workload: Workload,
+        kl_threshold: float = 0.05,
+        migration_cost: float = 0.0,
+        horizon: float = 1.0,
+        rho: Optional[float] = None,
+        rho_fn: Optional[Callable[[Workload], float]] = None,
+        solver: Optional[ClassicSolver] = None,
+        design: Optional[LSMDesign] = None,
+        num_starts: int = 10,
+        seed: Optional[int] = None,
+    ) -> None:
+        self.bounds = bounds
+        self.system = system
+        self.kl_threshold = kl_threshold
+        self.migration_cost = migration_cost
+        self.horizon = horizon
+        self.rho = rho
+        self.rho_fn = rho_fn
+        self.solver = ClassicSolver(bounds) if solver is None else solver
+        self.num_starts = num_starts
+        self.rng = np.random.default_rng(seed)
+        self.costfunc = Cost(bounds.max_considered_levels)
+        self.oracle = WorstCaseOracle(bounds)
+        self.metrics = ControllerMetrics()
+        self.history: List[RetuneDecision] = []
+        self._dual = np.array([LAMBDA_DEFAULT, ETA_DEFAULT], dtype=np.float64)
+
+        self.reference = workload
+        if design is None:
+            design = self._solve(workload, self._rho(workload), None)
+            if design is None:
+                raise RuntimeError(f"no successful solve for the initial {workload}")
+        self.design = design
+
+    def _rho(self, workload: Workload) -> Optional[float]:
+        return self.rho if self.rho_fn is None else self.rho_fn(workload)
+
+    def _solve(
+        self, workload: Workload, rho: Optional[float], warm: Optional[LSMDesign]
+    ) -> Optional[LSMDesign]:
+        kwargs = {}
+        if warm is not None:
+            init = np.array([warm.bits_per_elem, warm.size_ratio])
+            if rho is not None:
+                init = np.concatenate((init, self._dual))
+            kwargs["init_args"] = init
+
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", category=RuntimeWarning)
+            if rho is None:
+                design, solution = self.solver.get_nominal_design(
+                    self.system, workload, **kwargs
+                )
+            elif warm is None:
+                design, solution = self.solver.get_robust_design_multistart(
+                    self.system,
+                    workload,
+                    rho,
+                    num_starts=self.num_starts,
+                    rng=self.rng,
+                )
+            else:
+                design, solution = self.solver.get_robust_design(
+                    self.system, workload, rho, **kwargs
+                )
+        if not solution.success:
+            return None
+        if rho is not None and np.all(np.isfinite(solution.x[-2:])):
+            self._dual = np.array(solution.x[-2:], dtype=np.float64)
+
+        return design
+
+    def _costs(
+        self, designs: List[LSMDesign], workload: Workload, rho: Optional[float]
+    ) -> List[float]:
+        if rho is None:
+            return [
+                self.costfunc.calc_cost(design, self.system, workload)
+                for design in designs
+            ]
+        _, costs = self.oracle.get_worst_case(designs, self.system, workload, rho)
+
+        return costs.tolist()
+
+    def observe(self, workload: Workload) -> RetuneDecision:
+        start = time.perf_counter()
+        kl = workload_kl(workload, self.reference)
+        drifted = kl > self.kl_threshold
+        rho = self._rho(workload)
+        gain, retuned = 0.0, False
+
+        candidate = self._solve(workload, rho, self.design) if drifted else None
+        designs = [self.design] if candidate is None else [self.design, candidate]
+        costs = self._costs(designs, workload, rho)
+        current_cost, candidate_cost = costs[0], costs[-1]
+        if candidate is not None:
+            gain = (current_cost - candidate_cost) * self.horizon
+            if gain > self.migration_cost:
+                self.design = candidate
+                self.reference = workload
+                retuned = True
+        latency = time.perf_counter() - start
+
+        self.metrics.decisions += 1
+        self.metrics.drifts += int(drifted)
+        self.metrics.retunes += int(retuned)
+        self.metrics.failures += int(drifted and candidate is None)
+        self.metrics.latencies.append(latency)
+        decision = RetuneDecision(
+            step=len(self.history),
+            workload=workload,
+            kl=kl,
+            drifted=drifted,
+            retuned=retuned,
+            current_cost=current_cost,
+            candidate_cost=candidate_cost,
+            gain=gain,
+            design=self.design,
+            latency=latency,
+        )
+        self.history.append(decision)
+
+        return decision
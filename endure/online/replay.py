@@ -0,0 +1,62 @@
+import csv
+from dataclasses import dataclass
+from typing import Iterable, List
+
+from endure.lsm.cost import Cost
+from endure.lsm.types import LSMDesign, Workload
+from .controller import RetuneDecision, RetuningController
+
+
+@dataclass(frozen=True)
+class ReplayResult:
+    decisions: List[RetuneDecision]
+    metrics: dict
+    controller_cost: float
+    static_cost: float
+    migration_cost: float
+
+    @property
+    def savings(self) -> float:
+        return self.static_cost - (self.controller_cost + self.migration_cost)
+
+
+def load_workload_series(path: str) -> List[Workload]:
+    # Expects one workload per row with z0, z1, q, w columns
+    with open(path, newline="") as file:
+        reader = csv.DictReader(file)
+        return [
+            Workload(
+                z0=float(row["z0"]),
+                z1=float(row["z1"]),
+                q=float(row["q"]),
+                w=float(row["w"]),
+            )
+            for row in reader
+        ]
+
+
+def replay(
+    controller: RetuningController, workloads: Iterable[Workload]
+) -> ReplayResult:
+    costfunc = Cost(controller.bounds.max_considered_levels)
+    static_design: LSMDesign = controller.design
+    decisions = []
+    controller_cost, static_cost = 0.0, 0.0
+    for workload in workloads:
+        decision = controller.observe(workload)
+        decisions.append(decision)
+        controller_cost += controller.horizon * costfunc.calc_cost(
+            decision.design, controller.system, workload
+        )
+        static_cost += controller.horizon * costfunc.calc_cost(
+            static_design, controller.system, workload
+        )
+    migrations = sum(decision.retuned for decision in decisions)
+
+    return ReplayResult(
+        decisions=decisions,
+        metrics=controller.metrics.summary(),
+        controller_cost=controller_cost,
+        static_cost=static_cost,
+        migration_cost=migrations * controller.migration_cost,
+    )
@@ -0,0 +1,3 @@
+from .client import TuningClient
+from .loadgen import run_load
+from .server import ServiceMetrics, TuneRequest, TuningService
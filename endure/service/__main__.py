@@ -0,0 +1,98 @@
+"""
+    Local tuning service
+
+    python -m endure.service serve --socket /tmp/endure.sock
+    python -m endure.service serve --port 8765
+    python -m endure.service bench --clients 16 --requests 50
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import tempfile
+
+from . import TuningClient, TuningService, run_load
+
+
+async def serve(args: argparse.Namespace) -> None:
+    service = TuningService(
+        workers=args.workers, batch_window=args.batch_window, max_batch=args.max_batch
+    )
+    if args.socket is not None:
+        server = await service.start_unix(args.socket)
+        print(f"listening on {args.socket}")
+    else:
+        server = await service.start_tcp(args.host, args.port)
+        print(f"listening on {args.host}:{args.port}")
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        service.close()
+
+
+async def bench(args: argparse.Namespace) -> None:
+    # Without an address, benchmark against an in-process server
+    service, server = None, None
+    socket = args.socket
+    if socket is None and args.port is None:
+        service = TuningService(
+            workers=args.workers,
+            batch_window=args.batch_window,
+            max_batch=args.max_batch,
+        )
+        socket = os.path.join(tempfile.mkdtemp(), "endure.sock")
+        server = await service.start_unix(socket)
+
+    if socket is not None:
+        connect = lambda: TuningClient.connect_unix(socket)  # noqa: E731
+    else:
+        connect = lambda: TuningClient.connect_tcp(args.host, args.port)  # noqa: E731
+
+    try:
+        report = await run_load(
+            connect,
+            clients=args.clients,
+            requests_per_client=args.requests,
+            num_systems=args.systems,
+            num_workloads=args.workloads,
+            rho=args.rho,
+            seed=args.seed,
+        )
+    finally:
+        if server is not None:
+            server.close()
+            await server.wait_closed()
+        if service is not None:
+            service.close()
+    print(json.dumps(report, indent=2))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Local LSM tuning service")
+    parser.add_argument("command", choices=("serve", "bench"))
+    parser.add_argument("--socket", type=str, default=None)
+    parser.add_argument("--host", type=str, default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=None)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--batch-window", type=float, default=0.002)
+    parser.add_argument("--max-batch", type=int, default=64)
+    parser.add_argument("--clients", type=int, default=8)
+    parser.add_argument("--requests", type=int, default=50)
+    parser.add_argument("--systems", type=int, default=4)
+    parser.add_argument("--workloads", type=int, default=16)
+    parser.add_argument("--rho", type=float, default=None)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    if args.command == "serve":
+        if args.socket is None and args.port is None:
+            args.port = 8765
+        asyncio.run(serve(args))
+    else:
+        asyncio.run(bench(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+import asyncio
+import itertools
+import json
+from typing import Dict, Optional
+
+from endure.lsm.types import System, Workload
+from .server import request_to_dict
+
+
+class TuningClient:
+    """Pipelined client for TuningService; many requests share one connection."""
+
+    def __init__(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        self.reader = reader
+        self.writer = writer
+        self._ids = itertools.count()
+        self._waiting: Dict[int, asyncio.Future] = {}
+        self._listener = asyncio.ensure_future(self._listen())
+
+    @classmethod
+    async def connect_unix(cls, path: str) -> "TuningClient":
+        reader, writer = await asyncio.open_unix_connection(path)
+        return cls(reader, writer)
+
+    @classmethod
+    async def connect_tcp(
+        cls, host: str = "127.0.0.1", port: int = 8765
+    ) -> "TuningClient":
+        reader, writer = await asyncio.open_connection(host, port)
+        return cls(reader, writer)
+
+    async def _listen(self) -> None:
+        while True:
+            line = await self.reader.readline()
+            if not line:
+                break
+            response = json.loads(line)
+            future = self._waiting.pop(response.get("id"), None)
+            if future is not None and not future.done():
+                future.set_result(response)
+        for future in self._waiting.values():
+            future.set_exception(ConnectionError("tuning service closed"))
+
+    async def _send(self, message: dict) -> dict:
+        message["id"] = next(self._ids)
+        future = asyncio.get_running_loop().create_future()
+        self._waiting[message["id"]] = future
+        self.writer.write(json.dumps(message).encode() + b"\n")
+        await self.writer.drain()
+        response = await future
+        if "error" in response:
+            raise RuntimeError(response["error"])
+
+        return response
+
+    async def tune(
+        self, system: System, workload: Workload, rho: Optional[float] = None
+    ) -> dict:
+        return await self._send(request_to_dict(system, workload, rho))
+
+    async def stats(self) -> dict:
+        response = await self._send({"op": "stats"})
+        return response["stats"]
+
+    async def close(self) -> None:
+        self.writer.close()
+        await self.writer.wait_closed()
+        self._listener.cancel()
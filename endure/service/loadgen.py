@@ -0,0 +1,63 @@
+import asyncio
+import time
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from endure.lsm import ClassicGen, LSMBounds
+from endure.lsm.types import System, Workload
+from .client import TuningClient
+
+
+def make_request_pool(
+    num_systems: int, num_workloads: int, rho: Optional[float], seed: int = 0
+) -> List[Tuple[System, Workload, Optional[float]]]:
+    gen = ClassicGen(LSMBounds(), seed=seed)
+    systems = [gen.sample_system() for _ in range(num_systems)]
+    workloads = [gen.sample_workload() for _ in range(num_workloads)]
+
+    return [(system, workload, rho) for system in systems for workload in workloads]
+
+
+async def run_load(
+    connect,
+    clients: int = 8,
+    requests_per_client: int = 50,
+    num_systems: int = 4,
+    num_workloads: int = 16,
+    rho: Optional[float] = None,
+    seed: int = 0,
+) -> dict:
+    # Requests are drawn with replacement from a small pool so identical and
+    # same-System requests overlap, exercising coalescing and batching
+    pool = make_request_pool(num_systems, num_workloads, rho, seed=seed)
+    rng = np.random.default_rng(seed=seed)
+    latencies: List[float] = []
+
+    async def client_loop(client_id: int) -> None:
+        client: TuningClient = await connect()
+        picks = rng.integers(0, len(pool), size=requests_per_client)
+        try:
+            for pick in picks:
+                start = time.perf_counter()
+                await client.tune(*pool[pick])
+                latencies.append(time.perf_counter() - start)
+        finally:
+            await client.close()
+
+    start = time.perf_counter()
+    await asyncio.gather(*(client_loop(i) for i in range(clients)))
+    elapsed = time.perf_counter() - start
+
+    stats_client: TuningClient = await connect()
+    server_stats = await stats_client.stats()
+    await stats_client.close()
+
+    return {
+        "requests": len(latencies),
+        "elapsed": elapsed,
+        "throughput": len(latencies) / elapsed,
+        "latency_p50": float(np.percentile(latencies, 50)),
+        "latency_p99": float(np.percentile(latencies, 99)),
+        "server": server_stats,
+    }
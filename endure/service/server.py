@@ -0,0 +1,308 @@
+import asyncio
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict, dataclass
+from functools import partial
+import json
+import logging
+import os
+import time
+from typing import Deque, Dict, List, Optional, Set, Tuple
+import warnings
+
+import numpy as np
+
+from endure.lsm.cost import Cost
+from endure.lsm.types import (
+    DesignBatch,
+    LSMBounds,
+    LSMDesign,
+    System,
+    SystemBatch,
+    Workload,
+    WorkloadBatch,
+)
+from endure.solver import ClassicSolver
+
+logger = logging.getLogger(__name__)
+
+_worker_solver: Optional[ClassicSolver] = None
+_worker_cost: Optional[Cost] = None
+_worker_starts: int = 10
+
+
+def design_to_dict(design: LSMDesign) -> dict:
+    return {
+        "bits_per_elem": float(design.bits_per_elem),
+        "size_ratio": float(design.size_ratio),
+        "policy": design.policy.name,
+        "kapacity": [float(k) for k in design.kapacity],
+    }
+
+
+@dataclass(frozen=True)
+class TuneRequest:
+    system: System
+    workload: Workload
+    rho: Optional[float] = None
+
+    @classmethod
+    def from_dict(cls, message: dict) -> "TuneRequest":
+        rho = message.get("rho", None)
+        return cls(
+            system=System(**message.get("system", {})),
+            workload=Workload(**message["workload"]),
+            rho=None if rho is None else float(rho),
+        )
+
+
+def _init_worker(bounds: LSMBounds, num_starts: int) -> None:
+    global _worker_solver, _worker_cost, _worker_starts
+    _worker_solver = ClassicSolver(bounds)
+    _worker_cost = Cost(bounds.max_considered_levels)
+    _worker_starts = num_starts
+
+
+def _solve_batch(
+    system: System, items: List[Tuple[Workload, Optional[float]]]
+) -> List[dict]:
+    # Solves one share of a System batch, then costs all of its designs in a
+    # single batched evaluation
+    assert _worker_solver is not None and _worker_cost is not None
+    designs, successes = [], []
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", category=RuntimeWarning)
+        for workload, rho in items:
+            if rho is None:
+                design, solution = _worker_solver.get_nominal_design(system, workload)
+            else:
+                # Seeded by the request, so an answer does not depend on the
+                # worker or the batch it landed in
+                rng = np.random.default_rng(hash((workload, rho)) & 0xFFFFFFFF)
+                design, solution = _worker_solver.get_robust_design_multistart(
+                    system, workload, rho, num_starts=_worker_starts, rng=rng
+                )
+            designs.append(design)
+            successes.append(bool(solution.success))
+    costs = _worker_cost.calc_cost_batch(
+        DesignBatch.from_designs(designs),
+        SystemBatch.from_systems([system]),
+        WorkloadBatch.from_workloads([workload for workload, _ in items]),
+    )
+
+    return [
+        {"design": design_to_dict(design), "cost": float(cost), "success": success}
+        for design, cost, success in zip(designs, costs, successes)
+    ]
+
+
+@dataclass
+class ServiceMetrics:
+    requests: int = 0
+    completed: int = 0
+    coalesced: int = 0
+    batches: int = 0
+    batched_requests: int = 0
+    errors: int = 0
+    failed: int = 0
+    window: int = 10_000
+
+    def __post_init__(self) -> None:
+        self.started = time.perf_counter()
+        self.latencies: Deque[float] = deque(maxlen=self.window)
+
+    def summary(self) -> dict:
+        elapsed = time.perf_counter() - self.started
+        latencies = np.array(self.latencies) if self.latencies else np.zeros(1)
+        return {
+            "requests": self.requests,
+            "completed": self.completed,
+            "coalesced": self.coalesced,
+            "batches": self.batches,
+            "mean_batch_size": self.batched_requests / max(self.batches, 1),
+            "errors": self.errors,
+            "failed": self.failed,
+            "latency_p50": float(np.percentile(latencies, 50)),
+            "latency_p99": float(np.percentile(latencies, 99)),
+            "throughput": self.completed / elapsed if elapsed > 0 else 0.0,
+        }
+
+
+class TuningService:
+    """Asyncio front end over a worker pool of ClassicSolvers.
+
+    Identical in-flight requests share one future, and requests for the same
+    System that arrive within `batch_window` seconds form a batch. A batch is
+    split evenly over the workers, each share going out as one task whose
+    designs are costed in one batched evaluation. Responses carry the
+    solver's `success` flag.
+    """
+
+    def __init__(
+        self,
+        bounds: Optional[LSMBounds] = None,
+        workers: Optional[int] = None,
+        batch_window: float = 0.002,
+        max_batch: int = 64,
+        num_starts: int = 10,
+    ) -> None:
+        self.bounds = LSMBounds() if bounds is None else bounds
+        self.batch_window = batch_window
+        self.max_batch = max_batch
+        if workers is None:
+            workers = os.cpu_count() or 1
+        self.workers = workers
+        self.executor = ProcessPoolExecutor(
+            workers,
+            initializer=_init_worker,
+            initargs=(self.bounds, num_starts),
+        )
+        self.metrics = ServiceMetrics()
+        self._inflight: Dict[TuneRequest, asyncio.Future] = {}
+        self._pending: Dict[System, List[TuneRequest]] = {}
+        self._batches: Set[asyncio.Task] = set()
+
+    async def tune(self, request: TuneRequest) -> dict:
+        self.metrics.requests += 1
+        start = time.perf_counter()
+        future = self._inflight.get(request, None)
+        if future is not None:
+            self.metrics.coalesced += 1
+        else:
+            loop = asyncio.get_running_loop()
+            future = loop.create_future()
+            self._inflight[request] = future
+            batch = self._pending.setdefault(request.system, [])
+            batch.append(request)
+            if len(batch) == 1:
+                loop.call_later(self.batch_window, self._flush, request.system)
+            if len(batch) >= self.max_batch:
+                self._flush(request.system)
+
+        try:
+            result = await asyncio.shield(future)
+        finally:
+            self.metrics.latencies.append(time.perf_counter() - start)
+        self.metrics.completed += 1
+
+        return result
+
+    def _flush(self, system: System) -> None:
+        batch = self._pending.pop(system, None)
+        if not batch:
+            return
+        self.metrics.batches += 1
+        self.metrics.batched_requests += len(batch)
+        # The loop only keeps weak references to tasks, hold on to each batch
+        task = asyncio.ensure_future(self._run_batch(system, batch))
+        self._batches.add(task)
+        task.add_done_callback(partial(self._batch_done, batch))
+
+    def _batch_done(self, batch: List[TuneRequest], task: asyncio.Task) -> None:
+        self._batches.discard(task)
+        if task.cancelled() or task.exception() is None:
+            return
+        error = task.exception()
+        logger.error("tune batch of %d requests failed", len(batch), exc_info=error)
+        for request in batch:
+            future = self._inflight.pop(request, None)
+            if future is not None and not future.done():
+                self.metrics.errors += 1
+                future.set_exception(error)
+
+    async def _run_batch(self, system: System, batch: List[TuneRequest]) -> None:
+        shares = min(len(batch), self.workers)
+        await asyncio.gather(
+            *(self._run_share(system, batch[i::shares]) for i in range(shares))
+        )
+
+    async def _run_share(self, system: System, share: List[TuneRequest]) -> None:
+        loop = asyncio.get_running_loop()
+        items = [(request.workload, request.rho) for request in share]
+        try:
+            results = await loop.run_in_executor(
+                self.executor, _solve_batch, system, items
+            )
+        except Exception as error:
+            self.metrics.errors += len(share)
+            for request in share:
+                self._inflight.pop(request).set_exception(error)
+            return
+        for request, result in zip(share, results):
+            self.metrics.failed += int(not result["success"])
+            self._inflight.pop(request).set_result(result)
+
+    async def _respond(self, message: dict) -> dict:
+        if message.get("op", "tune") == "stats":
+            return {"id": message.get("id"), "stats": self.metrics.summary()}
+        try:
+            result = await self.tune(TuneRequest.from_dict(message))
+        except Exception as error:
+            return {"id": message.get("id"), "error": repr(error)}
+
+        return {"id": message.get("id"), **result}
+
+    async def handle(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        # Newline-delimited JSON; responses may return out of order and carry
+        # the request id
+        lock = asyncio.Lock()
+        tasks = set()
+
+        async def respond(message: dict) -> None:
+            response = await self._respond(message)
+            async with lock:
+                writer.write(json.dumps(response).encode() + b"\n")
+                await writer.drain()
+
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                try:
+                    message = json.loads(line)
+                except json.JSONDecodeError as error:
+                    response = {"error": repr(error)}
+                    async with lock:
+                        writer.write(json.dumps(response).encode() + b"\n")
+                    continue
+                task = asyncio.ensure_future(respond(message))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+            if tasks:
+                await asyncio.gather(*tasks, return_exceptions=True)
+        except (asyncio.CancelledError, ConnectionError):
+            # Server shutdown or the client went away mid-request
+            for task in tasks:
+                task.cancel()
+        writer.close()
+
+    async def start_unix(self, path: str) -> asyncio.AbstractServer:
+        return await asyncio.start_unix_server(self.handle, path=path)
+
+    async def start_tcp(
+        self, host: str = "127.0.0.1", port: int = 8765
+    ) -> asyncio.AbstractServer:
+        return await asyncio.start_server(self.handle, host=host, port=port)
+
+    def close(self) -> None:
+        self.executor.shutdown(wait=True, cancel_futures=True)
+
+
+def request_to_dict(
+    system: System, workload: Workload, rho: Optional[float] = None
+) -> dict:
+    # Generators hand out numpy scalars, which json cannot encode
+    def plain(fields: dict) -> dict:
+        return {
+            key: val.item() if isinstance(val, np.generic) else val
+            for key, val in fields.items()
+        }
+
+    return {
+        "system": plain(asdict(system)),
+        "workload": plain(asdict(workload)),
+        "rho": None if rho is None else float(rho),
+    }
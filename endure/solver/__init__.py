@@ -4,6 +4,10 @@ from .classic_solver import ClassicSolver
 from .qlsm_solver import QLSMSolver
 from .klsm_solver import KLSMSolver
 from .fluidlsm_solver import FluidLSMSolver
+from .scenario_solver import ScenarioSolver
+from .design_atlas import DesignAtlas
+from .worst_case import WorstCaseOracle
+from .schedule_planner import CompactionTransitionCost, DesignSchedule, SchedulePlanner
 
 
 def get_solver_from_policy(
@@ -6,7 +6,7 @@ import scipy.optimize as SciOpt
 from endure.lsm.cost import Cost
 from endure.lsm.types import LSMDesign, Policy, System, LSMBounds, Workload
 from .util import kl_div_con
-from .util import get_bounds
+from .util import get_bounds, random_robust_starts
 
 H_DEFAULT = 5
 T_DEFAULT = 10
@@ -30,7 +30,7 @@ class ClassicSolver:
         rho: float,
         workload: Workload,
     ) -> float:
-        h, T, lamb, eta = x
+        h, T, lamb, eta = x.tolist()
         design = LSMDesign(bits_per_elem=h, size_ratio=T, policy=policy, kapacity=())
         query_cost = 0
         query_cost += workload.z0 * kl_div_con(
@@ -55,7 +55,7 @@ class ClassicSolver:
         system: System,
         workload: Workload,
     ):
-        h, T = x
+        h, T = x.tolist()
         design = LSMDesign(bits_per_elem=h, size_ratio=T, policy=policy, kapacity=())
         cost = self.costfunc.calc_cost(design, system, workload)
 
@@ -109,6 +109,45 @@ class ClassicSolver:
 
         return design, solution
 
+    def get_robust_design_multistart(
+        self,
+        system: System,
+        workload: Workload,
+        rho: float,
+        starts: Optional[np.ndarray] = None,
+        num_starts: int = 10,
+        rng: Optional[np.random.Generator] = None,
+        minimizer_kwargs: dict = {},
+        callback_fn: Optional[Callable] = None,
+    ) -> Tuple[LSMDesign, SciOpt.OptimizeResult]:
+        # Solves every policy from every start ([n, 4] (h, T, lambda, eta), random
+        # ones by default) and returns the successful solve with the lowest
+        # robust objective. When none succeeds the best failed one is returned,
+        # so callers must check solution.success
+        if starts is None:
+            rng = np.random.default_rng() if rng is None else rng
+            starts = random_robust_starts(self.bounds, num_starts, rng)
+
+        best = None
+        for policy in self.policies:
+            solver = ClassicSolver(self.bounds, policies=[policy])
+            for x0 in np.atleast_2d(starts):
+                design, solution = solver.get_robust_design(
+                    system,
+                    workload,
+                    rho,
+                    init_args=np.asarray(x0, dtype=np.float64),
+                    minimizer_kwargs=minimizer_kwargs,
+                    callback_fn=callback_fn,
+                )
+                fun = solution.fun if np.isfinite(solution.fun) else np.inf
+                key = (not solution.success, fun)
+                if best is None or key < best[0]:
+                    best = (key, design, solution)
+        assert best is not None
+
+        return best[1], best[2]
+
     def get_nominal_design(
         self,
         system: System,
@@ -0,0 +1,270 @@
+from multiprocessing import Pool
+from typing import List, Optional, Sequence, Tuple
+import warnings
+
+import numpy as np
+
+from endure.lsm.simplex import SimplexLattice, simplex_lattice
+from endure.lsm.types import LSMBounds, LSMDesign, Policy, System, Workload
+from .classic_solver import ClassicSolver
+from .util import random_robust_starts
+
+ATLAS_METHODS = ("barycentric", "nearest")
+
+_worker_solver: Optional[ClassicSolver] = None
+_worker_system: Optional[System] = None
+_worker_starts: int = 10
+
+
+def _init_worker(
+    bounds: LSMBounds, system: System, policies: List[Policy], num_starts: int
+) -> None:
+    global _worker_solver, _worker_system, _worker_starts
+    _worker_solver = ClassicSolver(bounds, policies=policies)
+    _worker_system = system
+    _worker_starts = num_starts
+
+
+def _solve_cell(
+    task: Tuple[int, Tuple[float, ...], float, int]
+) -> Tuple[float, float, int, bool]:
+    assert _worker_solver is not None and _worker_system is not None
+    index, workload, rho, seed = task
+    workload = Workload(*workload)
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", category=RuntimeWarning)
+        if rho == 0:
+            design, solution = _worker_solver.get_nominal_design(
+                _worker_system, workload
+            )
+        else:
+            # Seeded by the cell, so an atlas does not depend on the pool size
+            design, solution = _worker_solver.get_robust_design_multistart(
+                _worker_system,
+                workload,
+                rho,
+                num_starts=_worker_starts,
+                rng=np.random.default_rng([seed, index]),
+            )
+
+    return (
+        design.bits_per_elem,
+        design.size_ratio,
+        design.policy.value,
+        bool(solution.success),
+    )
+
+
+class DesignAtlas:
+    """Precomputed classic designs over the workload simplex and a rho grid.
+
+    Layer 0 holds the nominal designs, layer i > 0 the robust designs for
+    rhos[i]. Queries interpolate over the Freudenthal simplex of the lattice
+    containing the workload and linearly between the bracketing rho layers.
+    Cells whose solve failed are marked in `valid` and left out of queries.
+    """
+
+    def __init__(
+        self,
+        bounds: LSMBounds,
+        system: System,
+        steps: int,
+        rhos: np.ndarray,
+        bits_per_elem: np.ndarray,
+        size_ratio: np.ndarray,
+        policy: np.ndarray,
+        valid: Optional[np.ndarray] = None,
+    ) -> None:
+        self.bounds = bounds
+        self.system = system
+        self.steps = steps
+        self.rhos = np.asarray(rhos, dtype=np.float64)
+        assert self.rhos[0] == 0 and np.all(np.diff(self.rhos) > 0)
+        self.bits_per_elem = bits_per_elem
+        self.size_ratio = size_ratio
+        self.policy = policy
+        self.valid = np.ones(policy.shape, dtype=bool) if valid is None else valid
+        self.lattice = SimplexLattice(steps)
+        self.workloads = self.lattice.points
+        assert self.bits_per_elem.shape == (len(self.rhos), len(self.workloads))
+
+    @classmethod
+    def build(
+        cls,
+        bounds: LSMBounds,
+        system: System,
+        resolution: float = 0.02,
+        rhos: Sequence[float] = tuple(np.arange(0.25, 2.01, 0.25)),
+        policies: Optional[List[Policy]] = None,
+        processes: Optional[int] = None,
+        chunksize: int = 64,
+        num_starts: int = 10,
+        seed: int = 0,
+    ) -> "DesignAtlas":
+        steps = int(round(1 / resolution))
+        rho_grid = np.concatenate(([0.0], np.asarray(rhos, dtype=np.float64)))
+        if policies is None:
+            policies = [Policy.Tiering, Policy.Leveling]
+        workloads = simplex_lattice(steps)
+        cells = [(tuple(wl), rho) for rho in rho_grid for wl in workloads]
+        tasks = [(i, wl, rho, seed) for i, (wl, rho) in enumerate(cells)]
+
+        init = (bounds, system, policies, num_starts)
+        with Pool(processes, _init_worker, init) as pool:
+            results = np.array(pool.map(_solve_cell, tasks, chunksize=chunksize))
+        shape = (len(rho_grid), len(workloads))
+
+        return cls(
+            bounds,
+            system,
+            steps,
+            rho_grid,
+            results[:, 0].reshape(shape).astype(np.float32),
+            results[:, 1].reshape(shape).astype(np.float32),
+            results[:, 2].reshape(shape).astype(np.uint8),
+            results[:, 3].reshape(shape).astype(bool),
+        )
+
+    def save(self, path: str) -> None:
+        system = self.system
+        np.savez_compressed(
+            path,
+            steps=self.steps,
+            rhos=self.rhos,
+            bits_per_elem=self.bits_per_elem,
+            size_ratio=self.size_ratio,
+            policy=self.policy,
+            valid=self.valid,
+            system=np.array(
+                [
+                    system.entry_size,
+                    system.selectivity,
+                    system.entries_per_page,
+                    system.num_entries,
+                    system.mem_budget,
+                    system.phi,
+                ],
+                dtype=np.float64,
+            ),
+        )
+
+    @classmethod
+    def load(cls, path: str, bounds: Optional[LSMBounds] = None) -> "DesignAtlas":
+        if bounds is None:
+            bounds = LSMBounds()
+        with np.load(path) as data:
+            E, s, B, N, H, phi = data["system"].tolist()
+            system = System(
+                entry_size=int(E),
+                selectivity=s,
+                entries_per_page=int(B),
+                num_entries=int(N),
+                mem_budget=H,
+                phi=phi,
+            )
+            return cls(
+                bounds,
+                system,
+                int(data["steps"]),
+                data["rhos"],
+                data["bits_per_elem"],
+                data["size_ratio"],
+                data["policy"],
+                data["valid"] if "valid" in data.files else None,
+            )
+
+    def _simplex_vertices(self, workload: Workload) -> Tuple[np.ndarray, np.ndarray]:
+        x = np.array([workload.z0, workload.z1, workload.q, workload.w])
+        return self.lattice.vertices(x)
+
+    def _rho_layers(self, rho: Optional[float]) -> Tuple[np.ndarray, np.ndarray]:
+        if rho is None or rho <= 0:
+            return np.array([0]), np.array([1.0])
+        if rho >= self.rhos[-1]:
+            return np.array([len(self.rhos) - 1]), np.array([1.0])
+        upper = int(np.searchsorted(self.rhos, rho, side="right"))
+        t = (rho - self.rhos[upper - 1]) / (self.rhos[upper] - self.rhos[upper - 1])
+
+        return np.array([upper - 1, upper]), np.array([1 - t, t])
+
+    def lookup(
+        self,
+        workload: Workload,
+        rho: Optional[float] = None,
+        method: str = "barycentric",
+    ) -> LSMDesign:
+        if method not in ATLAS_METHODS:
+            raise ValueError(f"method must be one of {ATLAS_METHODS}")
+        vertices, vertex_weights = self._simplex_vertices(workload)
+        layers, layer_weights = self._rho_layers(rho)
+        if method == "nearest":
+            vertices = vertices[[np.argmax(vertex_weights)]]
+            layers = layers[[np.argmax(layer_weights)]]
+            vertex_weights, layer_weights = np.ones(1), np.ones(1)
+
+        weights = np.outer(layer_weights, vertex_weights)
+        cells = np.ix_(layers, vertices)
+        h = self.bits_per_elem[cells].astype(np.float64)
+        T = self.size_ratio[cells].astype(np.float64)
+        policy = self.policy[cells]
+        weights = weights * self.valid[cells]
+        if not np.any(weights > 0):
+            raise ValueError(f"no successful solve in the atlas cells around {workload}")
+
+        # Designs only interpolate within the policy carrying the most weight
+        values = np.unique(policy[weights > 0])
+        totals = [weights[policy == value].sum() for value in values]
+        value = values[int(np.argmax(totals))]
+        mask = policy == value
+        weights = weights * mask / weights[mask].sum()
+
+        return LSMDesign(
+            bits_per_elem=float(np.sum(weights * h)),
+            size_ratio=float(np.sum(weights * T)),
+            policy=Policy(int(value)),
+            kapacity=(),
+        )
+
+    def query(
+        self,
+        workload: Workload,
+        rho: Optional[float] = None,
+        method: str = "barycentric",
+        refine: bool = False,
+        refine_maxiter: int = 50,
+        refine_starts: int = 4,
+        seed: int = 0,
+    ) -> LSMDesign:
+        # A refinement that fails keeps the looked-up design
+        design = self.lookup(workload, rho, method)
+        if not refine:
+            return design
+
+        solver = ClassicSolver(self.bounds, policies=[design.policy])
+        minimizer_kwargs = {
+            "options": {"ftol": 1e-6, "disp": False, "maxiter": refine_maxiter}
+        }
+        init_args = np.array([design.bits_per_elem, design.size_ratio])
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", category=RuntimeWarning)
+            if rho is None or rho <= 0:
+                refined, solution = solver.get_nominal_design(
+                    self.system,
+                    workload,
+                    init_args=init_args,
+                    minimizer_kwargs=minimizer_kwargs,
+                )
+            else:
+                # Warm start (h, T), with the duals drawn like a multistart's
+                rng = np.random.default_rng(seed)
+                starts = random_robust_starts(self.bounds, refine_starts, rng)
+                starts[:, :2] = init_args
+                refined, solution = solver.get_robust_design_multistart(
+                    self.system,
+                    workload,
+                    rho,
+                    starts=starts,
+                    minimizer_kwargs=minimizer_kwargs,
+                )
+
+        return refined if solution.success else design
@@ -114,11 +114,6 @@ class KLSMSolver:
             callback=callback_fn,
             **default_kwargs
         )
-        design = LSMDesign(
-            bits_per_elem=solution.x[0],
-            size_ratio=solution.x[1],
-            kapacity=solution.x[2:],
-            policy=Policy.Kapacity,
-        )
+        design = LSMDesign.from_vector(solution.x, Policy.Kapacity)
 
         return design, solution
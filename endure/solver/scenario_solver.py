@@ -0,0 +1,152 @@
+from typing import Callable, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+import scipy.optimize as SciOpt
+
+from endure.lsm.cost import Cost
+from endure.lsm.types import LSMBounds, LSMDesign, Policy, System, SystemBatch, Workload
+from .util import get_bounds
+
+H_DEFAULT = 5
+T_DEFAULT = 10
+
+SCENARIO_OBJECTIVES = ("expected", "worst")
+
+
+class ScenarioSolver:
+    """Tunes a single classic design against a weighted set of System scenarios.
+
+    objective="expected" minimizes the weighted mean cost across scenarios,
+    objective="worst" minimizes the maximum scenario cost (epigraph form).
+    """
+
+    def __init__(
+        self,
+        bounds: LSMBounds,
+        policies: Optional[List[Policy]] = None,
+        objective: str = "expected",
+    ):
+        if objective not in SCENARIO_OBJECTIVES:
+            raise ValueError(f"objective must be one of {SCENARIO_OBJECTIVES}")
+        self.bounds = bounds
+        self.costfunc = Cost(bounds.max_considered_levels)
+        if policies is None:
+            policies = [Policy.Tiering, Policy.Leveling]
+        self.policies = policies
+        self.objective = objective
+
+    def scenario_costs(
+        self,
+        x: np.ndarray,
+        policy: Policy,
+        systems: SystemBatch,
+        workload: Workload,
+    ) -> np.ndarray:
+        h, T = x[0:2]
+        design = LSMDesign(bits_per_elem=h, size_ratio=T, policy=policy, kapacity=())
+
+        return self.costfunc.calc_cost_scenarios(design, systems, workload)
+
+    def expected_objective(
+        self,
+        x: np.ndarray,
+        policy: Policy,
+        systems: SystemBatch,
+        weights: np.ndarray,
+        workload: Workload,
+    ) -> float:
+        return float(weights @ self.scenario_costs(x, policy, systems, workload))
+
+    def worst_objective(self, x: np.ndarray) -> float:
+        return x[-1]
+
+    def worst_constraint(
+        self,
+        x: np.ndarray,
+        policy: Policy,
+        systems: SystemBatch,
+        workload: Workload,
+    ) -> np.ndarray:
+        return x[-1] - self.scenario_costs(x, policy, systems, workload)
+
+    def _get_scenario_bounds(self, systems: SystemBatch, worst: bool) -> SciOpt.Bounds:
+        # The bloom filter budget must fit every scenario's memory
+        tightest = systems[int(np.argmin(systems.mem_budget))]
+        bounds = get_bounds(bounds=self.bounds, system=tightest, robust=False)
+        if not worst:
+            return bounds
+        lb = np.append(bounds.lb, 0)
+        ub = np.append(bounds.ub, np.inf)
+
+        return SciOpt.Bounds(lb=lb, ub=ub, keep_feasible=True)  # type: ignore
+
+    def get_nominal_design(
+        self,
+        systems: Union[Sequence[System], SystemBatch],
+        workload: Workload,
+        weights: Optional[Sequence[float]] = None,
+        objective: Optional[str] = None,
+        init_args: np.ndarray = np.array([H_DEFAULT, T_DEFAULT]),
+        minimizer_kwargs: dict = {},
+        callback_fn: Optional[Callable] = None,
+    ) -> Tuple[LSMDesign, SciOpt.OptimizeResult]:
+        if not isinstance(systems, SystemBatch):
+            systems = SystemBatch.from_systems(systems)
+        assert len(systems) > 0
+        if weights is None:
+            weights = np.ones(len(systems))
+        weights = np.asarray(weights, dtype=np.float64)
+        assert weights.shape == (len(systems),)
+        weights = weights / weights.sum()
+        objective = self.objective if objective is None else objective
+        if objective not in SCENARIO_OBJECTIVES:
+            raise ValueError(f"objective must be one of {SCENARIO_OBJECTIVES}")
+        worst = objective == "worst"
+
+        default_kwargs = {
+            "method": "SLSQP",
+            "bounds": self._get_scenario_bounds(systems, worst),
+            "options": {"ftol": 1e-6, "disp": False, "maxiter": 1000},
+        }
+        default_kwargs.update(minimizer_kwargs)
+
+        design, solution = None, None
+        min_sol = np.inf
+        for policy in self.policies:
+            if worst:
+                x0 = np.asarray(init_args, dtype=np.float64)[0:2]
+                t0 = self.scenario_costs(x0, policy, systems, workload).max()
+                sol = SciOpt.minimize(
+                    fun=self.worst_objective,
+                    x0=np.append(x0, t0),
+                    callback=callback_fn,
+                    constraints={
+                        "type": "ineq",
+                        "fun": lambda x: self.worst_constraint(
+                            x, policy, systems, workload
+                        ),
+                    },
+                    **default_kwargs
+                )
+            else:
+                sol = SciOpt.minimize(
+                    fun=lambda x: self.expected_objective(
+                        x, policy, systems, weights, workload
+                    ),
+                    x0=init_args,
+                    callback=callback_fn,
+                    **default_kwargs
+                )
+            if sol.fun < min_sol or (design is None and solution is None):
+                min_sol = sol.fun
+                design = LSMDesign(
+                    bits_per_elem=sol.x[0],
+                    size_ratio=sol.x[1],
+                    policy=policy,
+                    kapacity=(),
+                )
+                solution = sol
+        assert design is not None
+        assert solution is not None
+
+        return design, solution
@@ -0,0 +1,185 @@
+from dataclasses import dataclass
+from typing import List, Optional, Sequence, Tuple
+import warnings
+
+import numpy as np
+
+from endure.lsm import ClassicGen
+from endure.lsm.cost import Cost
+from endure.lsm.types import LSMBounds, LSMDesign, Policy, System, Workload
+from .classic_solver import ClassicSolver
+
+
+class CompactionTransitionCost:
+    """I/O needed to move an LSM tree from one design to another.
+
+    Changing the size ratio or the policy rewrites the whole tree (read and
+    write every page, writes weighted by phi). Changing only the bloom filter
+    bits re-reads every page to rebuild the filters.
+    """
+
+    def __init__(
+        self,
+        compaction_scale: float = 1.0,
+        filter_scale: float = 1.0,
+        tolerance: float = 1e-3,
+    ) -> None:
+        self.compaction_scale = compaction_scale
+        self.filter_scale = filter_scale
+        self.tolerance = tolerance
+
+    def matrix(self, designs: Sequence[LSMDesign], system: System) -> np.ndarray:
+        h = np.array([d.bits_per_elem for d in designs], dtype=np.float64)
+        T = np.array([d.size_ratio for d in designs], dtype=np.float64)
+        policy = np.array([d.policy.value for d in designs])
+        pages = system.num_entries / system.entries_per_page
+
+        restructure = (np.abs(T[:, None] - T[None, :]) > self.tolerance) | (
+            policy[:, None] != policy[None, :]
+        )
+        refilter = np.abs(h[:, None] - h[None, :]) > self.tolerance
+        cost = np.where(
+            restructure,
+            self.compaction_scale * (1 + system.phi) * pages,
+            np.where(refilter, self.filter_scale * pages, 0.0),
+        )
+
+        return cost
+
+    def __call__(self, src: LSMDesign, dst: LSMDesign, system: System) -> float:
+        return float(self.matrix([src, dst], system)[0, 1])
+
+
+@dataclass(frozen=True)
+class DesignSchedule:
+    designs: List[LSMDesign]
+    operation_cost: float
+    transition_cost: float
+    per_period_cost: float
+    static_cost: float
+    static_design: LSMDesign
+
+    @property
+    def total_cost(self) -> float:
+        return self.operation_cost + self.transition_cost
+
+    @property
+    def savings_vs_per_period(self) -> float:
+        return self.per_period_cost - self.total_cost
+
+    @property
+    def savings_vs_static(self) -> float:
+        return self.static_cost - self.total_cost
+
+
+class SchedulePlanner:
+    """Plans one design per period to minimize operation plus transition I/O.
+
+    Period costs are durations (number of operations) times the per-op cost,
+    and all candidate designs are scored against all periods at once from
+    their batched op costs. A dynamic program over the candidate set picks
+    the schedule.
+    """
+
+    def __init__(
+        self,
+        bounds: LSMBounds,
+        system: System,
+        transition_cost: Optional[CompactionTransitionCost] = None,
+        policies: Optional[List[Policy]] = None,
+    ) -> None:
+        self.bounds = bounds
+        self.system = system
+        self.transition_cost = (
+            CompactionTransitionCost() if transition_cost is None else transition_cost
+        )
+        self.solver = ClassicSolver(bounds, policies=policies)
+        self.costfunc = Cost(bounds.max_considered_levels)
+
+    def _solve(self, workload: Workload) -> LSMDesign:
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", category=RuntimeWarning)
+            design, _ = self.solver.get_nominal_design(self.system, workload)
+
+        return design
+
+    def candidates(
+        self,
+        workloads: Sequence[Workload],
+        durations: np.ndarray,
+        num_random: int = 0,
+        seed: int = 0,
+    ) -> Tuple[List[LSMDesign], LSMDesign]:
+        # Periods repeat (daily/weekly phases), so solve each mix only once
+        solved = {}
+        for workload in workloads:
+            if workload not in solved:
+                solved[workload] = self._solve(workload)
+        designs = [solved[workload] for workload in workloads]
+        # Cost is linear in the workload, so the best static design is the
+        # optimum for the duration weighted mean workload
+        mix = np.array([[wl.z0, wl.z1, wl.q, wl.w] for wl in workloads])
+        mix = (durations[:, None] * mix).sum(axis=0) / durations.sum()
+        static = self._solve(Workload(*mix.tolist()))
+        designs.append(static)
+        gen = ClassicGen(self.bounds, seed=seed)
+        designs += [gen.sample_design(self.system) for _ in range(num_random)]
+
+        return designs, static
+
+    def plan(
+        self,
+        periods: Sequence[Tuple[Workload, float]],
+        initial_design: Optional[LSMDesign] = None,
+        extra_candidates: Sequence[LSMDesign] = (),
+        num_random: int = 0,
+        seed: int = 0,
+    ) -> DesignSchedule:
+        assert len(periods) > 0
+        workloads = [workload for workload, _ in periods]
+        durations = np.array([duration for _, duration in periods], dtype=np.float64)
+        designs, static = self.candidates(workloads, durations, num_random, seed)
+        designs += list(extra_candidates)
+        if initial_design is not None:
+            designs.append(initial_design)
+        num_periods = len(periods)
+
+        mix = np.array([[wl.z0, wl.z1, wl.q, wl.w] for wl in workloads])
+        op_costs = self.costfunc.calc_op_costs(designs, self.system)
+        period_cost = durations[:, None] * (mix @ op_costs.T)  # [periods, designs]
+        transitions = self.transition_cost.matrix(designs, self.system)
+        if initial_design is not None:
+            start = transitions[-1]
+        else:
+            start = np.zeros(len(designs))
+
+        best = start + period_cost[0]
+        parents = np.zeros((num_periods, len(designs)), dtype=np.int64)
+        for p in range(1, num_periods):
+            total = best[:, None] + transitions
+            parents[p] = np.argmin(total, axis=0)
+            best = total[parents[p], np.arange(len(designs))] + period_cost[p]
+
+        choice = [int(np.argmin(best))]
+        for p in range(num_periods - 1, 0, -1):
+            choice.append(int(parents[p, choice[-1]]))
+        choice.reverse()
+
+        def schedule_cost(indices: List[int]) -> Tuple[float, float]:
+            ops = float(sum(period_cost[p, c] for p, c in enumerate(indices)))
+            moves = float(start[indices[0]])
+            moves += sum(transitions[a, b] for a, b in zip(indices, indices[1:]))
+            return ops, float(moves)
+
+        operation_cost, transition_cost = schedule_cost(choice)
+        per_period = sum(schedule_cost(list(range(num_periods))))
+        static_cost = sum(schedule_cost([num_periods] * num_periods))
+
+        return DesignSchedule(
+            designs=[designs[c] for c in choice],
+            operation_cost=operation_cost,
+            transition_cost=transition_cost,
+            per_period_cost=per_period,
+            static_cost=static_cost,
+            static_design=static,
+        )
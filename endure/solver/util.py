@@ -76,6 +76,20 @@ def get_bounds(
 
     return SciOpt.Bounds(lb=lb, ub=ub, keep_feasible=True)  # type: ignore
 
+def random_robust_starts(
+    bounds: LSMBounds, num_starts: int, rng: np.random.Generator
+) -> np.ndarray:
+    # (h, T, lambda, eta) starts drawn as trials.util.get_best_robust_tuning
+    # draws them. The default duals often leave SLSQP with incompatible
+    # linearized constraints, random ones rarely do
+    h = rng.integers(*bounds.bits_per_elem_range, size=num_starts)
+    T = rng.uniform(*bounds.size_ratio_range, size=num_starts)
+    lamb = rng.uniform(0, 10, size=num_starts)
+    eta = rng.uniform(0, 10, size=num_starts)
+
+    return np.stack((h, T, lamb, eta), axis=1).astype(np.float64)
+
+
 def get_default_decision_vars(policy: Policy, max_levels: int) -> np.ndarray:
     out = [H_DEFAULT, T_DEFAULT]
     if policy == Policy.Kapacity:
@@ -0,0 +1,112 @@
+from typing import Sequence, Tuple, Union
+
+import numpy as np
+
+from endure.lsm.cost import Cost
+from endure.lsm.types import LSMBounds, LSMDesign, System, Workload
+
+BISECTION_STEPS = 64
+
+
+class WorstCaseOracle:
+    """Adversarial workload inside the KL ball around an expected workload.
+
+    For fixed op costs c and expected workload p, the maximizer of q @ c
+    subject to KL(q || p) <= rho is the exponential tilting
+    q ~ p * exp(c / tau), with the temperature tau chosen so that the KL
+    constraint is tight. tau is found by a vectorized bisection in log space.
+    """
+
+    def __init__(self, bounds: LSMBounds):
+        self.bounds = bounds
+        self.costfunc = Cost(bounds.max_considered_levels)
+
+    @staticmethod
+    def _tilted(
+        costs: np.ndarray,
+        workloads: np.ndarray,
+        c_max: np.ndarray,
+        log_tau: np.ndarray,
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        # Shift by the max cost so the exponentials never overflow
+        shifted = (costs - c_max) / np.exp(log_tau)[..., np.newaxis]
+        weights = workloads * np.exp(shifted)
+        norm = weights.sum(axis=-1, keepdims=True)
+        tilted = weights / norm
+        kl = np.sum(tilted * shifted, axis=-1) - np.log(norm[..., 0])
+
+        return tilted, kl
+
+    def tilt(
+        self,
+        costs: np.ndarray,
+        workloads: np.ndarray,
+        rhos: Union[float, np.ndarray],
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        costs = np.asarray(costs, dtype=np.float64)
+        workloads = np.asarray(workloads, dtype=np.float64)
+        rhos = np.asarray(rhos, dtype=np.float64)
+        shape = np.broadcast_shapes(
+            costs.shape[:-1], workloads.shape[:-1], rhos.shape
+        )
+        costs = np.broadcast_to(costs, shape + (4,))
+        workloads = np.broadcast_to(workloads, shape + (4,))
+        workloads = workloads / workloads.sum(axis=-1, keepdims=True)
+        rhos = np.broadcast_to(rhos, shape)
+
+        # Only operations present in the expected workload can be tilted toward
+        support = workloads > 0
+        c_max = np.where(support, costs, -np.inf).max(axis=-1, keepdims=True)
+        c_min = np.where(support, costs, np.inf).min(axis=-1, keepdims=True)
+        spread = (c_max - c_min)[..., 0]
+        tilting = np.where(support, costs, c_max)
+        argmax = support & (costs >= c_max)
+        kl_max = -np.log(np.sum(np.where(argmax, workloads, 0), axis=-1))
+
+        # KL(q_tau || p) decreases monotonically in tau
+        scale = np.where(spread > 0, spread, 1.0)
+        lo = np.log(scale) - 14 * np.log(10)
+        hi = np.log(scale) + 14 * np.log(10)
+        for _ in range(BISECTION_STEPS):
+            mid = (lo + hi) / 2
+            _, kl = self._tilted(tilting, workloads, c_max, mid)
+            too_far = kl > rhos
+            lo = np.where(too_far, mid, lo)
+            hi = np.where(too_far, hi, mid)
+        worst, _ = self._tilted(tilting, workloads, c_max, hi)
+
+        concentrated = np.where(argmax, workloads, 0)
+        concentrated = concentrated / concentrated.sum(axis=-1, keepdims=True)
+        saturated = (rhos >= kl_max)[..., np.newaxis]
+        untilted = ((rhos <= 0) | (spread <= 0))[..., np.newaxis]
+        worst = np.where(saturated, concentrated, worst)
+        worst = np.where(untilted, workloads, worst)
+
+        return worst, np.sum(worst * costs, axis=-1)
+
+    def get_worst_case(
+        self,
+        designs: Sequence[LSMDesign],
+        system: System,
+        workloads: Union[Workload, Sequence[Workload]],
+        rhos: Union[float, np.ndarray],
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        costs = self.costfunc.calc_op_costs(designs, system)
+        if isinstance(workloads, Workload):
+            workloads = [workloads]
+        expected = np.array([[wl.z0, wl.z1, wl.q, wl.w] for wl in workloads])
+        if len(expected) == 1:
+            expected = expected[0]
+
+        return self.tilt(costs, expected, rhos)
+
+    def get_worst_workload(
+        self,
+        design: LSMDesign,
+        system: System,
+        workload: Workload,
+        rho: float,
+    ) -> Tuple[Workload, float]:
+        worst, cost = self.get_worst_case([design], system, workload, rho)
+
+        return Workload(*worst[0].tolist()), float(cost[0])
@@ -0,0 +1,22 @@
+from typing import Sequence
+
+import numpy as np
+
+from .dataset import encode_design, encode_features, generate_design_pairs
+from .mlp import MLPRegressor
+from .surrogate_solver import SurrogateSolver
+
+
+def train_surrogate(
+    features: np.ndarray,
+    targets: np.ndarray,
+    hidden: Sequence[int] = (64, 64),
+    epochs: int = 200,
+    seed: int = 0,
+    **fit_kwargs,
+) -> MLPRegressor:
+    layers = (features.shape[1], *hidden, targets.shape[1])
+    model = MLPRegressor(layers, seed=seed)
+    model.fit(features, targets, epochs=epochs, seed=seed, **fit_kwargs)
+
+    return model
@@ -0,0 +1,51 @@
+"""
+    Generates (system, workload, rho) -> design pairs, trains the surrogate
+    and writes it to a .npz file that SurrogateSolver can load
+
+    python -m endure.surrogate --samples 5000 --out surrogate.npz
+"""
+
+import argparse
+import os
+import time
+
+import numpy as np
+
+from endure.lsm import LSMBounds
+from . import generate_design_pairs, train_surrogate
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Train the surrogate LSM tuner")
+    parser.add_argument("--samples", type=int, default=5000)
+    parser.add_argument("--epochs", type=int, default=200)
+    parser.add_argument("--hidden", type=int, nargs="+", default=[64, 64])
+    parser.add_argument("--rho-max", type=float, default=2.0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--data", type=str, default=None, help="cache for pairs")
+    parser.add_argument("--out", type=str, default="surrogate.npz")
+    args = parser.parse_args()
+
+    bounds = LSMBounds()
+    start_time = time.time()
+    if args.data is not None and os.path.exists(args.data):
+        with np.load(args.data) as data:
+            features, targets = data["features"], data["targets"]
+    else:
+        features, targets = generate_design_pairs(
+            bounds, args.samples, rho_range=(0.0, args.rho_max), seed=args.seed
+        )
+        if args.data is not None:
+            np.savez(args.data, features=features, targets=targets)
+    print(f"{len(features)} pairs: {time.time() - start_time:.4f} seconds")
+
+    start_time = time.time()
+    model = train_surrogate(
+        features, targets, hidden=args.hidden, epochs=args.epochs, seed=args.seed
+    )
+    model.save(args.out)
+    print(f"training: {time.time() - start_time:.4f} seconds")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+from typing import Optional, Tuple
+import warnings
+
+import numpy as np
+
+from endure.lsm import ClassicGen, LSMBounds
+from endure.lsm.types import LSMDesign, Policy, System, Workload
+from endure.solver import ClassicSolver
+
+NUM_FEATURES = 11
+NUM_TARGETS = 3
+
+
+def encode_features(system: System, workload: Workload, rho: float) -> np.ndarray:
+    return np.array(
+        [
+            np.log(system.entry_size),
+            np.log(system.selectivity),
+            system.entries_per_page,
+            np.log(system.num_entries),
+            system.mem_budget,
+            system.phi,
+            workload.z0,
+            workload.z1,
+            workload.q,
+            workload.w,
+            rho,
+        ],
+        dtype=np.float64,
+    )
+
+
+def encode_design(design: LSMDesign) -> np.ndarray:
+    # Policy is regressed as a leveling indicator, thresholded at 0.5
+    leveling = 1.0 if design.policy == Policy.Leveling else 0.0
+    return np.array([design.bits_per_elem, design.size_ratio, leveling])
+
+
+def generate_design_pairs(
+    bounds: LSMBounds,
+    num_samples: int,
+    rho_range: Tuple[float, float] = (0.0, 2.0),
+    nominal_fraction: float = 0.25,
+    seed: int = 0,
+    solver: Optional[ClassicSolver] = None,
+    robust_starts: int = 4,
+    max_attempts: Optional[int] = None,
+) -> Tuple[np.ndarray, np.ndarray]:
+    gen = ClassicGen(bounds, seed=seed)
+    rng = np.random.default_rng(seed=seed)
+    if solver is None:
+        solver = ClassicSolver(bounds)
+    if max_attempts is None:
+        max_attempts = 10 * num_samples
+
+    features, targets = [], []
+    attempts = 0
+    while len(features) < num_samples:
+        if attempts == max_attempts:
+            raise RuntimeError(
+                f"only {len(features)} of {num_samples} solves succeeded "
+                f"in {max_attempts} attempts"
+            )
+        attempts += 1
+        system = gen.sample_system()
+        workload = gen.sample_workload()
+        if rng.random() < nominal_fraction:
+            rho = 0.0
+        else:
+            rho = rng.uniform(*rho_range)
+
+        with warnings.catch_warnings(record=True) as caught_warnings:
+            warnings.simplefilter("always", category=RuntimeWarning)
+            if rho == 0.0:
+                design, sol = solver.get_nominal_design(system, workload)
+            else:
+                design, sol = solver.get_robust_design_multistart(
+                    system, workload, rho, num_starts=robust_starts, rng=rng
+                )
+        # Discard solves that overflowed or did not converge
+        if not sol.success or any(
+            "overflow" in str(w.message).lower() for w in caught_warnings
+        ):
+            continue
+        features.append(encode_features(system, workload, rho))
+        targets.append(encode_design(design))
+
+    return np.stack(features), np.stack(targets)
@@ -0,0 +1,144 @@
+from typing import List, Sequence
+
+import numpy as np
+
+
+class MLPRegressor:
+    """Small fully connected tanh network stored entirely as NumPy arrays."""
+
+    def __init__(self, layers: Sequence[int], seed: int = 0) -> None:
+        assert len(layers) >= 2
+        self.layers = tuple(int(n) for n in layers)
+        rng = np.random.default_rng(seed=seed)
+        self.weights: List[np.ndarray] = []
+        self.biases: List[np.ndarray] = []
+        for fan_in, fan_out in zip(self.layers, self.layers[1:]):
+            scale = np.sqrt(1.0 / fan_in)
+            self.weights.append(rng.normal(0.0, scale, size=(fan_in, fan_out)))
+            self.biases.append(np.zeros(fan_out))
+        self.x_mean = np.zeros(self.layers[0])
+        self.x_std = np.ones(self.layers[0])
+        self.x_min = np.full(self.layers[0], -np.inf)
+        self.x_max = np.full(self.layers[0], np.inf)
+        self.y_mean = np.zeros(self.layers[-1])
+        self.y_std = np.ones(self.layers[-1])
+
+    def _forward(self, X: np.ndarray) -> List[np.ndarray]:
+        activations = [X]
+        for idx, (W, b) in enumerate(zip(self.weights, self.biases)):
+            out = activations[-1] @ W + b
+            if idx < len(self.weights) - 1:
+                out = np.tanh(out)
+            activations.append(out)
+
+        return activations
+
+    def predict(self, X: np.ndarray) -> np.ndarray:
+        X = np.atleast_2d(np.asarray(X, dtype=np.float64))
+        out = (X - self.x_mean) / self.x_std
+        for W, b in zip(self.weights[:-1], self.biases[:-1]):
+            out = np.tanh(out @ W + b)
+        out = out @ self.weights[-1] + self.biases[-1]
+
+        return out * self.y_std + self.y_mean
+
+    def in_domain(self, X: np.ndarray, tolerance: float = 0.05) -> np.ndarray:
+        X = np.atleast_2d(np.asarray(X, dtype=np.float64))
+        slack = tolerance * (self.x_max - self.x_min)
+        lower = X >= (self.x_min - slack)
+        upper = X <= (self.x_max + slack)
+
+        return np.all(lower & upper, axis=1)
+
+    def fit(
+        self,
+        X: np.ndarray,
+        Y: np.ndarray,
+        epochs: int = 200,
+        batch_size: int = 256,
+        lr: float = 1e-3,
+        weight_decay: float = 0.0,
+        seed: int = 0,
+        verbose: bool = False,
+    ) -> List[float]:
+        X = np.asarray(X, dtype=np.float64)
+        Y = np.asarray(Y, dtype=np.float64)
+        assert X.shape[0] == Y.shape[0]
+        self.x_mean, self.x_std = X.mean(axis=0), X.std(axis=0) + 1e-8
+        self.x_min, self.x_max = X.min(axis=0), X.max(axis=0)
+        self.y_mean, self.y_std = Y.mean(axis=0), Y.std(axis=0) + 1e-8
+        Xn = (X - self.x_mean) / self.x_std
+        Yn = (Y - self.y_mean) / self.y_std
+
+        # Adam state
+        params = self.weights + self.biases
+        m = [np.zeros_like(p) for p in params]
+        v = [np.zeros_like(p) for p in params]
+        beta1, beta2, eps = 0.9, 0.999, 1e-8
+        step = 0
+
+        rng = np.random.default_rng(seed=seed)
+        history = []
+        for epoch in range(epochs):
+            order = rng.permutation(Xn.shape[0])
+            epoch_loss = 0.0
+            for start in range(0, Xn.shape[0], batch_size):
+                idx = order[start : start + batch_size]
+                grads_w, grads_b, loss = self._backward(Xn[idx], Yn[idx])
+                epoch_loss += loss * len(idx)
+                step += 1
+                grads = grads_w + grads_b
+                for i, (p, g) in enumerate(zip(params, grads)):
+                    if weight_decay > 0 and i < len(self.weights):
+                        g = g + weight_decay * p
+                    m[i] = beta1 * m[i] + (1 - beta1) * g
+                    v[i] = beta2 * v[i] + (1 - beta2) * g**2
+                    m_hat = m[i] / (1 - beta1**step)
+                    v_hat = v[i] / (1 - beta2**step)
+                    p -= lr * m_hat / (np.sqrt(v_hat) + eps)
+            history.append(epoch_loss / Xn.shape[0])
+            if verbose:
+                print(f"epoch {epoch}: loss {history[-1]:.6f}")
+
+        return history
+
+    def _backward(self, X: np.ndarray, Y: np.ndarray):
+        activations = self._forward(X)
+        diff = activations[-1] - Y
+        loss = float(np.mean(np.sum(diff**2, axis=1)))
+        delta = 2 * diff / X.shape[0]
+        grads_w: List[np.ndarray] = [np.empty(0)] * len(self.weights)
+        grads_b: List[np.ndarray] = [np.empty(0)] * len(self.biases)
+        for idx in range(len(self.weights) - 1, -1, -1):
+            grads_w[idx] = activations[idx].T @ delta
+            grads_b[idx] = delta.sum(axis=0)
+            if idx > 0:
+                delta = (delta @ self.weights[idx].T) * (1 - activations[idx] ** 2)
+
+        return grads_w, grads_b, loss
+
+    def save(self, path: str) -> None:
+        arrays = {
+            "layers": np.array(self.layers),
+            "x_mean": self.x_mean,
+            "x_std": self.x_std,
+            "x_min": self.x_min,
+            "x_max": self.x_max,
+            "y_mean": self.y_mean,
+            "y_std": self.y_std,
+        }
+        for idx, (W, b) in enumerate(zip(self.weights, self.biases)):
+            arrays[f"W{idx}"] = W
+            arrays[f"b{idx}"] = b
+        np.savez(path, **arrays)
+
+    @classmethod
+    def load(cls, path: str) -> "MLPRegressor":
+        with np.load(path) as data:
+            model = cls(data["layers"].tolist())
+            for name in ("x_mean", "x_std", "x_min", "x_max", "y_mean", "y_std"):
+                setattr(model, name, data[name])
+            model.weights = [data[f"W{i}"] for i in range(len(model.layers) - 1)]
+            model.biases = [data[f"b{i}"] for i in range(len(model.layers) - 1)]
+
+        return model
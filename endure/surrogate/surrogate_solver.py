@@ -0,0 +1,209 @@
+from typing import Callable, List, Optional, Tuple
+
+import numpy as np
+import scipy.optimize as SciOpt
+
+from endure.lsm.cost import Cost
+from endure.lsm.types import LSMBounds, LSMDesign, Policy, System, Workload
+from endure.solver import ClassicSolver
+from endure.solver.util import (
+    get_h_bounds,
+    get_lambda_bounds,
+    get_t_bounds,
+    random_robust_starts,
+)
+from .dataset import encode_features
+from .mlp import MLPRegressor
+
+
+class SurrogateSolver:
+    """Drop-in replacement for ClassicSolver backed by a trained MLPRegressor.
+
+    Predictions are returned directly unless they look unreliable (features
+    outside the training domain or an ambiguous policy), in which case a short
+    SLSQP solve is warm-started from the prediction. Robust results carry the
+    full (h, T, lambda, eta) and the robust objective, as ClassicSolver's do.
+    A fallback that fails returns the prediction with success=False.
+    """
+
+    def __init__(
+        self,
+        bounds: LSMBounds,
+        model: MLPRegressor,
+        policies: Optional[List[Policy]] = None,
+        confidence_margin: float = 0.1,
+        domain_tolerance: float = 0.05,
+        fallback_maxiter: int = 50,
+        fallback_starts: int = 4,
+        seed: Optional[int] = None,
+    ):
+        self.bounds = bounds
+        self.model = model
+        self.costfunc = Cost(bounds.max_considered_levels)
+        if policies is None:
+            policies = [Policy.Tiering, Policy.Leveling]
+        self.policies = policies
+        self.fallback = ClassicSolver(bounds, policies=policies)
+        self.confidence_margin = confidence_margin
+        self.domain_tolerance = domain_tolerance
+        self.fallback_maxiter = fallback_maxiter
+        self.fallback_starts = fallback_starts
+        self.rng = np.random.default_rng(seed)
+
+    def predict_batch(
+        self, features: np.ndarray
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        pred = self.model.predict(features)
+        h, T, leveling = pred[:, 0], pred[:, 1], pred[:, 2]
+        t_lb, t_ub = get_t_bounds(self.bounds)
+        T = np.clip(T, t_lb, t_ub - 1)
+        ambiguous = np.abs(leveling - 0.5) < self.confidence_margin
+        reliable = self.model.in_domain(features, self.domain_tolerance) & ~ambiguous
+
+        return h, T, leveling >= 0.5, reliable
+
+    def predict(
+        self, system: System, workload: Workload, rho: float = 0.0
+    ) -> Tuple[LSMDesign, bool]:
+        features = encode_features(system, workload, rho)[np.newaxis, :]
+        h, T, leveling, reliable = self.predict_batch(features)
+        h_lb, h_ub = get_h_bounds(self.bounds, system)
+        policy = Policy.Leveling if leveling[0] else Policy.Tiering
+        if policy not in self.policies:
+            policy = self.policies[0]
+            reliable[0] = False
+        design = LSMDesign(
+            bits_per_elem=float(np.clip(h[0], h_lb, h_ub)),
+            size_ratio=float(T[0]),
+            policy=policy,
+            kapacity=(),
+        )
+
+        return design, bool(reliable[0])
+
+    def _fallback_kwargs(self, minimizer_kwargs: dict) -> dict:
+        kwargs = {
+            "options": {"ftol": 1e-6, "disp": False, "maxiter": self.fallback_maxiter}
+        }
+        kwargs.update(minimizer_kwargs)
+
+        return kwargs
+
+    def robust_duals(
+        self, design: LSMDesign, system: System, workload: Workload, rho: float
+    ) -> Tuple[float, float, float]:
+        # Optimal (lambda, eta) of the robust objective for a fixed design, and
+        # the objective there. eta has a closed form given lambda, which leaves
+        # a scalar minimization over log lambda
+        costs = np.array(
+            [
+                self.costfunc.Z0(design, system),
+                self.costfunc.Z1(design, system),
+                self.costfunc.Q(design, system),
+                self.costfunc.W(design, system),
+            ]
+        )
+        p = workload.to_vector()
+        c_max = costs[p > 0].max()
+
+        def eta(lamb: float) -> float:
+            return c_max + lamb * np.log(np.sum(p * np.exp((costs - c_max) / lamb)))
+
+        lamb_lb = get_lambda_bounds()[0]
+        sol = SciOpt.minimize_scalar(
+            lambda log_lamb: rho * np.exp(log_lamb) + eta(np.exp(log_lamb)),
+            bounds=(np.log(lamb_lb), np.log(max(1e3 * c_max, 1.0))),
+            method="bounded",
+        )
+        lamb = float(np.exp(sol.x))
+
+        return lamb, float(eta(lamb)), float(sol.fun)
+
+    def _surrogate_result(
+        self,
+        design: LSMDesign,
+        fun: float,
+        duals: Tuple[float, ...] = (),
+        success: bool = True,
+        message: str = "Surrogate prediction",
+    ) -> SciOpt.OptimizeResult:
+        return SciOpt.OptimizeResult(
+            x=np.array([design.bits_per_elem, design.size_ratio, *duals]),
+            fun=fun,
+            success=success,
+            nit=0,
+            message=message,
+        )
+
+    def get_nominal_design(
+        self,
+        system: System,
+        workload: Workload,
+        init_args: Optional[np.ndarray] = None,
+        minimizer_kwargs: dict = {},
+        callback_fn: Optional[Callable] = None,
+    ) -> Tuple[LSMDesign, SciOpt.OptimizeResult]:
+        design, reliable = self.predict(system, workload, rho=0.0)
+        if reliable:
+            cost = self.costfunc.calc_cost(design, system, workload)
+            return design, self._surrogate_result(design, cost)
+
+        if init_args is None:
+            init_args = np.array([design.bits_per_elem, design.size_ratio])
+
+        refined, solution = self.fallback.get_nominal_design(
+            system,
+            workload,
+            init_args=init_args,
+            minimizer_kwargs=self._fallback_kwargs(minimizer_kwargs),
+            callback_fn=callback_fn,
+        )
+        if solution.success:
+            return refined, solution
+
+        cost = self.costfunc.calc_cost(design, system, workload)
+        return design, self._surrogate_result(
+            design,
+            cost,
+            success=False,
+            message=f"Fallback solve failed: {solution.message}",
+        )
+
+    def get_robust_design(
+        self,
+        system: System,
+        workload: Workload,
+        rho: float,
+        init_args: Optional[np.ndarray] = None,
+        minimizer_kwargs: dict = {},
+        callback_fn: Optional[Callable] = None,
+    ) -> Tuple[LSMDesign, SciOpt.OptimizeResult]:
+        design, reliable = self.predict(system, workload, rho=rho)
+        lamb, eta, fun = self.robust_duals(design, system, workload, rho)
+        if reliable:
+            return design, self._surrogate_result(design, fun, (lamb, eta))
+
+        # Warm start from the prediction and its optimal duals, plus random starts
+        starts = random_robust_starts(self.bounds, self.fallback_starts, self.rng)
+        starts[:, :2] = design.bits_per_elem, design.size_ratio
+        if init_args is None:
+            init_args = np.array([design.bits_per_elem, design.size_ratio, lamb, eta])
+        starts = np.vstack((init_args, starts))
+        refined, solution = self.fallback.get_robust_design_multistart(
+            system,
+            workload,
+            rho,
+            starts=starts,
+            minimizer_kwargs=self._fallback_kwargs(minimizer_kwargs),
+            callback_fn=callback_fn,
+        )
+        if solution.success:
+            return refined, solution
+
+        return design, self._surrogate_result(
+            design,
+            fun,
+            (lamb, eta),
+            success=False,
+            message=f"Fallback solve failed: {solution.message}",
+        )
@@ -3,6 +3,8 @@
 """
 
 import pandas as pd
+import glob
+import os
 import re
 import matplotlib.pyplot as plt
 import numpy as np
@@ -12,11 +14,34 @@ from matplotlib.colors import Normalize
 from mpl_toolkits.mplot3d.axes3d import Axes3D
 import matplotlib.ticker as mtick
 
+"""
+    Loads a result store directory (<output>/results/<name>-<digest>, see trials/store.py)
+    with workloads and designs as float columns (perturbed_z0, ..., true_w, robust_h, ...)
+"""
+def load_results(directory):
+    frames = []
+    for path in sorted(glob.glob(os.path.join(directory, "chunk-*"))):
+        if path.endswith(".parquet"):
+            frames.append(pd.read_parquet(path))
+        elif path.endswith(".npz"):
+            with np.load(path) as data:
+                frames.append(pd.DataFrame({key: data[key] for key in data.files}))
+    df = pd.concat(frames, ignore_index=True).drop_duplicates(subset=["item", "row"])
+    return df.sort_values(["item", "row"], ignore_index=True)
+
+"""
+    [n, 4] array of the (z0, z1, q, w) columns with the given prefix ("perturbed" or "true")
+"""
+def workload_columns(df, prefix):
+    return df[[f"{prefix}_z0", f"{prefix}_z1", f"{prefix}_q", f"{prefix}_w"]].to_numpy()
+
 """
     Converts a workload object string into a list and rearranges it into 
     (q, w, z0 + z1) 
 """
 def extract_probabilities(workload_str): 
+    if not isinstance(workload_str, str):
+        return list(workload_str)
     pattern = r"[-+]?\d*\.\d+(?:[eE][-+]?\d+)?"
     probs = [float(num) for num in re.findall(pattern, workload_str)]
     # (q, w, z0+z1)
@@ -39,9 +64,19 @@ def parse_workload_list(workload_list):
 
 """
     Useful function to extract workload information from a pandas df
+    filename: a results CSV, or a result store directory together with the workload index to use
 """
-def format_df_data(filename): 
-    df = pd.read_csv(filename)
+def format_df_data(filename, workload=0): 
+    if os.path.isdir(filename):
+        # result store: workloads as tuples instead of strings
+        df = load_results(filename)
+        df = df[df['workload'] == workload].reset_index(drop=True)
+        df['Epsilon'] = df['epsilon']
+        df['Workload (True)'] = [tuple(row) for row in workload_columns(df, 'true')]
+        df['Workload (Perturbed)'] = [tuple(row) for row in workload_columns(df, 'perturbed')]
+        filename = os.path.basename(os.path.normpath(filename)).rsplit('-', 1)[0]
+    else:
+        df = pd.read_csv(filename)
     name = filename.split('.')[0]
     name = name.replace('_', ' ')
     name = name.capitalize()
@@ -53,9 +88,9 @@ def format_df_data(filename):
     plots a scatter plot for the different workloads 
     adapted from Andy Huynh's plotting function
 """
-def plot_workload(filename, fig, ax, point_size=100, anchor=(0.2,0.0), show_gradient_map=True, font_size=12):
+def plot_workload(filename, fig, ax, point_size=100, anchor=(0.2,0.0), show_gradient_map=True, font_size=12, workload=0):
     
-    og_vals, workloads, name = format_df_data(filename)
+    og_vals, workloads, name = format_df_data(filename, workload)
     
     epsilon_values = sorted(workloads['Epsilon'].unique())
     ax.set_xlim3d(0, 1), ax.set_ylim3d(1, 0), ax.set_zlim3d(0, 1)
@@ -1,3 +1,4 @@
 from .rho_multiples import RhoMultiplesTrial
 from .stepwise_rho import StepwiseRhoTrial
-from .nominal_v_robust import NominalvRobustTrial
\ No newline at end of file
+from .nominal_v_robust import NominalvRobustTrial
+from .context import ExperimentContext
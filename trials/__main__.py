@@ -0,0 +1,100 @@
+"""
+    Runs experiment specs (see experiments/)
+
+    python -m trials run experiments/rho_multiples.toml                 # everything, here
+    python -m trials run experiments/rho_multiples.toml --shard 2/8     # node 2 of 8
+    python -m trials queue experiments/rho_multiples.toml               # create the work queue
+    python -m trials work experiments/rho_multiples.toml                # pull from it, on any host
+    python -m trials merge experiments/rho_multiples.toml               # shards/queue -> CSVs
+    python -m trials plan experiments/*.toml                            # all specs, shared work once (*_dag.csv)
+    python -m trials adapt experiments/errorbar.toml --target 0.01      # refine the grid where it matters
+    python -m trials run experiments/errorbar.toml --profile            # and print where the time went
+    python -m trials profile experiment_results/profile --histograms    # timings of earlier runs
+
+Results are appended to <output>/results as they finish; re-running a command
+skips the work items already there.
+"""
+
+import argparse
+
+from . import profiling
+from .adaptive import AdaptiveSweep
+from .distributed import init_queue, merge, parse_shard, run_shard, work_queue
+from .planner import ExperimentPlan, run_plan
+from .spec import load_spec, run_spec
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Run privacy-aware tuning experiments")
+    parser.add_argument("command", choices=["run", "queue", "work", "merge", "plan", "adapt", "profile"])
+    parser.add_argument("spec", type=str, nargs="+", help="one spec, several for plan, a directory for profile")
+    parser.add_argument("--shard", type=str, default=None, help="i/n: run every n-th work item from i")
+    parser.add_argument("--processes", type=int, default=None)
+    parser.add_argument("--db", type=str, default=None, help="queue database, <output>/results by default")
+    parser.add_argument("--lease", type=float, default=3600, help="seconds before a claimed item is reissued")
+    parser.add_argument("--cache", type=str, default="experiment_results/plan_cache.jsonl",
+                        help="finished plan nodes, lets an interrupted plan resume")
+    parser.add_argument("--dry-run", action="store_true", help="plan: only report the deduplication")
+    parser.add_argument("--target", type=float, default=0.01, help="adapt: relative CI half width of a cell's mean cost")
+    parser.add_argument("--refine", type=float, default=0.02, help="adapt: cost gap change that splits an interval")
+    parser.add_argument("--stride", type=int, default=4, help="adapt: spacing of the initial grid")
+    parser.add_argument("--min-trials", type=int, default=3)
+    parser.add_argument("--max-trials", type=int, default=None, help="adapt: defaults to the spec's numTrials")
+    parser.add_argument("--profile", type=str, nargs="?", const=profiling.DEFAULT_DIRECTORY, default=None,
+                        help=f"time each trial stage into this directory (also ${profiling.PROFILE_ENV})")
+    parser.add_argument("--histograms", action="store_true", help="profile: print per-stage histograms")
+    args = parser.parse_args()
+    if args.command == "profile":
+        print(profiling.report(args.spec[0], histograms=args.histograms))
+        return
+    if args.profile is not None:
+        profiling.enable(args.profile)
+    run_command(parser, args)
+    if profiling.enabled():
+        print(profiling.report())
+
+
+def run_command(parser:argparse.ArgumentParser, args:argparse.Namespace) -> None:
+    if args.command == "plan":
+        plan = ExperimentPlan([load_spec(path) for path in args.spec])
+        for op, (requested, unique) in plan.summary().items():
+            print(f"{op:>10}: {requested:>7} requested, {unique:>7} unique")
+        if not args.dry_run:
+            run_plan(plan.specs, processes=args.processes, cachePath=args.cache)
+        return
+    if len(args.spec) != 1:
+        parser.error(f"{args.command} takes one spec")
+    spec = load_spec(args.spec[0])
+
+    if args.command == "run" and args.shard is None:
+        for path in run_spec(spec, processes=args.processes):
+            print(f"wrote {path}")
+    elif args.command == "run":
+        index, count = parse_shard(args.shard)
+        done = run_shard(spec, index, count, processes=args.processes)
+        print(f"ran {done} work items into {spec.store_directory}")
+    elif args.command == "adapt":
+        sweep = AdaptiveSweep(spec, target=args.target, refineThreshold=args.refine, stride=args.stride,
+                              minTrials=args.min_trials, maxTrials=args.max_trials, processes=args.processes)
+        report = sweep.run()
+        for w, workloadType in enumerate(spec.workloadTypes):
+            print(f"{workloadType}: {len(report.epsilons[w])} epsilons, {len(report.rhos[w])} rhos")
+        print(report.summary())
+    elif args.command == "queue":
+        queue = init_queue(spec, args.db)
+        print(f"{queue.path}: {queue.counts()}")
+        queue.close()
+    elif args.command == "work":
+        done = work_queue(spec, args.db, processes=args.processes, lease=args.lease)
+        print(f"ran {done} work items")
+    else:
+        try:
+            paths = merge(spec, args.db)
+        except ValueError as error:
+            parser.error(str(error))
+        for path in paths:
+            print(f"wrote {path}")
+
+
+if __name__ == "__main__":
+    main()
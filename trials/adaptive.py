@@ -0,0 +1,244 @@
+"""
+    Adaptive experiment sweeps
+    Instead of every (epsilon, rho) point of a spec's grid with a fixed number of
+    trials, the sweep
+     - starts from a coarse subgrid (every stride-th epsilon and rho, plus the ends)
+       and bisects an interval only where the relative robust-vs-nominal cost gap
+       changes by more than refineThreshold across it
+     - repeats each cell until the confidence interval of its mean robust and
+       nominal cost is narrower than target (relative to the mean), with
+       minTrials..maxTrials trials
+    Cells are (workload, epsilon, rho) on the spec's grid. Trial t of a cell runs
+    the full sweep's work item with its seed and the cell's rho row seed, so it
+    sees the same perturbed workload, rho estimate and robust solver starts
+    whichever rows run with it.
+    A refinement round that adds rhos to an epsilon runs its items again for the
+    new rows only. Each item's trial (perturbed workload, rho estimate, nominal
+    designs) is kept from its first run and sent along, so it is computed once
+    however many times the item is dispatched. The report counts both next to
+    the tunings and the wall time.
+"""
+
+from dataclasses import dataclass, field
+from multiprocessing import Pool
+from typing import Dict, List, Optional, Set, Tuple
+import os
+import time
+
+import numpy as np
+from scipy import stats
+from tqdm import tqdm
+
+from .runner import WorkItem, csv_tables, run_item_trial, write_csv
+from .spec import ExperimentSpec
+from .store import ResultStore
+
+Cell = Tuple[int, int, int]  # workload, epsilon index, rho index
+
+
+"""
+    Half width of the confidence interval of the mean of values
+"""
+def ci_halfwidth(values:List[float], confidence:float=0.95) -> float:
+    if len(values) < 2:
+        return np.inf
+    return stats.t.ppf((1 + confidence) / 2, len(values) - 1) * np.std(values, ddof=1) / np.sqrt(len(values))
+
+
+def coarse_indices(size:int, stride:int) -> Set[int]:
+    return set(range(0, size, stride)) | {size - 1}
+
+
+@dataclass
+class AdaptiveReport:
+    """
+        What an adaptive sweep ran, against the full grid with maxTrials trials
+    """
+    rowsRun: int = 0
+    itemsRun: int = 0
+    dispatches: int = 0
+    fullRows: int = 0
+    fullItems: int = 0
+    rounds: int = 0
+    wallTime: float = 0.0
+    epsilons: Dict[int, List[float]] = field(default_factory=dict)
+    rhos: Dict[int, List[float]] = field(default_factory=dict)
+    trials: Dict[Cell, int] = field(default_factory=dict)
+
+    """
+        Share of the full sweep's robust tunings that were skipped
+    """
+    @property
+    def tuningsSaved(self) -> float:
+        return 1 - self.rowsRun / self.fullRows if self.fullRows else 0.0
+
+    def summary(self) -> str:
+        counts = list(self.trials.values())
+        return (f"{len(self.trials)} cells, {min(counts, default=0)}-{max(counts, default=0)} trials each, "
+                f"{self.rowsRun} of {self.fullRows} robust tunings ({self.tuningsSaved:.0%} fewer), "
+                f"{self.itemsRun} of {self.fullItems} items in {self.dispatches} dispatches, "
+                f"{self.rounds} rounds in {self.wallTime:.1f} s")
+
+
+class AdaptiveSweep:
+    """
+        Adaptive version of a spec's sweep
+         - spec: the full grid and settings; its numTrials is the default maxTrials
+         - target: CI half width of a cell's mean cost, relative to the mean
+         - refineThreshold: relative cost gap change that splits an interval
+         - stride: spacing of the initial epsilon and rho subgrid
+         - minTrials, maxTrials, batch: trials per cell before testing, cap, and added per round
+         - confidence: of the intervals
+         - processes: pool size, None for every core, 0 to run in this process
+    """
+    def __init__(self, spec:ExperimentSpec, target:float=0.01, refineThreshold:float=0.02, stride:int=4,
+                 minTrials:int=3, maxTrials:int=None, batch:int=2, confidence:float=0.95,
+                 processes:int=None) -> None:
+        self.spec = spec
+        self.config = spec.config
+        self.target = target
+        self.refineThreshold = refineThreshold
+        self.stride = stride
+        self.maxTrials = max(self.config.numTrials if maxTrials is None else maxTrials, 1)
+        self.minTrials = min(minTrials, self.maxTrials)
+        self.batch = batch
+        self.confidence = confidence
+        self.processes = processes
+        self.numEpsilons = len(self.config.epsilons)
+        self.numRhos = len(self.config.rhos)
+        self.cells: Dict[Cell, List[dict]] = {}
+        self.trials: Dict[int, object] = {}
+        self.pool: Optional[Pool] = None
+
+
+    def item(self, workload:int, trial:int, epsilon:int) -> WorkItem:
+        # Same index and seed as the full sweep with maxTrials trials
+        workloadType = self.spec.workloadTypes[workload]
+        return WorkItem(index=(workload * self.maxTrials + trial) * self.numEpsilons + epsilon,
+                        workloadIndex=workload, workloadName=str(workloadType), workload=workloadType.workload,
+                        trial=trial, epsilonIndex=epsilon, epsilon=float(self.config.epsilons[epsilon]))
+
+
+    def converged(self, cell:Cell) -> bool:
+        records = self.cells.get(cell, [])
+        for column in ("robust_cost", "nominal_cost"):
+            values = [record[column] for record in records]
+            if ci_halfwidth(values, self.confidence) > self.target * abs(np.mean(values)):
+                return False
+        return True
+
+
+    def gap(self, cell:Cell) -> float:
+        records = self.cells[cell]
+        return float(np.mean([(r["nominal_cost"] - r["robust_cost"]) / r["nominal_cost"] for r in records]))
+
+
+    """
+        Runs (item, rho indices) tasks on the sweep's pool and files their records under their cells.
+        An item that ran before gets its trial back, so only its new rows are computed
+    """
+    def run_tasks(self, tasks:List[Tuple[WorkItem, Tuple[int, ...]]], store:ResultStore, bar:tqdm) -> None:
+        jobs = [(self.config, item, rows, self.trials.get(item.index)) for item, rows in tasks]
+        if self.pool is not None:
+            results = self.pool.imap(run_item_trial, jobs, chunksize=1)
+        else:
+            results = map(run_item_trial, jobs)
+        for item, records, trial in results:
+            self.trials[item.index] = trial
+            for record in records:
+                self.cells.setdefault((item.workloadIndex, item.epsilonIndex, record["row"]), []).append(record)
+            store.append(records)
+            bar.update(1)
+
+
+    """
+        Bisects every interval of the active grid whose gap changes too much
+    """
+    def refine(self, epsilons:Dict[int, Set[int]], rhos:Dict[int, Set[int]]) -> bool:
+        grew = False
+        for workload in epsilons:
+            newEpsilons, newRhos = set(), set()
+            for r in rhos[workload]:
+                active = sorted(epsilons[workload])
+                for a, b in zip(active, active[1:]):
+                    if b - a > 1 and abs(self.gap((workload, a, r)) - self.gap((workload, b, r))) > self.refineThreshold:
+                        newEpsilons.add((a + b) // 2)
+            for e in epsilons[workload]:
+                active = sorted(rhos[workload])
+                for a, b in zip(active, active[1:]):
+                    if b - a > 1 and abs(self.gap((workload, e, a)) - self.gap((workload, e, b))) > self.refineThreshold:
+                        newRhos.add((a + b) // 2)
+            grew |= bool(newEpsilons - epsilons[workload]) or bool(newRhos - rhos[workload])
+            epsilons[workload] |= newEpsilons
+            rhos[workload] |= newRhos
+        return grew
+
+
+    """
+        Sequential stopping on the active grid, then refinement, until neither adds work
+    """
+    def sweep(self, workloads:range, epsilons:Dict[int, Set[int]], rhos:Dict[int, Set[int]], store:ResultStore,
+              bar:tqdm, report:AdaptiveReport) -> None:
+        while True:
+            # Sequential stopping on the current grid
+            while True:
+                needs: Dict[Tuple[int, int, int], List[int]] = {}
+                for w in workloads:
+                    for e in epsilons[w]:
+                        for r in rhos[w]:
+                            have = len(self.cells.get((w, e, r), []))
+                            want = self.minTrials if have < self.minTrials else have
+                            if have >= self.minTrials and not self.converged((w, e, r)):
+                                want = min(have + self.batch, self.maxTrials)
+                            for t in range(have, want):
+                                needs.setdefault((w, e, t), []).append(r)
+                if not needs:
+                    break
+                tasks = [(self.item(w, t, e), tuple(sorted(rs))) for (w, e, t), rs in sorted(needs.items())]
+                bar.total = (bar.total or 0) + len(tasks)
+                self.run_tasks(tasks, store, bar)
+                report.dispatches += len(tasks)
+                report.itemsRun = len(self.trials)
+                report.rowsRun += sum(len(rs) for _, rs in tasks)
+                report.rounds += 1
+            if not self.refine(epsilons, rhos):
+                break
+
+
+    """
+        Runs the sweep into <store>-adaptive and writes <workload><suffix>_adaptive.csv
+    """
+    def run(self, progress:bool=True) -> AdaptiveReport:
+        workloads = range(len(self.spec.workloadTypes))
+        epsilons = {w: coarse_indices(self.numEpsilons, self.stride) for w in workloads}
+        rhos = {w: coarse_indices(self.numRhos, self.stride) for w in workloads}
+        report = AdaptiveReport(fullRows=len(workloads) * self.numEpsilons * self.numRhos * self.maxTrials,
+                                fullItems=len(workloads) * self.numEpsilons * self.maxTrials)
+        store = ResultStore(self.spec.store_directory + "-adaptive", format=self.spec.format, tag="adaptive-")
+        for path in store.chunks():
+            os.remove(path)
+        bar = tqdm(disable=not progress, unit="item")
+        start = time.perf_counter()
+        self.pool = Pool(self.processes) if self.processes != 0 else None
+
+        try:
+            with store:
+                self.sweep(workloads, epsilons, rhos, store, bar, report)
+        finally:
+            if self.pool is not None:
+                self.pool.close()
+                self.pool.join()
+                self.pool = None
+        report.wallTime = time.perf_counter() - start
+        bar.close()
+
+        for w in workloads:
+            report.epsilons[w] = [self.config.epsilons[e] for e in sorted(epsilons[w])]
+            report.rhos[w] = [self.config.rhos[r] for r in sorted(rhos[w])]
+        report.trials = {cell: len(records) for cell, records in self.cells.items()}
+
+        os.makedirs(self.spec.output, exist_ok=True)
+        for workloadIndex, table in csv_tables(self.config.kind, store.load()).items():
+            write_csv(self.spec.output, str(self.spec.workloadTypes[workloadIndex]) + self.spec.suffix + "_adaptive",
+                      table)
+        return report
@@ -0,0 +1,116 @@
+"""
+    Shared experiment context
+    The trials used to rebuild LSMBounds, ClassicGen(seed=42), the System, the
+    solver and Cost on every run_trial, and to re-tune the same original workload
+    once per epsilon and trial. The context builds them once per process and
+    memoizes nominal designs per (system, workload, numTunings).
+"""
+
+from collections import OrderedDict
+from typing import Tuple
+import hashlib
+
+import numpy as np
+
+from endure.lsm import ClassicGen, Cost, LSMBounds, Workload
+from endure.lsm.types import LSMDesign, System
+from endure.solver import ClassicSolver
+from . import profiling
+from .util import get_best_nominal_tuning, get_best_robust_tuning
+
+
+class ExperimentContext:
+    """
+        Objects every trial shares
+         - bounds: LSMBounds, defaults to LSMBounds()
+         - systemSeed: ClassicGen seed of the experiment's System (42 in all trials)
+         - seed: root of the solver starts of memoized designs
+         - maxDesigns: memoized designs kept, least recently used ones are dropped
+        A memoized design gets its solver starts from a Generator seeded by its key,
+        so it is the same whichever trial (or process) computes it first.
+    """
+    _default = None
+
+    def __init__(self, bounds:LSMBounds=None, systemSeed:int=42, seed:int=0, maxDesigns:int=4096) -> None:
+        self.bounds = LSMBounds() if bounds is None else bounds
+        self.system = ClassicGen(self.bounds, seed=systemSeed).sample_system()
+        self.solver = ClassicSolver(self.bounds)
+        self.cost = Cost(self.bounds.max_considered_levels)
+        self.seed = seed
+        self.maxDesigns = maxDesigns
+        self.nominalDesigns: "OrderedDict[Tuple[System, Workload, int], LSMDesign]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+
+    """
+        The process-wide context the trials use when none is given
+    """
+    @classmethod
+    def default(cls) -> "ExperimentContext":
+        if cls._default is None:
+            cls._default = cls()
+        return cls._default
+
+
+    """
+        The default context pickles as a reference, so a trial sent to another
+        process uses that process's default (and its memoized designs), not a copy
+    """
+    def __reduce_ex__(self, protocol:int):
+        if self is ExperimentContext._default:
+            return (ExperimentContext.default, ())
+        return super().__reduce_ex__(protocol)
+
+
+    def key_rng(self, key:tuple) -> np.random.Generator:
+        digest = hashlib.sha1(repr(key).encode()).digest()
+        entropy = int.from_bytes(digest[:8], "little")
+        return np.random.default_rng(np.random.SeedSequence([self.seed, entropy]))
+
+
+    """
+        Best of numTunings nominal tunings for workload, computed once per key
+    """
+    def nominal_design(self, workload:Workload, numTunings:int, system:System=None) -> LSMDesign:
+        with profiling.stage("nominal_tuning"):
+            return self._nominal_design(workload, numTunings, system)
+
+
+    def _nominal_design(self, workload:Workload, numTunings:int, system:System) -> LSMDesign:
+        system = self.system if system is None else system
+        key = (system, workload, numTunings)
+        design = self.nominalDesigns.get(key)
+        if design is not None:
+            self.hits += 1
+            self.nominalDesigns.move_to_end(key)
+            return design
+
+        self.misses += 1
+        design = get_best_nominal_tuning(workload=workload, bounds=self.bounds, numTunings=numTunings,
+                                         solver=self.solver, system=system, costFunc=self.cost,
+                                         rng=self.key_rng(key))
+        self.nominalDesigns[key] = design
+        if len(self.nominalDesigns) > self.maxDesigns:
+            self.nominalDesigns.popitem(last=False)
+        return design
+
+
+    """
+        Best of numTunings robust tunings (not memoized, every rho differs)
+    """
+    def robust_design(self, workload:Workload, rho:float, numTunings:int, rhoMultiplier:float=1,
+                      rng:np.random.Generator=None, system:System=None) -> LSMDesign:
+        with profiling.stage("robust_tuning"):
+            return get_best_robust_tuning(workload=workload, rho=rho, rhoMultiplier=rhoMultiplier,
+                                          numTunings=numTunings, bounds=self.bounds, solver=self.solver,
+                                          system=self.system if system is None else system,
+                                          costFunc=self.cost, rng=rng)
+
+
+    """
+        Cost of design on workload under the context's System
+    """
+    def calc_cost(self, design:LSMDesign, workload:Workload, system:System=None) -> float:
+        with profiling.stage("evaluation"):
+            return self.cost.calc_cost(design, self.system if system is None else system, workload)
@@ -0,0 +1,203 @@
+"""
+    Running one experiment spec across processes and hosts
+     - static sharding: `--shard i/n` runs every n-th work item into the spec's
+       result store, with chunk names tagged by shard
+     - dynamic queue: a SQLite file that any number of workers claim items from,
+       with leases so items of a crashed worker are handed out again
+     - merge: moves queue results into the result store and writes the final CSVs
+    Store and queue paths carry the spec digest, so results of a changed spec are
+    never mixed in.
+"""
+
+from multiprocessing import Pool
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+import json
+import os
+import socket
+import sqlite3
+import time
+
+from tqdm import tqdm
+
+from . import profiling
+from .runner import ExperimentRunner, WorkItem, build_work_items, run_item
+from .spec import ExperimentSpec, export_spec
+from .store import ResultStore
+
+
+"""
+    "i/n" to (i, n)
+"""
+def parse_shard(text:str) -> Tuple[int, int]:
+    index, count = (int(part) for part in text.split("/"))
+    if not 0 <= index < count:
+        raise ValueError(f"shard must be i/n with 0 <= i < n, got {text}")
+    return index, count
+
+
+"""
+    Round robin, so every shard gets a similar mix of workloads and epsilons
+"""
+def shard_items(items:List[WorkItem], index:int, count:int) -> List[WorkItem]:
+    return [item for item in items if item.index % count == index]
+
+
+def queue_path(spec:ExperimentSpec) -> str:
+    return spec.store_directory + ".sqlite"
+
+
+"""
+    Runs shard i of n on a local process pool. Items already in the store are skipped
+"""
+def run_shard(spec:ExperimentSpec, index:int, count:int, processes:int=None) -> int:
+    items = shard_items(build_work_items(spec.config, spec.workloadTypes), index, count)
+    store = ResultStore(spec.store_directory, format=spec.format, tag=f"shard{index}of{count}-")
+    return ExperimentRunner(spec.config, spec.workloadTypes, processes=processes).run_to_store(store, items)
+
+
+class WorkQueue:
+    """
+        SQLite-backed queue of work item indices for one spec
+         - path: database file, on storage every worker can reach
+         - digest: spec digest, a queue built for a different spec raises ValueError
+         - timeout: seconds to wait for another worker's lock
+    """
+    PENDING, RUNNING, DONE = "pending", "running", "done"
+
+    def __init__(self, path:str, digest:str, timeout:float=60.0) -> None:
+        self.path = path
+        self.connection = sqlite3.connect(path, timeout=timeout, isolation_level=None)
+        self.connection.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+        self.connection.execute("CREATE TABLE IF NOT EXISTS items (idx INTEGER PRIMARY KEY, status TEXT, "
+                                "worker TEXT, leased REAL, result TEXT)")
+        self.connection.execute("INSERT OR IGNORE INTO meta VALUES ('digest', ?)", (digest,))
+        stored, = self.connection.execute("SELECT value FROM meta WHERE key = 'digest'").fetchone()
+        if stored != digest:
+            raise ValueError(f"{path} was built for spec {stored}, not {digest}")
+
+
+    def close(self) -> None:
+        self.connection.close()
+
+
+    """
+        Adds the items that are not queued yet, finished ones are kept
+    """
+    def populate(self, indices:Iterable[int]) -> None:
+        self.connection.executemany("INSERT OR IGNORE INTO items (idx, status) VALUES (?, ?)",
+                                    [(int(i), self.PENDING) for i in indices])
+
+
+    """
+        Leases the lowest pending item (or one whose lease ran out) to worker
+    """
+    def claim(self, worker:str, lease:float=3600) -> Optional[int]:
+        with profiling.stage("io"):
+            return self._claim(worker, lease)
+
+
+    def _claim(self, worker:str, lease:float) -> Optional[int]:
+        now = time.time()
+        self.connection.execute("BEGIN IMMEDIATE")
+        try:
+            row = self.connection.execute(
+                "SELECT idx FROM items WHERE status = ? OR (status = ? AND leased < ?) ORDER BY idx LIMIT 1",
+                (self.PENDING, self.RUNNING, now - lease)).fetchone()
+            if row is not None:
+                self.connection.execute("UPDATE items SET status = ?, worker = ?, leased = ? WHERE idx = ?",
+                                        (self.RUNNING, worker, now, row[0]))
+            self.connection.execute("COMMIT")
+        except BaseException:
+            self.connection.execute("ROLLBACK")
+            raise
+        return None if row is None else row[0]
+
+
+    def complete(self, index:int, records:List[dict]) -> None:
+        with profiling.stage("io"):
+            self.connection.execute("UPDATE items SET status = ?, result = ? WHERE idx = ?",
+                                    (self.DONE, json.dumps(records), index))
+
+
+    def counts(self) -> Dict[str, int]:
+        counts = {self.PENDING: 0, self.RUNNING: 0, self.DONE: 0}
+        counts.update(self.connection.execute("SELECT status, COUNT(*) FROM items GROUP BY status").fetchall())
+        return counts
+
+
+    def results(self) -> Iterator[Tuple[int, List[dict]]]:
+        for index, result in self.connection.execute(
+                "SELECT idx, result FROM items WHERE status = ? ORDER BY idx", (self.DONE,)):
+            yield index, json.loads(result)
+
+
+"""
+    Creates (or tops up) the queue for a spec, leaving out items already in the result store
+"""
+def init_queue(spec:ExperimentSpec, path:str=None) -> WorkQueue:
+    path = queue_path(spec) if path is None else path
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    done = ResultStore(spec.store_directory).completed()
+    queue = WorkQueue(path, spec.digest)
+    queue.populate(item.index for item in build_work_items(spec.config, spec.workloadTypes)
+                   if item.index not in done)
+    return queue
+
+
+"""
+    One worker process: claims, runs and completes items until the queue is drained
+"""
+def queue_worker(task:Tuple[ExperimentSpec, str, float]) -> int:
+    spec, path, lease = task
+    items = build_work_items(spec.config, spec.workloadTypes)
+    queue = WorkQueue(path, spec.digest)
+    worker = f"{socket.gethostname()}:{os.getpid()}"
+    done = 0
+    try:
+        while (index := queue.claim(worker, lease)) is not None:
+            _, records = run_item((spec.config, items[index]))
+            queue.complete(index, records)
+            done += 1
+    finally:
+        queue.close()
+    return done
+
+
+"""
+    Drains the queue with a local pool, showing progress over all hosts
+"""
+def work_queue(spec:ExperimentSpec, path:str=None, processes:int=None, lease:float=3600,
+               pollInterval:float=2.0) -> int:
+    path = queue_path(spec) if path is None else path
+    processes = processes or os.cpu_count()
+    monitor = WorkQueue(path, spec.digest)
+    total = sum(monitor.counts().values())
+    bar = tqdm(total=total, initial=monitor.counts()[WorkQueue.DONE], unit="item")
+    with Pool(processes) as pool:
+        result = pool.map_async(queue_worker, [(spec, path, lease)] * processes)
+        while not result.ready():
+            result.wait(pollInterval)
+            bar.update(monitor.counts()[WorkQueue.DONE] - bar.n)
+    bar.close()
+    monitor.close()
+    return sum(result.get())
+
+
+"""
+    Copies finished queue items into the result store, then writes the final CSVs.
+    Raises ValueError when work items are missing
+"""
+def merge(spec:ExperimentSpec, queuePath:str=None) -> List[str]:
+    store = ResultStore(spec.store_directory, format=spec.format, tag="merge-", flushItems=256)
+    path = queue_path(spec) if queuePath is None else queuePath
+    if os.path.exists(path):
+        done = store.completed()
+        queue = WorkQueue(path, spec.digest)
+        with store:
+            for index, records in queue.results():
+                if index not in done:
+                    store.append(records)
+        queue.close()
+    paths = export_spec(spec, store)
+    store.compact()
+    return paths
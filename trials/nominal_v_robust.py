@@ -3,15 +3,11 @@
 """
 
 from typing import Tuple, List
-from endure.lsm.types import LSMDesign
-from .util import get_perturbed_workload, get_KL_divergence, get_best_nominal_tuning, get_best_robust_tuning
-from endure.solver import ClassicSolver
-from endure.lsm import (
-    Cost,
-    LSMBounds,
-    ClassicGen,
-    Workload
-)
+from differential_privacy import RhoCalibrationTable, RhoEstimator
+from . import profiling
+from .context import ExperimentContext
+from .util import CommonNoise, get_perturbed_workload, get_perturbed_workloads, listToWorkload, workloadToList, get_KL_divergence
+from endure.lsm import Workload
 import numpy as np
 
 class NominalvRobustTrial: 
@@ -22,6 +18,12 @@ class NominalvRobustTrial:
          - noise scaler: used for Laplace mechanism (scales noise)
          - sensitivity: used for Laplace mechanism 
          - numWorkloads: number of workloads generated to calculated rhoExpected
+         - rhoStatistic: how rhoExpected summarizes the samples (max, mean, quantile, avg_workload)
+         - rhoTable: optional RhoCalibrationTable, interpolates rhoExpected instead of sampling
+         - commonNoise: optional CommonNoise shared across the epsilons of one trial index
+         - rng: optional numpy Generator for all noise and robust solver starts (global np.random otherwise)
+         - context: optional ExperimentContext with the shared System, solver, Cost and memoized
+           nominal designs (the process default otherwise)
          - epsilon: level of noise for Laplace mechanism 
          - perturbedWorkload: workload perturbed using the laplace mechanism 
          - rhoExpected: expected rho given to the robust tuner
@@ -29,82 +31,83 @@ class NominalvRobustTrial:
          - bestNominalDesign: best nominal design for the true workload
     """
     def __init__(self, originalWorkload: Workload, epsilon:float, workloadScaler:int, noiseScaler:int, 
-                 sensitivity:float=1, numWorkloads:int=10) -> None:
+                 sensitivity:float=1, numWorkloads:int=10, rhoStatistic:str="max", 
+                 rhoQuantile:float=0.95, rhoTable:RhoCalibrationTable=None, 
+                 commonNoise:CommonNoise=None, 
+                 rng:np.random.Generator=None, context:ExperimentContext=None) -> None:
         self.originalWorkload = originalWorkload
+        self.rng = rng
+        self.context = ExperimentContext.default() if context is None else context
         self.epsilon = epsilon
-        self.perturbedWorkload = get_perturbed_workload(originalWorkload=originalWorkload, sensitivity=sensitivity, 
-                                                epsilon=epsilon, noiseScaler=noiseScaler, workloadScaler=workloadScaler)
-        self.rhoExpected = self.get_expected_rho(originalWorkload=originalWorkload, sensitivity=sensitivity, 
-                                         epsilon=epsilon, noiseScaler=noiseScaler, workloadScaler=workloadScaler, 
-                                         numWorkloads=numWorkloads)
+        with profiling.stage("perturbation"):
+            self.perturbedWorkload = get_perturbed_workload(originalWorkload=originalWorkload, sensitivity=sensitivity, 
+                                                    epsilon=epsilon, noiseScaler=noiseScaler, workloadScaler=workloadScaler, 
+                                                    standardNoise=None if commonNoise is None else commonNoise.perturbNoise, 
+                                                    rng=rng)
+        with profiling.stage("rho_estimation"):
+            if rhoTable is not None:
+                if not rhoTable.matches(workloadScaler, noiseScaler, sensitivity, statistic=rhoStatistic,
+                                        quantile=rhoQuantile, numWorkloads=numWorkloads):
+                    raise ValueError("rhoTable was built for different Laplace mechanism parameters or rho settings")
+                self.rhoExpected = rhoTable.lookup(originalWorkload, epsilon)
+            else:
+                self.rhoExpected = self.get_expected_rho(originalWorkload=originalWorkload, sensitivity=sensitivity, 
+                                                 epsilon=epsilon, noiseScaler=noiseScaler, workloadScaler=workloadScaler, 
+                                                 numWorkloads=numWorkloads, statistic=rhoStatistic, 
+                                                 quantile=rhoQuantile, 
+                                                 standardNoise=None if commonNoise is None else commonNoise.rhoNoise, 
+                                                 rng=rng)
         self.rhoTrue = get_KL_divergence(originalWorkload, self.perturbedWorkload)
         self.bestNominalDesign = None
         self.nominalDesign = None
+        self.robustDesign = None
         
 
     """
         Runs one trial
         numTunings: the number of designs tried for nominal and robust solvers
+        rng: Generator of the robust solver starts, the trial's own by default
     """
-    def run_trial(self, rhoMultiplier:float, numTunings:int=10
+    def run_trial(self, rhoMultiplier:float, numTunings:int=10, rng:np.random.Generator=None
                   ) -> Tuple[float, float, float]: 
         
-        # initialize objects for Endure solvers
-        bounds = LSMBounds()
-        gen = ClassicGen(bounds, seed=42)
-        system = gen.sample_system()
-        solver = ClassicSolver(bounds)
-        costCalculator = Cost(bounds.max_considered_levels)
+        context = self.context
 
         # find ideal tuning & save it across multiple rho trials 
         if self.bestNominalDesign == None: 
-            self.bestNominalDesign = get_best_nominal_tuning(workload=self.originalWorkload, 
-                                                             bounds=bounds, numTunings=numTunings, 
-                                                             solver=solver, system=system, 
-                                                             costFunc=costCalculator)
+            self.bestNominalDesign = context.nominal_design(self.originalWorkload, numTunings)
         
-        idealNominalCost = costCalculator.calc_cost(self.bestNominalDesign, system, self.originalWorkload)
+        idealNominalCost = context.calc_cost(self.bestNominalDesign, self.originalWorkload)
 
         # find nominal tuning on perturbed workload
         if self.nominalDesign == None: 
-            self.nominalDesign = get_best_nominal_tuning(workload=self.perturbedWorkload, 
-                                                         bounds=bounds, numTunings=numTunings, 
-                                                         solver=solver, system=system, 
-                                                         costFunc=costCalculator)
+            self.nominalDesign = context.nominal_design(self.perturbedWorkload, numTunings)
         
-        nominalCost = costCalculator.calc_cost(self.nominalDesign, system, self.originalWorkload)
+        nominalCost = context.calc_cost(self.nominalDesign, self.originalWorkload)
 
         # find best robust tuning 
-        designRobust = get_best_robust_tuning(workload=self.perturbedWorkload, rho=self.rhoExpected, 
-                                              rhoMultiplier=rhoMultiplier, numTunings=numTunings, 
-                                              bounds=bounds, solver=solver, system=system, 
-                                              costFunc=costCalculator)
+        designRobust = context.robust_design(self.perturbedWorkload, rho=self.rhoExpected, numTunings=numTunings,
+                                             rhoMultiplier=rhoMultiplier, rng=self.rng if rng is None else rng)
+        self.robustDesign = designRobust
         # find the true cost of the robust tuning using the original workload
-        robustCost = costCalculator.calc_cost(designRobust, system, self.originalWorkload)
+        robustCost = context.calc_cost(designRobust, self.originalWorkload)
 
         return idealNominalCost, nominalCost, robustCost
      
 
     """
-        Finds the expected rho through a list of n workloads 
+        Finds the expected rho from n perturbed workloads, summarized by statistic
+        (see differential_privacy.rho_estimator)
     """
     def get_expected_rho(self, originalWorkload:Workload, sensitivity:int, 
-                         epsilon:float, noiseScaler:float, workloadScaler:int, numWorkloads:int
-                         ) -> float: 
+                         epsilon:float, noiseScaler:float, workloadScaler:int, numWorkloads:int, 
+                         statistic:str="max", quantile:float=0.95, 
+                         standardNoise:np.ndarray=None, rng:np.random.Generator=None) -> float: 
         
-        # generate a list of n different workloads 
-        perturbedWorkloadList = self.get_n_perturbed_workloads(originalWorkload, numWorkloads, 
-                                                               noiseScaler, sensitivity, epsilon, 
-                                                               workloadScaler)
-
-        # find max KL Divergence 
-        maxKLDivergence = -np.inf
-        for workload in perturbedWorkloadList:
-            d = get_KL_divergence(originalWorkload, workload)
-            if d > maxKLDivergence:
-                maxKLDivergence = d
-
-        return maxKLDivergence
+        estimator = RhoEstimator(workloadScaler=workloadScaler, noiseScaler=noiseScaler, 
+                                 sensitivity=sensitivity, numWorkloads=numWorkloads, 
+                                 statistic=statistic, quantile=quantile)
+        return estimator.estimate(workloadToList(originalWorkload), epsilon, rng=rng, standardNoise=standardNoise)
 
 
     """
@@ -114,10 +117,7 @@ class NominalvRobustTrial:
                                   noiseScaler:float, sensitivity:int, epsilon:float, workloadScaler:int
                                   ) -> List[Workload]: 
         
-        perturbedWorkloads = []
-        for i in range(numWorkloads): 
-            pWorkload = get_perturbed_workload(originalWorkload=originalWorkload, 
-                                               noiseScaler=noiseScaler, sensitivity=sensitivity, epsilon=epsilon, 
-                                               workloadScaler=workloadScaler)
-            perturbedWorkloads.append(pWorkload)
-        return perturbedWorkloads
\ No newline at end of file
+        perturbedWorkloads = get_perturbed_workloads(originalWorkload=originalWorkload, numWorkloads=numWorkloads, 
+                                                     noiseScaler=noiseScaler, sensitivity=sensitivity, epsilon=epsilon, 
+                                                     workloadScaler=workloadScaler)
+        return [listToWorkload(vector) for vector in perturbedWorkloads.tolist()]
\ No newline at end of file
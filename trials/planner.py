@@ -0,0 +1,344 @@
+"""
+    Experiment planner
+    Expands any number of experiment specs into one DAG of content-addressed
+    nodes (perturb, rho, nominal, robust, evaluate). A node's key hashes its
+    operation, parameters and input keys, and its randomness is drawn from a
+    Generator seeded by its content, so the same sub-problem requested by several
+    experiments (the ideal nominal design of a workload, a perturbed workload and
+    its robust tunings at a shared rho multiple, ...) is one node, run once, and
+    its result fans out to every experiment's records.
+    Finished nodes can be kept in a JSONL cache, so an interrupted plan resumes.
+"""
+
+from collections import Counter
+from dataclasses import dataclass, replace
+from itertools import chain
+from multiprocessing import Pool
+from types import SimpleNamespace
+from typing import Dict, List, Optional, Sequence, Tuple
+import hashlib
+import json
+import os
+
+import numpy as np
+from tqdm import tqdm
+
+from differential_privacy import LaplaceMechanism, RhoEstimator
+from endure.lsm import Workload
+from endure.lsm.types import LSMDesign, Policy
+from . import profiling
+from .context import ExperimentContext
+from .runner import build_work_items, load_rho_table, make_record
+from .spec import ExperimentSpec, export_spec
+from .store import ResultStore
+from .util import get_best_nominal_tuning, get_best_robust_tuning, get_KL_divergence
+
+# Operations that are too cheap to ship to a worker process
+INLINE_OPS = ("evaluate",)
+
+
+@dataclass(frozen=True)
+class Node:
+    op: str
+    params: tuple          # JSON-able scalars and tuples
+    deps: Tuple[str, ...]  # keys of the input nodes
+
+    @property
+    def key(self) -> str:
+        return hashlib.sha1(repr((self.op, self.params, self.deps)).encode()).hexdigest()[:20]
+
+
+def keyed_rng(seed:int, *content) -> np.random.Generator:
+    digest = hashlib.sha1(repr(content).encode()).digest()
+    return np.random.default_rng(np.random.SeedSequence([seed, int.from_bytes(digest[:8], "little")]))
+
+
+def encode_design(design:LSMDesign) -> tuple:
+    return (float(design.bits_per_elem), float(design.size_ratio), design.policy.value)
+
+def decode_design(value:Sequence) -> LSMDesign:
+    return LSMDesign(bits_per_elem=value[0], size_ratio=value[1], policy=Policy(value[2]), kapacity=())
+
+
+"""
+    Perturbed workload. With common random numbers the standard noise is shared by
+    every epsilon of a (workload, trial), as in trials.util.CommonNoise
+"""
+def op_perturb(key:str, params:tuple, inputs:list) -> tuple:
+    seed, workload, trial, epsilon, workloadScaler, noiseScaler, sensitivity, crn = params
+    rng = keyed_rng(seed, "perturb", workload, trial, None if crn else epsilon)
+    mechanism = LaplaceMechanism(workloadScaler=workloadScaler, noiseScaler=noiseScaler,
+                                 sensitivity=sensitivity, epsilon=epsilon)
+    return tuple(mechanism.perturb_batch(np.array(workload), 1, standardNoise=rng.laplace(0, 1, 4))[0, 0].tolist())
+
+
+def op_rho(key:str, params:tuple, inputs:list) -> float:
+    seed, workload, trial, epsilon, workloadScaler, noiseScaler, sensitivity, numWorkloads, crn = params
+    rng = keyed_rng(seed, "rho", workload, trial, None if crn else epsilon)
+    estimator = RhoEstimator(workloadScaler=workloadScaler, noiseScaler=noiseScaler,
+                             sensitivity=sensitivity, numWorkloads=numWorkloads)
+    return estimator.estimate(np.array(workload), epsilon, standardNoise=rng.laplace(0, 1, (numWorkloads, 4)))
+
+
+"""
+    rho looked up in the config's RhoCalibrationTable instead of estimated
+"""
+def op_rho_table(key:str, params:tuple, inputs:list) -> float:
+    path, workload, epsilon = params
+    return float(load_rho_table(path).lookup(np.array(workload), epsilon))
+
+
+"""
+    Nominal design of a fixed workload (params) or of a perturbed one (input)
+"""
+def op_nominal(key:str, params:tuple, inputs:list) -> tuple:
+    seed, workload, numTunings = params
+    workload = inputs[0] if inputs else workload
+    context = ExperimentContext.default()
+    design = get_best_nominal_tuning(workload=Workload(*workload), bounds=context.bounds, numTunings=numTunings,
+                                     solver=context.solver, system=context.system, costFunc=context.cost,
+                                     rng=keyed_rng(seed, key))
+    return encode_design(design)
+
+
+"""
+    Robust design of a perturbed workload, at rhoMultiplier x an estimated rho
+    (second input) or at a fixed rho
+"""
+def op_robust(key:str, params:tuple, inputs:list) -> tuple:
+    seed, rhoMultiplier, rho, numTunings = params
+    if rhoMultiplier is not None:
+        rho = inputs[1]
+    context = ExperimentContext.default()
+    design = get_best_robust_tuning(workload=Workload(*inputs[0]), rho=rho,
+                                    rhoMultiplier=1 if rhoMultiplier is None else rhoMultiplier,
+                                    numTunings=numTunings, bounds=context.bounds, solver=context.solver,
+                                    system=context.system, costFunc=context.cost, rng=keyed_rng(seed, key))
+    return encode_design(design)
+
+
+"""
+    Cost of a design on the true workload
+"""
+def op_evaluate(key:str, params:tuple, inputs:list) -> float:
+    workload, = params
+    return ExperimentContext.default().calc_cost(decode_design(inputs[0]), Workload(*workload))
+
+
+OPS = {"perturb": op_perturb, "rho": op_rho, "rho_table": op_rho_table, "nominal": op_nominal,
+       "robust": op_robust, "evaluate": op_evaluate}
+STAGES = {"perturb": "perturbation", "rho": "rho_estimation", "rho_table": "rho_estimation",
+          "nominal": "nominal_tuning", "robust": "robust_tuning", "evaluate": "evaluation"}
+
+
+def run_node(task:Tuple[str, Node, list]):
+    key, node, inputs = task
+    with profiling.stage(STAGES[node.op]):
+        value = OPS[node.op](key, node.params, inputs)
+    profiling.profiler().dump(minInterval=1.0)
+    return key, value
+
+
+@dataclass
+class PlannedRow:
+    """
+        Node keys behind one record of one spec
+    """
+    item: object
+    row: int
+    perturb: str
+    rho: Optional[str]
+    nominal: str
+    robust: str
+    nominalCost: str
+    robustCost: str
+    idealCost: Optional[str]
+    rhoMultiplier: float
+    rhoValue: float
+
+
+class ExperimentPlan:
+    """
+        Deduplicated DAG of every node the specs need
+         - specs: ExperimentSpecs, sharing happens between specs with equal seeds and
+           Laplace mechanism parameters
+         - nodes: key -> Node, each sub-problem once
+         - requested: node references per operation before deduplication
+    """
+    def __init__(self, specs:Sequence[ExperimentSpec]) -> None:
+        self.specs = list(specs)
+        self.nodes: Dict[str, Node] = {}
+        self.requested: Counter = Counter()
+        self.rows: Dict[str, List[PlannedRow]] = {}
+        for spec in self.specs:
+            self.rows[spec.name] = self.expand(spec)
+
+
+    def add(self, op:str, params:tuple, deps:Tuple[str, ...]=()) -> str:
+        node = Node(op, params, deps)
+        key = node.key
+        self.nodes.setdefault(key, node)
+        self.requested[op] += 1
+        return key
+
+
+    def expand(self, spec:ExperimentSpec) -> List[PlannedRow]:
+        config = spec.config
+        mechanism = (config.workloadScaler, config.noiseScaler, config.sensitivity)
+        if config.rhoTable and not load_rho_table(config.rhoTable).matches(*mechanism, numWorkloads=config.numWorkloads):
+            raise ValueError(f"{config.rhoTable} was built for different Laplace mechanism parameters or rho settings")
+        rows = []
+        for item in build_work_items(config, spec.workloadTypes):
+            workload = tuple(item.workload.to_vector().tolist())
+            common = (config.seed, workload, item.trial, item.epsilon)
+            perturb = self.add("perturb", common + mechanism + (config.commonRandomNumbers,))
+            ideal = self.add("nominal", (config.seed, workload, config.numTunings))
+            idealCost = self.add("evaluate", (workload,), (ideal,))
+            rho = None
+            if config.kind != "stepwise_rho" and config.rhoTable:
+                rho = self.add("rho_table", (config.rhoTable, workload, item.epsilon))
+            elif config.kind != "stepwise_rho":
+                rho = self.add("rho", common + mechanism + (config.numWorkloads, config.commonRandomNumbers))
+
+            nominal, nominalCost, rowIdealCost = ideal, idealCost, None
+            if config.kind == "nominal_v_robust":
+                nominal = self.add("nominal", (config.seed, None, config.numTunings), (perturb,))
+                nominalCost, rowIdealCost = self.add("evaluate", (workload,), (nominal,)), idealCost
+
+            for row, value in enumerate(config.rhos):
+                if rho is None:
+                    robust = self.add("robust", (config.seed, None, float(value), config.numTunings), (perturb,))
+                    multiplier, rhoValue = np.nan, float(value)
+                else:
+                    robust = self.add("robust", (config.seed, float(value), None, config.numTunings), (perturb, rho))
+                    multiplier, rhoValue = float(value), np.nan
+                robustCost = self.add("evaluate", (workload,), (robust,))
+                rows.append(PlannedRow(item=item, row=row, perturb=perturb, rho=rho, nominal=nominal, robust=robust,
+                                       nominalCost=nominalCost, robustCost=robustCost, idealCost=rowIdealCost,
+                                       rhoMultiplier=multiplier, rhoValue=rhoValue))
+        return rows
+
+
+    """
+        Requested vs. unique nodes per operation
+    """
+    def summary(self) -> Dict[str, Tuple[int, int]]:
+        unique = Counter(node.op for node in self.nodes.values())
+        return {op: (self.requested[op], unique[op]) for op in OPS}
+
+
+    """
+        Nodes grouped by depth, so every layer only depends on earlier ones
+    """
+    def layers(self) -> List[List[str]]:
+        depth: Dict[str, int] = {}
+        for key in self.nodes:
+            stack = [key]
+            while stack:
+                current = stack[-1]
+                pending = [dep for dep in self.nodes[current].deps if dep not in depth]
+                if pending:
+                    stack.extend(pending)
+                    continue
+                depth[current] = 1 + max((depth[dep] for dep in self.nodes[current].deps), default=-1)
+                stack.pop()
+        layers = [[] for _ in range(max(depth.values(), default=-1) + 1)]
+        for key in self.nodes:
+            layers[depth[key]].append(key)
+        return layers
+
+
+    """
+        Runs every node missing from results (and the cache file, if given).
+        Returns key -> value for all nodes
+    """
+    def execute(self, processes:int=None, cachePath:str=None, progress:bool=True) -> Dict[str, object]:
+        results = load_cache(cachePath) if cachePath is not None else {}
+        results = {key: value for key, value in results.items() if key in self.nodes}
+        cache = None
+        if cachePath is not None:
+            os.makedirs(os.path.dirname(cachePath) or ".", exist_ok=True)
+            cache = open(cachePath, "a")
+        bar = tqdm(total=len(self.nodes), initial=len(results), disable=not progress, unit="node")
+        pool = Pool(processes) if processes != 0 else None
+        try:
+            for layer in self.layers():
+                tasks = [(key, self.nodes[key], [results[dep] for dep in self.nodes[key].deps])
+                         for key in layer if key not in results]
+                remote = [task for task in tasks if task[1].op not in INLINE_OPS and pool is not None]
+                local = [task for task in tasks if task[1].op in INLINE_OPS or pool is None]
+                finished = pool.imap_unordered(run_node, remote, chunksize=1) if remote else ()
+                for key, value in chain(map(run_node, local), finished):
+                    results[key] = value
+                    if cache is not None:
+                        with profiling.stage("io"):
+                            cache.write(json.dumps([key, value]) + "\n")
+                            cache.flush()
+                    bar.update(1)
+        finally:
+            bar.close()
+            if pool is not None:
+                pool.close()
+                pool.join()
+            if cache is not None:
+                cache.close()
+        return results
+
+
+    """
+        Records of one spec from node results, in the runner's record layout
+    """
+    def records(self, spec:ExperimentSpec, results:Dict[str, object]) -> List[List[dict]]:
+        byItem: Dict[int, List[dict]] = {}
+        for planned in self.rows[spec.name]:
+            original = planned.item.workload
+            perturbed = Workload(*results[planned.perturb])
+            rhoExpected = np.nan if planned.rho is None else results[planned.rho]
+            trial = SimpleNamespace(originalWorkload=original, perturbedWorkload=perturbed,
+                                    rhoExpected=rhoExpected, rhoTrue=get_KL_divergence(original, perturbed))
+            rho = planned.rhoValue if planned.rho is None else rhoExpected * planned.rhoMultiplier
+            record = make_record(planned.item, planned.row, trial, decode_design(results[planned.nominal]),
+                                 decode_design(results[planned.robust]), results[planned.nominalCost],
+                                 results[planned.robustCost], rho=rho, rhoMultiplier=planned.rhoMultiplier,
+                                 idealCost=np.nan if planned.idealCost is None else results[planned.idealCost])
+            byItem.setdefault(planned.item.index, []).append(record)
+        return [byItem[index] for index in sorted(byItem)]
+
+
+"""
+    Result store of a spec run through the planner. Its seeding differs from the
+    runner's, so the two never share a store
+"""
+def planned_store_directory(spec:ExperimentSpec) -> str:
+    return spec.store_directory + "-dag"
+
+
+"""
+    Plans, executes and writes every spec's result store and CSVs. The CSVs are
+    <workload><suffix>_dag.csv, next to (not over) the runner's
+"""
+def run_plan(specs:Sequence[ExperimentSpec], processes:int=None, cachePath:str=None) -> ExperimentPlan:
+    plan = ExperimentPlan(specs)
+    results = plan.execute(processes=processes, cachePath=cachePath)
+    for spec in plan.specs:
+        store = ResultStore(planned_store_directory(spec), format=spec.format, tag="dag-")
+        done = store.completed()
+        with store:
+            for records in plan.records(spec, results):
+                if records[0]["item"] not in done:
+                    store.append(records)
+        export_spec(replace(spec, suffix=spec.suffix + "_dag"), store)
+    return plan
+
+
+def load_cache(path:str) -> Dict[str, object]:
+    results = {}
+    if os.path.exists(path):
+        with open(path) as file:
+            for line in file:
+                try:
+                    key, value = json.loads(line)
+                except ValueError:
+                    continue  # a line cut short by a crash
+                results[key] = tuple(value) if isinstance(value, list) else value
+    return results
@@ -0,0 +1,344 @@
+"""
+    Stage-level timing of experiment runs
+    Off unless ENDURE_PROFILE is set (to a directory, or 1 for
+    experiment_results/profile) or enable() is called. Each process times the
+    trial stages
+     - perturbation, rho_estimation, nominal_tuning, robust_tuning, evaluation, io
+     - item: a whole work item, its self time is what the stages above miss
+    into per-stage log-scale histograms and per-stack self times, and writes them
+    to <directory>/<run>/<host>-<pid>-<start>.json, so pool workers and queue
+    workers on other hosts all report. The run id is fixed once per command
+    (ENDURE_PROFILE_RUN, inherited by its workers), so report() merges this run
+    only. load_profiles() merges every run under a directory; its summary() is
+    a table and write_folded() a flamegraph.pl / speedscope input.
+
+    python -m trials profile experiment_results/profile --histograms
+"""
+
+from multiprocessing import util as mp_util
+from typing import Dict, List
+import glob
+import json
+import math
+import os
+import socket
+import time
+
+PROFILE_ENV = "ENDURE_PROFILE"
+PROFILE_RUN_ENV = "ENDURE_PROFILE_RUN"
+DEFAULT_DIRECTORY = "experiment_results/profile"
+STAGES = ("perturbation", "rho_estimation", "nominal_tuning", "robust_tuning", "evaluation", "io")
+
+# Histogram bins are quarter decades from 1us to 10^4 s
+BINS_PER_DECADE = 4
+MIN_EXPONENT = -6
+NUM_BINS = 10 * BINS_PER_DECADE
+
+
+def bin_edge(index:int) -> float:
+    return 10 ** (MIN_EXPONENT + index / BINS_PER_DECADE)
+
+
+class StageStats:
+    """
+        Duration distribution of one stage, in seconds
+    """
+    def __init__(self) -> None:
+        self.count = 0
+        self.total = 0.0
+        self.min = math.inf
+        self.max = 0.0
+        self.bins = [0] * NUM_BINS
+
+
+    def add(self, seconds:float) -> None:
+        self.count += 1
+        self.total += seconds
+        self.min = min(self.min, seconds)
+        self.max = max(self.max, seconds)
+        index = int((math.log10(seconds) - MIN_EXPONENT) * BINS_PER_DECADE) if seconds > 0 else 0
+        self.bins[min(max(index, 0), NUM_BINS - 1)] += 1
+
+
+    """
+        Upper edge of the bin holding quantile q, clipped to the observed range
+    """
+    def quantile(self, q:float) -> float:
+        if self.count == 0:
+            return math.nan
+        seen = 0
+        for index, count in enumerate(self.bins):
+            seen += count
+            if seen >= q * self.count:
+                return min(max(bin_edge(index + 1), self.min), self.max)
+        return self.max
+
+
+    def to_dict(self) -> dict:
+        return {"count": self.count, "total": self.total, "min": self.min if self.count else None,
+                "max": self.max, "bins": self.bins}
+
+
+    def merge(self, data:dict) -> None:
+        self.count += data["count"]
+        self.total += data["total"]
+        if data["min"] is not None:
+            self.min = min(self.min, data["min"])
+        self.max = max(self.max, data["max"])
+        self.bins = [a + b for a, b in zip(self.bins, data["bins"])]
+
+
+class _Stage:
+    __slots__ = ("profiler", "name")
+
+    def __init__(self, profiler:"StageProfiler", name:str) -> None:
+        self.profiler = profiler
+        self.name = name
+
+    def __enter__(self) -> None:
+        self.profiler.stack.append([self.name, time.perf_counter(), 0.0])
+
+    def __exit__(self, *exc) -> None:
+        self.profiler.pop(time.perf_counter())
+
+
+class _NullStage:
+    __slots__ = ()
+
+    def __enter__(self) -> None:
+        pass
+
+    def __exit__(self, *exc) -> None:
+        pass
+
+
+NULL_STAGE = _NullStage()
+
+
+class StageProfiler:
+    """
+        Stage timings of one process
+         - directory: where dump() writes, None for a disabled profiler (stage() then
+           costs one attribute check) or an aggregate built by load_profiles()
+    """
+    def __init__(self, directory:str=None) -> None:
+        self.directory = directory
+        self.enabled = directory is not None
+        self.stats: Dict[str, StageStats] = {}
+        self.folded: Dict[str, float] = {}
+        self.stack: List[list] = []
+        self.started = time.time_ns()
+        self.lastDump = time.monotonic()
+        if self.enabled:
+            mp_util.Finalize(None, self.dump, exitpriority=10)
+
+
+    """
+        Context manager timing one stage. A stage entered inside itself (the
+        evaluation of a planner node calling Cost, say) is counted once
+    """
+    def stage(self, name:str):
+        if not self.enabled or (self.stack and self.stack[-1][0] == name):
+            return NULL_STAGE
+        return _Stage(self, name)
+
+
+    def pop(self, now:float) -> None:
+        name, start, children = self.stack.pop()
+        seconds = now - start
+        path = ";".join([frame[0] for frame in self.stack] + [name])
+        self.folded[path] = self.folded.get(path, 0.0) + seconds - children
+        if self.stack:
+            self.stack[-1][2] += seconds
+        stats = self.stats.get(name)
+        if stats is None:
+            stats = self.stats[name] = StageStats()
+        stats.add(seconds)
+
+
+    def to_dict(self) -> dict:
+        return {"host": socket.gethostname(), "pid": os.getpid(),
+                "stages": {name: stats.to_dict() for name, stats in self.stats.items()},
+                "folded": self.folded}
+
+
+    def merge(self, data:dict) -> None:
+        for name, stats in data["stages"].items():
+            self.stats.setdefault(name, StageStats()).merge(stats)
+        for path, seconds in data["folded"].items():
+            self.folded[path] = self.folded.get(path, 0.0) + seconds
+
+
+    """
+        Writes this process's totals so far (replacing its earlier dump).
+        With minInterval, skips the write if the last one is more recent
+    """
+    def dump(self, minInterval:float=0.0) -> None:
+        if not self.enabled or not self.stats or time.monotonic() - self.lastDump < minInterval:
+            return
+        self.lastDump = time.monotonic()
+        os.makedirs(self.directory, exist_ok=True)
+        path = os.path.join(self.directory, f"{socket.gethostname()}-{os.getpid()}-{self.started}.json")
+        with open(path + ".tmp", "w") as file:
+            json.dump(self.to_dict(), file)
+        os.replace(path + ".tmp", path)
+
+
+    """
+        Table of calls, total time, share of all profiled time and duration
+        percentiles (from the histograms) per stage
+    """
+    def summary(self) -> str:
+        wall = sum(self.folded.values())
+        names = [name for name in STAGES + ("item",) if name in self.stats]
+        names += sorted(set(self.stats) - set(names))
+        lines = [f"{'stage':<16}{'calls':>10}{'total s':>12}{'share':>8}{'mean ms':>11}"
+                 f"{'p50 ms':>10}{'p95 ms':>10}{'max ms':>10}"]
+        for name in names:
+            stats = self.stats[name]
+            share = stats.total / wall if wall else 0.0
+            lines.append(f"{name:<16}{stats.count:>10}{stats.total:>12.3f}{share:>8.1%}"
+                         f"{1e3 * stats.total / stats.count:>11.3f}{1e3 * stats.quantile(0.5):>10.3f}"
+                         f"{1e3 * stats.quantile(0.95):>10.3f}{1e3 * stats.max:>10.3f}")
+        lines.append(f"{'profiled':<16}{'':>10}{wall:>12.3f}")
+        return "\n".join(lines)
+
+
+    """
+        Text histogram of every stage's durations
+    """
+    def histograms(self, width:int=40) -> str:
+        lines = []
+        for name, stats in self.stats.items():
+            used = [index for index, count in enumerate(stats.bins) if count]
+            if not used:
+                continue
+            lines.append(f"{name} ({stats.count} calls)")
+            peak = max(stats.bins)
+            for index in range(used[0], used[-1] + 1):
+                count = stats.bins[index]
+                bar = "#" * math.ceil(width * count / peak) if count else ""
+                lines.append(f"  {format_seconds(bin_edge(index)):>8} - {format_seconds(bin_edge(index + 1)):<8}"
+                             f" {bar} {count}")
+        return "\n".join(lines)
+
+
+    """
+        Folded stacks ("item;robust_tuning <microseconds>" per line), the input
+        format of flamegraph.pl, inferno and speedscope
+    """
+    def write_folded(self, path:str) -> None:
+        with open(path, "w") as file:
+            for stack, seconds in sorted(self.folded.items()):
+                file.write(f"{stack} {max(round(seconds * 1e6), 0)}\n")
+
+
+def format_seconds(seconds:float) -> str:
+    for unit, scale in (("s", 1), ("ms", 1e-3), ("us", 1e-6)):
+        if seconds >= scale:
+            return f"{seconds / scale:.3g}{unit}"
+    return f"{seconds * 1e6:.3g}us"
+
+
+_profiler = None
+
+
+def _reset() -> None:
+    global _profiler
+    _profiler = None
+
+os.register_at_fork(after_in_child=_reset)
+
+
+"""
+    Profile directory from ENDURE_PROFILE, None when profiling is off
+"""
+def profile_directory() -> str:
+    value = os.environ.get(PROFILE_ENV, "")
+    if value.lower() in ("", "0", "false", "no", "off"):
+        return None
+    return DEFAULT_DIRECTORY if value.lower() in ("1", "true", "yes", "on") else value
+
+
+def new_run_id() -> str:
+    return f"{time.strftime('%Y%m%d-%H%M%S')}-{socket.gethostname()}-{os.getpid()}"
+
+
+"""
+    Id of the current run, created on first use and passed to child processes
+    through ENDURE_PROFILE_RUN
+"""
+def run_id() -> str:
+    value = os.environ.get(PROFILE_RUN_ENV, "")
+    if not value:
+        value = os.environ[PROFILE_RUN_ENV] = new_run_id()
+    return value
+
+
+"""
+    Where this run's processes dump, None when profiling is off
+"""
+def run_directory() -> str:
+    directory = profile_directory()
+    return None if directory is None else os.path.join(directory, run_id())
+
+
+"""
+    This process's profiler (a forked worker gets its own)
+"""
+def profiler() -> StageProfiler:
+    global _profiler
+    if _profiler is None:
+        _profiler = StageProfiler(run_directory())
+    return _profiler
+
+
+def stage(name:str):
+    return profiler().stage(name)
+
+
+"""
+    Turns profiling on, as a new run, for this process and the workers it starts
+    from now on
+"""
+def enable(directory:str=DEFAULT_DIRECTORY) -> None:
+    os.environ[PROFILE_ENV] = directory
+    os.environ[PROFILE_RUN_ENV] = new_run_id()
+    _reset()
+
+
+def enabled() -> bool:
+    return profiler().enabled
+
+
+"""
+    All dumps in directory and its run subdirectories merged into one (disabled) profiler
+"""
+def load_profiles(directory:str) -> StageProfiler:
+    merged = StageProfiler()
+    for path in sorted(glob.glob(os.path.join(directory, "**", "*.json"), recursive=True)):
+        with open(path) as file:
+            merged.merge(json.load(file))
+    return merged
+
+
+"""
+    Flushes this process, writes <directory>/profile.folded and returns the summary
+    table of every process that dumped into directory. Without one, that is the
+    current run's directory (or every run under the default one when profiling is off)
+"""
+def report(directory:str=None, histograms:bool=False) -> str:
+    directory = (profiler().directory or DEFAULT_DIRECTORY) if directory is None else directory
+    profiler().dump()
+    os.makedirs(directory, exist_ok=True)
+    merged = load_profiles(directory)
+    merged.write_folded(os.path.join(directory, "profile.folded"))
+    text = merged.summary()
+    if histograms:
+        text += "\n\n" + merged.histograms()
+    return text + f"\n\nflamegraph input: {os.path.join(directory, 'profile.folded')}"
+
+
+# Profiling switched on from the environment: fix the run id before any worker starts
+if profile_directory() is not None:
+    run_id()
@@ -0,0 +1,339 @@
+"""
+    Parallel experiment runner
+    Turns a (workload, trial, epsilon) grid into independent work items and runs
+    them on a process pool. Each item sweeps its rho values on one trial object,
+    so every rho shares the same perturbed workload as in the serial scripts.
+    Every item draws from its own numpy Generator seeded by its grid position,
+    and the robust tunings of each rho row from one seeded by the row as well,
+    so results depend neither on the number of processes nor on which rows of
+    an item are run together.
+"""
+
+from dataclasses import dataclass
+from functools import lru_cache
+from multiprocessing import Pool
+from typing import Callable, Dict, Iterator, List, Sequence, Tuple, Union
+import csv
+import os
+
+import numpy as np
+from tqdm import tqdm
+
+from differential_privacy import RhoCalibrationTable
+from endure.lsm.types import LSMDesign, Workload
+from . import profiling
+from .nominal_v_robust import NominalvRobustTrial
+from .rho_multiples import RhoMultiplesTrial
+from .stepwise_rho import StepwiseRhoTrial
+from .store import ResultStore
+from .util import CommonNoise
+
+
+@dataclass(frozen=True)
+class ExperimentConfig:
+    """
+        Parameters shared by every work item of an experiment
+         - kind: one of EXPERIMENTS (rho_multiples, nominal_v_robust, stepwise_rho)
+         - epsilons: privacy levels swept per trial
+         - rhos: rho multipliers (rho_multiples, nominal_v_robust) or rho values (stepwise_rho)
+         - numTrials: repetitions of the whole epsilon sweep
+         - commonRandomNumbers: share one CommonNoise across the epsilons of a trial
+         - seed: root of every work item's Generator
+         - rhoTable: path of a saved RhoCalibrationTable whose lookups replace the
+           per-item rho estimates (rho_multiples, nominal_v_robust), "" to estimate
+    """
+    kind: str
+    epsilons: Tuple[float, ...]
+    rhos: Tuple[float, ...]
+    numTunings: int = 100
+    workloadScaler: int = 100
+    noiseScaler: float = 1
+    sensitivity: int = 1
+    numWorkloads: int = 10
+    numTrials: int = 1
+    commonRandomNumbers: bool = False
+    seed: int = 0
+    rhoTable: str = ""
+
+
+@dataclass(frozen=True)
+class WorkItem:
+    index: int               # position in the grid, fixes output order
+    workloadIndex: int
+    workloadName: str
+    workload: Workload
+    trial: int
+    epsilonIndex: int
+    epsilon: float
+
+
+"""
+    Work items of one rho sweep each, in workload, trial, epsilon order
+"""
+def build_work_items(config:ExperimentConfig, workloadTypes:Sequence) -> List[WorkItem]:
+    items = []
+    for w, workloadType in enumerate(workloadTypes):
+        for trial in range(config.numTrials):
+            for e, epsilon in enumerate(config.epsilons):
+                items.append(WorkItem(index=len(items), workloadIndex=w, workloadName=str(workloadType),
+                                      workload=workloadType.workload, trial=trial, epsilonIndex=e,
+                                      epsilon=float(epsilon)))
+    return items
+
+
+"""
+    Generator for one item, and the CommonNoise shared by a (workload, trial) pair
+"""
+def item_rng(config:ExperimentConfig, item:WorkItem) -> np.random.Generator:
+    key = (item.workloadIndex, item.trial, item.epsilonIndex)
+    return np.random.default_rng(np.random.SeedSequence(config.seed, spawn_key=key))
+
+"""
+    Generator of the robust tunings of one rho row of an item
+"""
+def row_rng(config:ExperimentConfig, item:WorkItem, row:int) -> np.random.Generator:
+    key = (item.workloadIndex, item.trial, item.epsilonIndex, row)
+    return np.random.default_rng(np.random.SeedSequence(config.seed, spawn_key=key))
+
+def item_common_noise(config:ExperimentConfig, item:WorkItem) -> CommonNoise:
+    key = (item.workloadIndex, item.trial)
+    rng = np.random.default_rng(np.random.SeedSequence(config.seed, spawn_key=key))
+    return CommonNoise(config.numWorkloads, rng=rng)
+
+
+"""
+    The config's rho table, loaded once per process (None without one)
+"""
+@lru_cache(maxsize=4)
+def load_rho_table(path:str) -> RhoCalibrationTable:
+    return RhoCalibrationTable.load(path) if path else None
+
+
+# One record per rho value of a work item. rho is what the robust tuner was given,
+# columns that do not apply to an experiment kind are NaN
+RECORD_COLUMNS = ("item", "row", "workload", "trial", "epsilon", "rho_multiplier", "rho", "rho_expected",
+                  "rho_true", "robust_cost", "nominal_cost", "ideal_cost",
+                  "perturbed_z0", "perturbed_z1", "perturbed_q", "perturbed_w",
+                  "true_z0", "true_z1", "true_q", "true_w",
+                  "nominal_h", "nominal_T", "nominal_policy", "robust_h", "robust_T", "robust_policy")
+
+
+def make_record(item:WorkItem, row:int, trial, nominalDesign:LSMDesign, robustDesign:LSMDesign,
+                nominalCost:float, robustCost:float, rho:float, rhoMultiplier:float=np.nan,
+                idealCost:float=np.nan) -> dict:
+    record = {"item": item.index, "row": row, "workload": item.workloadIndex, "trial": item.trial,
+              "epsilon": item.epsilon, "rho_multiplier": float(rhoMultiplier), "rho": float(rho),
+              "rho_expected": float(getattr(trial, "rhoExpected", np.nan)), "rho_true": float(trial.rhoTrue),
+              "robust_cost": float(robustCost), "nominal_cost": float(nominalCost), "ideal_cost": float(idealCost)}
+    for prefix, workload in (("perturbed", trial.perturbedWorkload), ("true", trial.originalWorkload)):
+        record.update(zip((f"{prefix}_z0", f"{prefix}_z1", f"{prefix}_q", f"{prefix}_w"),
+                          workload.to_vector().tolist()))
+    for prefix, design in (("nominal", nominalDesign), ("robust", robustDesign)):
+        record[f"{prefix}_h"] = float(design.bits_per_elem)
+        record[f"{prefix}_T"] = float(design.size_ratio)
+        record[f"{prefix}_policy"] = design.policy.value
+    return record
+
+
+def make_rho_multiples_trial(config:ExperimentConfig, item:WorkItem, rng:np.random.Generator,
+                             commonNoise:CommonNoise) -> RhoMultiplesTrial:
+    return RhoMultiplesTrial(originalWorkload=item.workload, epsilon=item.epsilon,
+                             workloadScaler=config.workloadScaler, noiseScaler=config.noiseScaler,
+                             sensitivity=config.sensitivity, numWorkloads=config.numWorkloads,
+                             rhoTable=load_rho_table(config.rhoTable), commonNoise=commonNoise, rng=rng)
+
+
+def run_rho_multiples(config:ExperimentConfig, item:WorkItem, trial:RhoMultiplesTrial,
+                      rows:Sequence[int]) -> List[dict]:
+    records = []
+    for row in rows:
+        rhoMultiplier = config.rhos[row]
+        designNominal, designRobust, nominalCost, robustCost = trial.run_trial(numTunings=config.numTunings,
+                                                                               rhoMultiplier=rhoMultiplier,
+                                                                               rng=row_rng(config, item, row))
+        records.append(make_record(item, row, trial, designNominal, designRobust, nominalCost, robustCost,
+                                   rho=trial.rhoExpected * rhoMultiplier, rhoMultiplier=rhoMultiplier))
+    return records
+
+
+def make_nominal_v_robust_trial(config:ExperimentConfig, item:WorkItem, rng:np.random.Generator,
+                                commonNoise:CommonNoise) -> NominalvRobustTrial:
+    return NominalvRobustTrial(originalWorkload=item.workload, epsilon=item.epsilon,
+                               workloadScaler=config.workloadScaler, noiseScaler=config.noiseScaler,
+                               sensitivity=config.sensitivity, numWorkloads=config.numWorkloads,
+                               rhoTable=load_rho_table(config.rhoTable), commonNoise=commonNoise, rng=rng)
+
+
+def run_nominal_v_robust(config:ExperimentConfig, item:WorkItem, trial:NominalvRobustTrial,
+                         rows:Sequence[int]) -> List[dict]:
+    records = []
+    for row in rows:
+        rhoMultiplier = config.rhos[row]
+        idealNominalCost, nominalCost, robustCost = trial.run_trial(numTunings=config.numTunings,
+                                                                    rhoMultiplier=rhoMultiplier,
+                                                                    rng=row_rng(config, item, row))
+        records.append(make_record(item, row, trial, trial.nominalDesign, trial.robustDesign, nominalCost,
+                                   robustCost, rho=trial.rhoExpected * rhoMultiplier,
+                                   rhoMultiplier=rhoMultiplier, idealCost=idealNominalCost))
+    return records
+
+
+def make_stepwise_rho_trial(config:ExperimentConfig, item:WorkItem, rng:np.random.Generator,
+                            commonNoise:CommonNoise) -> StepwiseRhoTrial:
+    return StepwiseRhoTrial(originalWorkload=item.workload, epsilon=item.epsilon,
+                            workloadScaler=config.workloadScaler, noiseScaler=config.noiseScaler,
+                            sensitivity=config.sensitivity, commonNoise=commonNoise, rng=rng)
+
+
+def run_stepwise_rho(config:ExperimentConfig, item:WorkItem, trial:StepwiseRhoTrial,
+                     rows:Sequence[int]) -> List[dict]:
+    records = []
+    for row in rows:
+        rho = config.rhos[row]
+        designNominal, designRobust, nominalCost, robustCost = trial.run_trial(numTunings=config.numTunings, rho=rho,
+                                                                               rng=row_rng(config, item, row))
+        records.append(make_record(item, row, trial, designNominal, designRobust, nominalCost, robustCost, rho=rho))
+    return records
+
+
+# kind -> (CSV header, record columns of each CSV column, item function).
+# "perturbed" and "true" are written as Workloads
+EXPERIMENTS: Dict[str, Tuple[List[str], List[str], Callable]] = {
+    "rho_multiples": (["Epsilon", "Robust Cost", "Nominal Cost", "Rho Multiplier", "Rho (Expected)",
+                       "Rho (True)", "Workload (Perturbed)", "Workload (True)"],
+                      ["epsilon", "robust_cost", "nominal_cost", "rho_multiplier", "rho_expected", "rho_true",
+                       "perturbed", "true"], run_rho_multiples),
+    "nominal_v_robust": (["Epsilon", "Robust Cost", "Nominal Cost", "Ideal Cost", "Rho Multiplier",
+                          "Rho (Expected)", "Rho (True)", "Workload (Perturbed)", "Workload (True)"],
+                         ["epsilon", "robust_cost", "nominal_cost", "ideal_cost", "rho_multiplier",
+                          "rho_expected", "rho_true", "perturbed", "true"], run_nominal_v_robust),
+    "stepwise_rho": (["Epsilon", "Robust Cost", "Nominal Cost", "Rho", "Rho (True)", "Workload (Perturbed)",
+                      "Workload (True)"],
+                     ["epsilon", "robust_cost", "nominal_cost", "rho", "rho_true", "perturbed", "true"],
+                     run_stepwise_rho),
+}
+
+
+# kind -> function building a work item's trial (perturbed workload, rho estimate)
+TRIALS: Dict[str, Callable] = {
+    "rho_multiples": make_rho_multiples_trial,
+    "nominal_v_robust": make_nominal_v_robust_trial,
+    "stepwise_rho": make_stepwise_rho_trial,
+}
+
+
+def make_trial(config:ExperimentConfig, item:WorkItem):
+    commonNoise = item_common_noise(config, item) if config.commonRandomNumbers else None
+    return TRIALS[config.kind](config, item, item_rng(config, item), commonNoise)
+
+
+"""
+    Runs one work item, in a worker process: (config, item) for every rho row, or
+    (config, item, rows) for some of them. When profiling, the worker's stage
+    timings are written after every item
+"""
+def run_item(task:Union[Tuple[ExperimentConfig, WorkItem], Tuple[ExperimentConfig, WorkItem, Sequence[int]]]
+             ) -> Tuple[WorkItem, List[dict]]:
+    item, records, _ = run_item_trial(task)
+    return item, records
+
+
+"""
+    run_item that also returns the item's trial. Passing it back as (config, item,
+    rows, trial) runs more rows without redoing the perturbation, rho estimate and
+    nominal tunings, with the same records as a fresh run
+"""
+def run_item_trial(task:tuple) -> Tuple[WorkItem, List[dict], object]:
+    config, item = task[0], task[1]
+    rows = task[2] if len(task) > 2 else range(len(config.rhos))
+    trial = task[3] if len(task) > 3 else None
+    _, _, runFn = EXPERIMENTS[config.kind]
+    with profiling.stage("item"):
+        if trial is None:
+            trial = make_trial(config, item)
+        records = runFn(config, item, trial, rows)
+    profiling.profiler().dump()
+    return item, records, trial
+
+
+class ExperimentRunner:
+    """
+        Executes an experiment grid on a process pool
+         - config: ExperimentConfig
+         - workloadTypes: ExpectedWorkload members (or anything with .workload and a str name)
+         - processes: pool size, None for every core, 0 to run in this process
+         - progress: show a tqdm progress bar with ETA
+    """
+    def __init__(self, config:ExperimentConfig, workloadTypes:Sequence, processes:int=None,
+                 progress:bool=True) -> None:
+        if config.kind not in EXPERIMENTS:
+            raise ValueError(f"kind must be one of {list(EXPERIMENTS)}")
+        if config.rhoTable and config.kind == "stepwise_rho":
+            raise ValueError("stepwise_rho sweeps fixed rhos, it has no use for a rhoTable")
+        self.config = config
+        self.workloadTypes = list(workloadTypes)
+        self.processes = processes
+        self.progress = progress
+        self.header = EXPERIMENTS[config.kind][0]
+
+
+    def items(self) -> List[WorkItem]:
+        return build_work_items(self.config, self.workloadTypes)
+
+
+    """
+        Yields (item, records) in grid order as soon as each item and all earlier ones finish
+    """
+    def run(self, items:Sequence[WorkItem]=None) -> Iterator[Tuple[WorkItem, List[dict]]]:
+        items = self.items() if items is None else list(items)
+        tasks = [(self.config, item) for item in items]
+        bar = tqdm(total=len(tasks), disable=not self.progress, unit="item", smoothing=0.05)
+        try:
+            if self.processes == 0:
+                for task in tasks:
+                    result = run_item(task)
+                    bar.update(1)
+                    yield result
+            else:
+                with Pool(self.processes) as pool:
+                    for result in pool.imap(run_item, tasks, chunksize=1):
+                        bar.update(1)
+                        yield result
+        finally:
+            bar.close()
+
+
+    """
+        Runs the items missing from store, appending each as it finishes.
+        Returns the number of items run
+    """
+    def run_to_store(self, store:ResultStore, items:Sequence[WorkItem]=None) -> int:
+        items = self.items() if items is None else items
+        done = store.completed()
+        pending = [item for item in items if item.index not in done]
+        with store:
+            for _, records in self.run(pending):
+                store.append(records)
+        return len(pending)
+
+
+"""
+    Stored records of one experiment kind as CSV tables (header included), one per workload index
+"""
+def csv_tables(kind:str, columns:Dict[str, np.ndarray]) -> Dict[int, List[list]]:
+    header, fields, _ = EXPERIMENTS[kind]
+    values = {key: array.tolist() for key, array in columns.items()}
+    workloads = {}
+    for prefix in ("perturbed", "true"):
+        vectors = zip(*(values[f"{prefix}_{key}"] for key in ("z0", "z1", "q", "w")))
+        workloads[prefix] = [Workload(*vector) for vector in vectors]
+    tables: Dict[int, List[list]] = {}
+    for i, workloadIndex in enumerate(values.get("workload", [])):
+        row = [workloads[field][i] if field in workloads else values[field][i] for field in fields]
+        tables.setdefault(workloadIndex, [header]).append(row)
+    return tables
+
+
+def write_csv(subdirectory:str, name:str, table:List[list]) -> None:
+    with profiling.stage("io"), open(os.path.join(subdirectory, name + ".csv"), "w", newline='') as file:
+        csv.writer(file).writerows(table)
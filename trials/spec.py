@@ -0,0 +1,130 @@
+"""
+    TOML experiment specs
+    One file per experiment holds what used to be the run_* scripts' module
+    constants, see experiments/ for the four shipped experiments. Results go to
+    a resumable ResultStore under <output>/results and are exported as CSVs.
+"""
+
+from dataclasses import asdict, dataclass, fields
+from typing import List
+import hashlib
+import json
+import os
+
+import numpy as np
+
+try:
+    import tomllib
+except ImportError:  # Python < 3.11
+    import toml as tomllib
+
+from workload_types import ExpectedWorkload, sampleWorkloads
+from .runner import EXPERIMENTS, ExperimentConfig, ExperimentRunner, build_work_items, csv_tables, write_csv
+from .store import ResultStore
+
+
+@dataclass(frozen=True)
+class ExperimentSpec:
+    """
+        A loaded spec
+         - name: spec file name without extension, tags shard and queue files
+         - config: ExperimentConfig shared by every work item
+         - workloadTypes: ExpectedWorkload members or SampledWorkloads
+         - output: directory of the final CSVs
+         - suffix: appended to every CSV name
+         - format: result store chunk format, "npz" or "parquet"
+    """
+    name: str
+    config: ExperimentConfig
+    workloadTypes: tuple
+    output: str
+    suffix: str = ""
+    format: str = "npz"
+
+
+    """
+        Result store of this spec, <output>/results/<name>-<digest>
+    """
+    @property
+    def store_directory(self) -> str:
+        return os.path.join(self.output, "results", f"{self.name}-{self.digest}")
+
+
+    """
+        Stable digest of everything that changes the results, so shard outputs and
+        queues from a different spec are never mixed
+    """
+    @property
+    def digest(self) -> str:
+        content = {"config": asdict(self.config),
+                   "workloads": [[str(w), w.workload.to_vector().tolist()] for w in self.workloadTypes]}
+        text = json.dumps(content, sort_keys=True, default=float)
+        return hashlib.sha1(text.encode()).hexdigest()[:16]
+
+
+"""
+    Grid values from either {values = [...]} or {start, stop, step} (np.arange semantics)
+"""
+def parse_range(section:dict) -> tuple:
+    if "values" in section:
+        return tuple(section["values"])
+    return tuple(np.arange(section["start"], section["stop"], section["step"]).tolist())
+
+
+"""
+    "all", a list of ExpectedWorkload names, or {sample, method, seed} for sampleWorkloads
+"""
+def parse_workloads(value) -> List:
+    if value == "all":
+        return list(ExpectedWorkload)
+    if isinstance(value, dict):
+        return sampleWorkloads(value["sample"], method=value.get("method", "sobol"), seed=value.get("seed", 0))
+    return [ExpectedWorkload[name.upper()] for name in value]
+
+
+def load_spec(path:str) -> ExperimentSpec:
+    with open(path, "rb" if tomllib.__name__ == "tomllib" else "r") as file:
+        data = tomllib.load(file)
+    if data.get("kind") not in EXPERIMENTS:
+        raise ValueError(f"{path}: kind must be one of {list(EXPERIMENTS)}")
+
+    options = {f.name for f in fields(ExperimentConfig)} - {"kind", "epsilons", "rhos"}
+    unknown = set(data) - options - {"kind", "epsilon", "rho", "workloads", "output", "suffix", "name", "format"}
+    if unknown:
+        raise ValueError(f"{path}: unknown keys {sorted(unknown)}")
+
+    config = ExperimentConfig(kind=data["kind"], epsilons=parse_range(data["epsilon"]),
+                              rhos=parse_range(data["rho"]),
+                              **{key: data[key] for key in options if key in data})
+    name = data.get("name", os.path.splitext(os.path.basename(path))[0])
+    return ExperimentSpec(name=name, config=config, workloadTypes=tuple(parse_workloads(data["workloads"])),
+                          output=data["output"], suffix=data.get("suffix", ""), format=data.get("format", "npz"))
+
+
+"""
+    Runs every work item missing from the spec's result store, then writes the CSVs.
+    Re-running an interrupted spec picks up where it stopped
+"""
+def run_spec(spec:ExperimentSpec, processes:int=None) -> List[str]:
+    store = ResultStore(spec.store_directory, format=spec.format)
+    ExperimentRunner(spec.config, spec.workloadTypes, processes=processes).run_to_store(store)
+    return export_spec(spec, store)
+
+
+"""
+    Writes one CSV per workload from the result store (legacy layout for the notebooks).
+    Raises ValueError when work items are missing
+"""
+def export_spec(spec:ExperimentSpec, store:ResultStore) -> List[str]:
+    items = build_work_items(spec.config, spec.workloadTypes)
+    missing = len({item.index for item in items} - store.completed())
+    if missing:
+        raise ValueError(f"{missing} of {len(items)} work items have no results yet")
+
+    os.makedirs(spec.output, exist_ok=True)
+    paths = []
+    for workloadIndex, table in csv_tables(spec.config.kind, store.load()).items():
+        name = str(spec.workloadTypes[workloadIndex]) + spec.suffix
+        write_csv(spec.output, name, table)
+        paths.append(os.path.join(spec.output, name + ".csv"))
+    return paths
@@ -2,16 +2,12 @@
     Simulates a trial that predefines rho
 """
 
-from .util import get_perturbed_workload, get_KL_divergence, get_best_nominal_tuning, get_best_robust_tuning
-from typing import Tuple, List
-from endure.lsm.types import LSMDesign, System
-from endure.solver import ClassicSolver
-from endure.lsm import (
-    Cost,
-    LSMBounds,
-    ClassicGen,
-    Workload
-)
+from . import profiling
+from .context import ExperimentContext
+from .util import CommonNoise, get_perturbed_workload, get_KL_divergence
+from typing import Tuple
+import numpy as np
+from endure.lsm.types import LSMDesign, Workload
 
 class StepwiseRhoTrial: 
     """
@@ -21,44 +17,49 @@ class StepwiseRhoTrial:
          - perturbedWorkload: workload perturbed using the laplace mechanism 
          - rhoTrue: true rho between originalWorkload and perturbedWorkload 
          - bestNominalDesign: best nominal design for the true workload
+         - commonNoise: optional CommonNoise shared across the epsilons of one trial index
+         - rng: optional numpy Generator for all noise and robust solver starts (global np.random otherwise)
+         - context: optional ExperimentContext with the shared System, solver, Cost and memoized
+           nominal designs (the process default otherwise)
     """
     def __init__(self, originalWorkload: Workload, epsilon:float, 
-                 workloadScaler:int, noiseScaler:int, sensitivity:float=1
-                 ) -> None:
+                 workloadScaler:int, noiseScaler:int, sensitivity:float=1, 
+                 commonNoise:CommonNoise=None, 
+                 rng:np.random.Generator=None, context:ExperimentContext=None) -> None:
         self.originalWorkload = originalWorkload
+        self.rng = rng
+        self.context = ExperimentContext.default() if context is None else context
         self.epsilon = epsilon
         self.bestNominalDesign = None
-        self.perturbedWorkload = get_perturbed_workload(originalWorkload=originalWorkload, sensitivity=sensitivity, 
-                                                epsilon=epsilon, noiseScaler=noiseScaler, workloadScaler=workloadScaler)
+        with profiling.stage("perturbation"):
+            self.perturbedWorkload = get_perturbed_workload(originalWorkload=originalWorkload, sensitivity=sensitivity, 
+                                                    epsilon=epsilon, noiseScaler=noiseScaler, workloadScaler=workloadScaler, 
+                                                    standardNoise=None if commonNoise is None else commonNoise.perturbNoise, 
+                                                    rng=rng)
         self.rhoTrue = get_KL_divergence(originalWorkload, self.perturbedWorkload)
         
 
     """
         Runs one trial based on a predefined rho 
         numTunings: the number of designs tried for nominal and robust solvers
+        rng: Generator of the robust solver starts, the trial's own by default
     """
-    def run_trial(self, rho:float, numTunings:int=10) -> Tuple[LSMDesign, LSMDesign, float, float]: 
-        bounds = LSMBounds()
-        gen = ClassicGen(bounds, seed=42)
-        system = gen.sample_system()
-        solver = ClassicSolver(bounds)
-        costCalculator = Cost(bounds.max_considered_levels)
+    def run_trial(self, rho:float, numTunings:int=10, rng:np.random.Generator=None
+                  ) -> Tuple[LSMDesign, LSMDesign, float, float]: 
+        context = self.context
 
         # find ideal tuning
         if self.bestNominalDesign == None: 
-            self.bestNominalDesign = get_best_nominal_tuning(workload=self.originalWorkload, numTunings=numTunings,
-                                                             bounds=bounds, solver=solver, system=system, 
-                                                             costFunc=costCalculator)
+            self.bestNominalDesign = context.nominal_design(self.originalWorkload, numTunings)
             
-        nominalCost = costCalculator.calc_cost(self.bestNominalDesign, system, self.originalWorkload)
+        nominalCost = context.calc_cost(self.bestNominalDesign, self.originalWorkload)
 
         # find best robust tuning 
-        designRobust = get_best_robust_tuning(workload=self.perturbedWorkload, rho=rho, numTunings=numTunings, 
-                                              bounds=bounds, solver=solver, system=system, 
-                                              costFunc=costCalculator)
+        designRobust = context.robust_design(self.perturbedWorkload, rho=rho, numTunings=numTunings,
+                                             rng=self.rng if rng is None else rng)
         
         # find the true cost of the robust tuning using the original workload
-        robustCost = costCalculator.calc_cost(designRobust, system, self.originalWorkload)
+        robustCost = context.calc_cost(designRobust, self.originalWorkload)
 
         return self.bestNominalDesign, designRobust, nominalCost, robustCost
     
\ No newline at end of file
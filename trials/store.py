@@ -0,0 +1,138 @@
+"""
+    Columnar, append-only store of experiment results
+    Records (one per rho value of a work item, see trials.runner.RECORD_COLUMNS)
+    are buffered and flushed as small chunk files (npz, or Parquet with pyarrow),
+    written atomically so a crash loses at most the unflushed items. An
+    interrupted run resumes by skipping the items already in the store.
+"""
+
+from typing import Dict, List, Set
+import glob
+import os
+import time
+
+import numpy as np
+
+from . import profiling
+
+FORMATS = ("npz", "parquet")
+
+
+class ResultStore:
+    """
+        Directory of chunk-*.npz / chunk-*.parquet files
+         - directory: created on first flush
+         - format: format of new chunks, existing chunks of either format are read
+         - tag: prefix of new chunk names, so concurrent writers (shards) never collide
+         - flushItems, flushSeconds: flush after this many items or this long
+    """
+    def __init__(self, directory:str, format:str="npz", tag:str="", flushItems:int=8,
+                 flushSeconds:float=60) -> None:
+        if format not in FORMATS:
+            raise ValueError(f"format must be one of {FORMATS}")
+        self.directory = directory
+        self.format = format
+        self.tag = tag
+        self.flushItems = flushItems
+        self.flushSeconds = flushSeconds
+        self.buffer: List[dict] = []
+        self.bufferedItems = 0
+        self.lastFlush = time.monotonic()
+
+
+    def __enter__(self) -> "ResultStore":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.flush()
+
+
+    def chunks(self) -> List[str]:
+        paths = glob.glob(os.path.join(self.directory, "chunk-*.npz"))
+        paths += glob.glob(os.path.join(self.directory, "chunk-*.parquet"))
+        return sorted(paths)
+
+
+    """
+        Indices of the work items with results on disk
+    """
+    def completed(self) -> Set[int]:
+        done = set()
+        for path in self.chunks():
+            done.update(read_chunk(path, ["item"])["item"].tolist())
+        return done
+
+
+    """
+        Adds the records of one work item
+    """
+    def append(self, records:List[dict]) -> None:
+        self.buffer.extend(records)
+        self.bufferedItems += 1
+        if (self.bufferedItems >= self.flushItems
+                or time.monotonic() - self.lastFlush >= self.flushSeconds):
+            self.flush()
+
+
+    def flush(self) -> None:
+        self.lastFlush = time.monotonic()
+        if not self.buffer:
+            return
+        columns = {key: np.array([record[key] for record in self.buffer]) for key in self.buffer[0]}
+        name = f"chunk-{self.tag}{time.time_ns()}-{os.getpid()}.{self.format}"
+        with profiling.stage("io"):
+            write_chunk(os.path.join(self.directory, name), columns)
+        self.buffer = []
+        self.bufferedItems = 0
+
+
+    """
+        Every record as columns, ordered by (item, row). An item written twice
+        (an expired queue lease, say) keeps its first copy
+    """
+    def load(self) -> Dict[str, np.ndarray]:
+        with profiling.stage("io"):
+            parts = [read_chunk(path) for path in self.chunks()]
+        if not parts:
+            return {}
+        columns = {key: np.concatenate([part[key] for part in parts]) for key in parts[0]}
+        _, first = np.unique(np.stack((columns["item"], columns["row"]), axis=1), axis=0, return_index=True)
+        return {key: values[first] for key, values in columns.items()}
+
+
+    """
+        Rewrites all chunks as one
+    """
+    def compact(self) -> None:
+        paths = self.chunks()
+        if len(paths) < 2:
+            return
+        columns = self.load()
+        write_chunk(os.path.join(self.directory, f"chunk-{self.tag}{time.time_ns()}-{os.getpid()}-compact.{self.format}"),
+                    columns)
+        for path in paths:
+            os.remove(path)
+
+
+def write_chunk(path:str, columns:Dict[str, np.ndarray]) -> None:
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = path + ".tmp"
+    if path.endswith(".parquet"):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        pq.write_table(pa.table(columns), tmp)
+    else:
+        with open(tmp, "wb") as file:
+            np.savez(file, **columns)
+    os.replace(tmp, path)
+
+
+def read_chunk(path:str, columns:List[str]=None) -> Dict[str, np.ndarray]:
+    if path.endswith(".parquet"):
+        import pyarrow.parquet as pq
+
+        table = pq.read_table(path, columns=columns)
+        return {name: table.column(name).to_numpy() for name in table.column_names}
+    with np.load(path) as data:
+        return {key: data[key] for key in (data.files if columns is None else columns)}
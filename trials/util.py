@@ -30,18 +30,48 @@ def workloadListToListOfLists(workloads:List[Workload]) -> List[List]:
     return vectorList
 
 
+class CommonNoise:
+    """
+        Common random numbers for one trial index: standard Laplace draws (scale 1)
+        that every epsilon scales by its own b = sensitivity/epsilon, so cost-vs-epsilon
+        curves are paired instead of independently noisy
+         - perturbNoise: [4] draws for the perturbed workload
+         - rhoNoise: [numWorkloads, 4] draws for the rho estimation samples
+    """
+    def __init__(self, numWorkloads:int=10, rng:np.random.Generator=None) -> None:
+        rng = np.random.default_rng() if rng is None else rng
+        self.perturbNoise = rng.laplace(0, 1, 4)
+        self.rhoNoise = rng.laplace(0, 1, (numWorkloads, 4))
+
+
 """
     Produces one perturbed workload 
+    standardNoise: optional scale-1 Laplace draws to use instead of fresh noise
+    rng: optional numpy Generator, the global np.random state is used otherwise
 """
 def get_perturbed_workload(originalWorkload:Workload, noiseScaler:float, 
-                           sensitivity:int, epsilon:float, workloadScaler:int) -> Workload:
+                           sensitivity:int, epsilon:float, workloadScaler:int, 
+                           standardNoise:np.ndarray=None, rng:np.random.Generator=None) -> Workload:
     mechanism = LaplaceMechanism(workloadScaler=workloadScaler, noiseScaler=noiseScaler, sensitivity=sensitivity, epsilon=epsilon)
     originalWorkload = workloadToList(originalWorkload)
-    perturbedWorkload = mechanism.perturb(originalWorkload)
+    if standardNoise is not None or rng is not None:
+        perturbedWorkload = mechanism.perturb_batch(originalWorkload, 1, rng=rng, standardNoise=standardNoise)[0, 0].tolist()
+    else:
+        perturbedWorkload = mechanism.perturb(originalWorkload)
     perturbedWorkload = listToWorkload(perturbedWorkload)
     return perturbedWorkload
 
 
+"""
+    Produces numWorkloads perturbed workloads at once as an [numWorkloads, 4] array
+"""
+def get_perturbed_workloads(originalWorkload:Workload, numWorkloads:int, noiseScaler:float, 
+                            sensitivity:int, epsilon:float, workloadScaler:int, 
+                            rng:np.random.Generator=None) -> np.ndarray:
+    mechanism = LaplaceMechanism(workloadScaler=workloadScaler, noiseScaler=noiseScaler, sensitivity=sensitivity, epsilon=epsilon)
+    return mechanism.perturb_batch(workloadToList(originalWorkload), numWorkloads, rng=rng)[0]
+
+
 """
     Wrapper method that converts workload types to list first
 """
@@ -54,16 +84,27 @@ def get_KL_divergence(p:Union[Workload, List], q:Union[Workload, List])->float:
     if len(p) != len(q):
         raise ValueError("Lists must have the same length.")
     
-    result = sum([(p[i]*np.log(p[i]/q[i])) for i in range(len(p))])
+    # 0 * log(0 / q) = 0, so zero components of p add nothing, and p > 0 where q = 0 is infinite
+    result = sum([(p[i]*np.log(p[i]/q[i])) if q[i] > 0 else np.inf for i in range(len(p)) if p[i] > 0])
     return result
 
 
+"""
+    Random solver starts from rng, or from the global np.random state without one
+"""
+def random_int(rng:np.random.Generator, low:int, high:int) -> int:
+    return np.random.randint(low, high) if rng is None else rng.integers(low, high)
+
+def random_uniform(rng:np.random.Generator, low:float, high:float) -> float:
+    return np.random.uniform(low, high) if rng is None else rng.uniform(low, high)
+
+
 """
     Find the best nominal tuning out of n (numTunings) tunings
 """
 def get_best_nominal_tuning(workload:Workload, bounds: LSMBounds, numTunings:int, 
-                            solver:ClassicSolver, system: System, costFunc:Cost
-                            ) -> LSMDesign: 
+                            solver:ClassicSolver, system: System, costFunc:Cost, 
+                            rng:np.random.Generator=None) -> LSMDesign: 
     best_cost = np.inf
     bestDesign = None
 
@@ -71,8 +112,8 @@ def get_best_nominal_tuning(workload:Workload, bounds: LSMBounds, numTunings:int
     while best_cost == np.inf: 
         for _ in range(numTunings): 
             # Randomly choose init args for the tuner 
-            H = np.random.randint(bounds.bits_per_elem_range[0], bounds.bits_per_elem_range[1])
-            T = np.random.uniform(bounds.size_ratio_range[0], bounds.size_ratio_range[1])
+            H = random_int(rng, bounds.bits_per_elem_range[0], bounds.bits_per_elem_range[1])
+            T = random_uniform(rng, bounds.size_ratio_range[0], bounds.size_ratio_range[1])
 
             with warnings.catch_warnings(record=True) as caught_warnings:
                 warnings.simplefilter("always", category=RuntimeWarning)  
@@ -101,7 +142,7 @@ def get_best_nominal_tuning(workload:Workload, bounds: LSMBounds, numTunings:int
 """
 def get_best_robust_tuning(workload:Workload, rho:float, numTunings:int, 
                            bounds: LSMBounds, solver:ClassicSolver, system:System, costFunc:Cost,
-                           rhoMultiplier:float=1) -> LSMDesign: 
+                           rhoMultiplier:float=1, rng:np.random.Generator=None) -> LSMDesign: 
     best_cost = np.inf
     bestDesign = None
     costs = []
@@ -111,10 +152,10 @@ def get_best_robust_tuning(workload:Workload, rho:float, numTunings:int,
     while best_cost == np.inf: 
         for _ in range(numTunings): 
             # Randomly choose init args for the tuner 
-            H = np.random.randint(bounds.bits_per_elem_range[0], bounds.bits_per_elem_range[1])
-            T = np.random.uniform(bounds.size_ratio_range[0], bounds.size_ratio_range[1])
-            LAMBDA = np.random.uniform(0, 10)
-            ETA = np.random.uniform(0, 10)
+            H = random_int(rng, bounds.bits_per_elem_range[0], bounds.bits_per_elem_range[1])
+            T = random_uniform(rng, bounds.size_ratio_range[0], bounds.size_ratio_range[1])
+            LAMBDA = random_uniform(rng, 0, 10)
+            ETA = random_uniform(rng, 0, 10)
 
             with warnings.catch_warnings(record=True) as caught_warnings:
                 warnings.simplefilter("always", category=RuntimeWarning)  
@@ -2,6 +2,8 @@
     Types of workloads we will use in the experiment 
 """
 from enum import Enum
+import numpy as np
+from endure.lsm.simplex import sample_simplex
 from endure.lsm.types import Workload
 
 class ExpectedWorkload(Enum):
@@ -30,4 +32,30 @@ class ExpectedWorkload(Enum):
         self.workload = workload
 
     def __str__(self):
-        return self.name.lower()
\ No newline at end of file
+        return self.name.lower()
+
+class SampledWorkload:
+    """
+        Stand-in for an ExpectedWorkload member drawn from the workload simplex,
+        so the experiment scripts can sweep sampled workloads the same way
+    """
+    def __init__(self, id: int, tag: str, workload: Workload):
+        self.id = id
+        self.tag = tag
+        self.workload = workload
+        self.name = f"{tag}_{id}"
+
+    def __str__(self):
+        return self.name
+
+
+def sampleWorkloads(n: int, method: str = "sobol", seed: int = 0, **kwargs):
+    """
+        n workloads from endure.lsm.simplex ("uniform", "sobol", "stratified",
+        "dirichlet" or "lattice"); well spread points cover the simplex with
+        fewer tunings than uniform draws. "lattice" returns C(steps + 3, 3)
+        workloads for the largest steps with at most n (10 for n = 16), or for
+        a steps= keyword, so it can return fewer than n
+    """
+    points = sample_simplex(n, np.random.default_rng(seed), method=method, **kwargs)
+    return [SampledWorkload(i, method, Workload(*p.tolist())) for i, p in enumerate(points)]